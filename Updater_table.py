@@ -3,24 +3,48 @@ from tkinter import filedialog, messagebox, ttk
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import WebDriverException, TimeoutException
 import openpyxl
 import os
 import shutil
 import threading
 import time
-import random
+import argparse
 from datetime import datetime
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Iterator, Tuple
+from text_normalizer import normalize_record
+from salary_parser import NumericIndex
+from search_index import SearchIndex
+from rollups import RollupStore
+from html_archive import HtmlArchive, KIND_DETAIL
+from job_parser import parse_job_detail
+from parse_pool import get_pool, pipelined
+from profiling import run_profiled
+from url_state import UrlStateBitmap, PENDING, DONE, FAILED, DUPLICATE
+from retry_queue import RetryQueue, RetryWorker, RetryItem
+from readiness import use_eager_loading, wait_ready
+from rate_limiter import RateLimiter
+from scheduler import Scheduler
+from browser_profile import BrowserProfile
+
+RETRY_SOURCE = "jobinja_updater"
+UPDATE_JOB = "excel_update"
+SCHEDULE_JITTER_SECONDS = 5 * 60
+DETAIL_READY_SELECTORS = ["h1"]
+DETAIL_JITTER = 3  # seconds of random spacing added on top of the configured delay
 
 
 class JobinjaScraper:
     """Handles the web scraping functionality for Jobinja website"""
     
-    def __init__(self, driver_path: str):
+    def __init__(self, driver_path: str, archive: Optional[HtmlArchive] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
         self.driver_path = driver_path
         self.driver = None
+        self.profile: Optional[BrowserProfile] = None  # persistent user-data-dir, leased until close()
+        self.archive = archive
+        self.rate_limiter = rate_limiter or RateLimiter(2, 5)
+        self.parse_pool = get_pool()
         
     def setup_driver(self) -> Optional[webdriver.Chrome]:
         """Initialize and configure Chrome WebDriver"""
@@ -39,13 +63,23 @@ class JobinjaScraper:
             options.add_argument("--disable-blink-features=AutomationControlled")
             options.add_experimental_option("excludeSwitches", ["enable-automation"])
             options.add_experimental_option('useAutomationExtension', False)
+            use_eager_loading(options)
             
             if not os.path.exists(self.driver_path):
                 raise FileNotFoundError(f"Chromedriver not found at: {self.driver_path}")
             
+            # Reuse the cached JS/CSS/fonts of earlier runs instead of a fresh temporary profile
+            if self.profile is None:
+                self.profile = BrowserProfile("jobinja")
+            self.profile.clean()
+            for argument in self.profile.selenium_args():
+                options.add_argument(argument)
+            
             service = Service(executable_path=self.driver_path)
             driver = webdriver.Chrome(service=service, options=options)
             driver.set_page_load_timeout(15)
+            if self.profile.needs_warmup():
+                self.profile.warm_selenium(driver)
             self.driver = driver
             return driver
                 
@@ -54,8 +88,8 @@ class JobinjaScraper:
         except Exception as e:
             raise Exception(f"Browser setup error: {str(e)}")
 
-    def extract_job_data(self, url: str) -> Dict[str, str]:
-        """Extract job data from a given URL"""
+    def fetch_page_source(self, url: str) -> bytes:
+        """Load a job page and return its HTML (the I/O half of extract_job_data)"""
         if not self.driver:
             self.driver = self.setup_driver()
             if not self.driver:
@@ -63,71 +97,49 @@ class JobinjaScraper:
         
         try:
             self.driver.set_page_load_timeout(30)
+            self.rate_limiter.wait()
             self.driver.get(url)
-            time.sleep(random.uniform(2, 5))
-            
-            data = {}
-            
-            def quick_extract(xpath: str) -> str:
-                try:
-                    if self.driver is None:
-                        raise RuntimeError("Driver initialization failed.")
-                    element = self.driver.find_element(By.XPATH, xpath)
-                    return str(element.text).strip() if element.text else "N/A"
-                except:
-                    return "N/A"
-            
-            data["Job Title"] = quick_extract("//h1")
-            data["Category"] = quick_extract('//h4[text()="دسته‌بندی شغلی"]/following-sibling::div/span')
-            data["Location"] = quick_extract('//h4[text()="موقعیت مکانی"]/following-sibling::div/span')
-            data["Cooperation Type"] = quick_extract('//h4[text()="نوع همکاری"]/following-sibling::div/span')
-            data["Work Experience"] = quick_extract('//h4[text()="حداقل سابقه کار"]/following-sibling::div/span')
-            data["Salary"] = quick_extract('//h4[text()="حقوق"]/following-sibling::div/span')
-            data["Languages"] = quick_extract('//h4[text()="زبان‌های مورد نیاز"]/following-sibling::div/span')
-            
             try:
-                skills = [str(skill.text).strip() for skill in self.driver.find_elements(
-                    By.XPATH, '//h4[text()="مهارت‌های مورد نیاز"]/following-sibling::div/span')]
-                data["Skills"] = ", ".join(skills) if skills else "N/A"
-            except:
-                data["Skills"] = "N/A"
-                
-            data["Gender"] = quick_extract('//h4[text()="جنسیت"]/following-sibling::div/span')
-            data["Military Status"] = quick_extract('//h4[text()="وضعیت نظام وظیفه"]/following-sibling::div/span')
-            data["Education Level"] = quick_extract('//h4[text()="حداقل مدرک تحصیلی"]/following-sibling::div/span')
-
-            try:
-                desc = self.driver.find_element(By.CSS_SELECTOR, ".o-box__text.s-jobDesc")
-                data["Job Description"] = str(desc.text).strip() if desc.text else "N/A"
-            except:
-                data["Job Description"] = "N/A"
-
-            try:
-                company = self.driver.find_element(By.CSS_SELECTOR, ".o-box__text:not(.s-jobDesc)")
-                data["Company Introduction"] = str(company.text).strip() if company.text else "N/A"
-            except:
-                data["Company Introduction"] = "N/A"
-
-            data["URL"] = url
-
-            return data
-
+                # Start extracting as soon as the job header exists instead of sleeping
+                wait_ready(self.driver, DETAIL_READY_SELECTORS, timeout=15)
+            except TimeoutException:
+                pass  # parse whatever arrived; missing fields come back as N/A
+            page_source = self.driver.page_source
+            if self.archive is not None:
+                self.archive.safe_put(url, page_source, KIND_DETAIL)
+            return page_source.encode('utf-8')
         except WebDriverException as e:
             raise WebDriverException(f"Connection error for {url} (check VPN): {str(e)}")
+
+    def extract_job_data(self, url: str) -> Dict[str, str]:
+        """Extract job data from a given URL"""
+        page = self.fetch_page_source(url)
+        try:
+            # One page at a time gains nothing from the pool; extract_many pipelines through it
+            return parse_job_detail(page, url)
         except Exception as e:
             raise Exception(f"Error extracting data from {url}: {str(e)}")
+
+    def extract_many(self, urls: List[str]) -> Iterator[Tuple[str, Optional[Dict[str, str]], Optional[Exception]]]:
+        """Pipelined extract_job_data: the next page loads while earlier ones are parsed"""
+        return pipelined(urls, self.fetch_page_source,
+                         lambda page, url: self.parse_pool.submit(parse_job_detail, page, url))
     
     def close(self):
         """Close the WebDriver"""
         if self.driver:
             self.driver.quit()
             self.driver = None
+        if self.profile:
+            self.profile.release()
+            self.profile = None
 
 
 class ExcelHandler:
     """Handles all Excel file operations"""
     
-    def __init__(self):
+    def __init__(self, rollups: Optional[RollupStore] = None):
+        self.rollups = rollups
         self.headers = [
             "Job Title", "Category", "Location", "Cooperation Type",
             "Work Experience", "Salary", "Languages", "Skills",
@@ -162,7 +174,9 @@ class ExcelHandler:
         """Create a new output file with headers"""
         try:
             # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
             
             wb = openpyxl.Workbook()
             ws = wb.active
@@ -204,17 +218,41 @@ class ExcelHandler:
                 raise Exception("No active worksheet found")
             
             # Create new row
+            data = normalize_record(data)
             new_row = [data.get(header, "N/A") for header in self.headers]
             
             # Add new data at the end
             ws.append(new_row)
             
             wb.save(file_path)
+            if self.rollups is not None:
+                self.rollups.add_records([data], "jobinja")
             return True
             
         except Exception as e:
             raise Exception(f"Error saving data: {str(e)}")
     
+    def replace_row(self, file_path: str, url: str, data: Dict) -> bool:
+        """Overwrite the row whose URL column equals `url` (used to fill placeholder rows)"""
+        try:
+            wb = openpyxl.load_workbook(file_path)
+            ws = wb.active
+            if ws is None:
+                raise Exception("No active worksheet found")
+            
+            url_column = len(self.headers)
+            for row in ws.iter_rows(min_row=2):
+                cell = row[url_column - 1] if len(row) >= url_column else None
+                if cell is not None and cell.value and str(cell.value).strip() == url:
+                    for col_idx, header in enumerate(self.headers):
+                        row[col_idx].value = data.get(header, "N/A")
+                    wb.save(file_path)
+                    return True
+            return False
+            
+        except Exception as e:
+            raise Exception(f"Error replacing row: {str(e)}")
+    
     def copy_existing_data_to_new_file(self, source_path: str, target_path: str) -> bool:
         """Copy all data from existing file to new file"""
         try:
@@ -250,7 +288,7 @@ class ExcelHandler:
 class JobinjaExcelUpdaterApp:
     """Main application GUI and processing controller"""
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, profile: bool = False):
         self.root = root
         self.root.title("Jobinja Scraper - پردازشگر فایل اکسل")
         self.root.geometry("900x750")
@@ -269,10 +307,23 @@ class JobinjaExcelUpdaterApp:
         self.schedule_mode = tk.StringVar(value="Immediate")  # حالت زمان‌بندی
         self.schedule_interval = tk.IntVar(value=2)  # فاصله زمانی (ساعت)
         self.delay_seconds = tk.IntVar(value=2)  # تأخیر بین درخواست‌ها
+        self.profile_var = tk.BooleanVar(value=profile)  # گزارش پروفایل پس از هر اجرا
         
         # Initialize components
-        self.scraper = JobinjaScraper(self.chrome_driver_path)
-        self.excel_handler = ExcelHandler()
+        self.html_archive = HtmlArchive()
+        # One politeness budget for the main pass and the retry worker's browser
+        self.rate_limiter = RateLimiter(self.delay_seconds.get(), self.delay_seconds.get() + DETAIL_JITTER)
+        self.scraper = JobinjaScraper(self.chrome_driver_path, self.html_archive, self.rate_limiter)
+        self.rollups = RollupStore()
+        self.excel_handler = ExcelHandler(self.rollups)
+        self.numeric_index = NumericIndex()
+        self.search_index = SearchIndex()
+        self.retry_queue = RetryQueue()
+        self.retry_worker: Optional[RetryWorker] = None
+        self.workbook_lock = threading.Lock()  # main pass and retry worker write the same workbook
+        self.initialized_output = ""  # new output file already seeded by an earlier run of this session
+        self.scheduler = Scheduler(log=self.log_message)
+        self.scheduler.start()
         
         # Setup GUI
         self.create_widgets()
@@ -341,6 +392,8 @@ class JobinjaExcelUpdaterApp:
         # Pause/Resume Button
         self.pause_button = ttk.Button(button_frame, text="توقف", command=self.toggle_pause, state=tk.DISABLED)
         self.pause_button.pack(side=tk.LEFT, padx=10)
+        
+        ttk.Checkbutton(button_frame, text="پروفایل اجرا", variable=self.profile_var).pack(side=tk.LEFT, padx=10)
 
         # Schedule Section
         schedule_frame = ttk.Frame(main_frame)
@@ -445,17 +498,36 @@ class JobinjaExcelUpdaterApp:
         if self.is_running:
             return
         
+        if self.schedule_mode.get() == "Scheduled":
+            hours = self.schedule_interval.get()
+            self.scheduler.every(UPDATE_JOB, self.begin_processing, hours * 3600,
+                                 jitter=SCHEDULE_JITTER_SECONDS, run_now=True)
+            next_run = self.scheduler.next_run(UPDATE_JOB)
+            self.log_message(f"⏳ عملیات زمان‌بندی شده هر {hours} ساعت اجرا می‌شود؛ اجرای بعدی: {next_run:%Y-%m-%d %H:%M}")
+            self.stop_button.config(state=tk.NORMAL)
+            return
+        
+        # Single-flight: a manual start is refused while a scheduled run is active
+        self.scheduler.run_once(UPDATE_JOB, self.begin_processing)
+    
+    def begin_processing(self):
+        """One processing run (manual or scheduled), on the scheduler's worker thread"""
+        if self.is_running:
+            return
         self.is_running = True
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         self.pause_button.config(state=tk.NORMAL)
         self.log_message("شروع پردازش اطلاعات...")
         
-        threading.Thread(target=self.run_processing, daemon=True).start()
+        run_profiled("run_processing", self.run_processing, enabled=self.profile_var.get())
     
     def stop_processing(self):
         """Request processing to stop after current item"""
         self.is_running = False
+        if self.scheduler.next_run(UPDATE_JOB) is not None:
+            self.scheduler.cancel(UPDATE_JOB)
+            self.log_message("⏹️ اجرای زمان‌بندی شده لغو شد")
         self.log_message("درخواست توقف پس از اتمام آیتم جاری...")
         self.stop_button.config(state=tk.DISABLED)
     
@@ -472,25 +544,8 @@ class JobinjaExcelUpdaterApp:
 
     def run_processing(self):
         """Main processing function (runs in separate thread)"""
+        state = None
         try:
-            # Copy existing data to new file first
-            try:
-                self.log_message("در حال کپی داده‌های موجود به فایل جدید...")
-                if not self.excel_handler.copy_existing_data_to_new_file(self.existing_output_file, self.new_output_file):
-                    messagebox.showerror("خطا", "کپی داده‌های موجود به فایل جدید ناموفق بود")
-                    return
-                self.log_message("✅ داده‌های موجود با موفقیت به فایل جدید کپی شدند")
-            except Exception as e:
-                messagebox.showerror("خطا", f"خطا در کپی داده‌های موجود:\n{str(e)}")
-                return
-
-            # Setup browser
-            try:
-                self.scraper.setup_driver()
-            except Exception as e:
-                messagebox.showerror("خطا", f"راه‌اندازی مرورگر ناموفق بود:\n{str(e)}")
-                return
-
             # Read input links
             try:
                 input_links = self.excel_handler.read_input_links(self.input_file)
@@ -501,75 +556,118 @@ class JobinjaExcelUpdaterApp:
             if not input_links:
                 self.log_message("⚠️ هیچ لینکی در فایل ورودی یافت نشد!")
                 return
+
+            # وضعیت هر لینک (در انتظار/انجام‌شده/ناموفق/تکراری) برای ادامه از نقطه توقف
+            state = UrlStateBitmap.for_run(input_links, self.new_output_file)
+            counts = state.counts()
+            # Only an interrupted pass is resumed; after a finished one (e.g. the previous
+            # scheduled run) every link is processed again
+            resuming = 0 < counts[PENDING] < len(input_links) and os.path.exists(self.new_output_file)
+            if not resuming and counts[PENDING] < len(input_links):
+                state.reset()
+                counts = state.counts()
+            # Later passes of this session add to the file the first pass seeded
+            keep_output = resuming or (self.initialized_output == self.new_output_file
+                                       and os.path.exists(self.new_output_file))
+
+            if resuming:
+                self.log_message(f"↩️ ادامه اجرای قبلی: {counts[DONE]} انجام‌شده، {counts[FAILED]} ناموفق، "
+                                 f"{counts[DUPLICATE]} تکراری، {counts[PENDING]} باقی‌مانده")
+            if not keep_output:
+                # Copy existing data to new file first
+                try:
+                    self.log_message("در حال کپی داده‌های موجود به فایل جدید...")
+                    if not self.excel_handler.copy_existing_data_to_new_file(self.existing_output_file, self.new_output_file):
+                        messagebox.showerror("خطا", "کپی داده‌های موجود به فایل جدید ناموفق بود")
+                        return
+                    self.log_message("✅ داده‌های موجود با موفقیت به فایل جدید کپی شدند")
+                    self.initialized_output = self.new_output_file
+                except Exception as e:
+                    messagebox.showerror("خطا", f"خطا در کپی داده‌های موجود:\n{str(e)}")
+                    return
+
+            # Setup browser
+            try:
+                self.scraper.setup_driver()
+            except Exception as e:
+                messagebox.showerror("خطا", f"راه‌اندازی مرورگر ناموفق بود:\n{str(e)}")
+                return
             
-            self.update_progress(0, len(input_links))
+            self.rate_limiter.min_interval = self.delay_seconds.get()
+            self.rate_limiter.max_interval = self.delay_seconds.get() + DETAIL_JITTER
+            self.start_retry_worker()
+            self.update_progress(len(input_links) - counts[PENDING], len(input_links))
             
             # Get all existing links from output file for duplicate checking
-            existing_links = self.excel_handler.get_existing_links(self.existing_output_file)
+            # (on resume or a later pass the new file already holds the copied rows plus earlier rows)
+            existing_links = self.excel_handler.get_existing_links(
+                self.new_output_file if keep_output else self.existing_output_file)
             self.log_message(f"بررسی تکراری در میان {len(existing_links)} لینک موجود")
             
             # Process each link
             processed_count = 0
+            duplicate_count = 0
             stop_reason = ""
             
-            current_row = 2  # شروع از ردیف دوم برای داده‌های جدید
-
-            while True:
-                if self.schedule_mode.get() == "Scheduled":
-                    self.log_message(f"⏳ عملیات زمان‌بندی شده شروع خواهد شد (هر {self.schedule_interval.get()} ساعت).")
-                    time.sleep(self.schedule_interval.get() * 3600)  # تبدیل ساعت به ثانیه
-
-                for i, link in enumerate(input_links):
-                    while self.is_paused:
-                        time.sleep(1)  # توقف در حالت Pause
-
-                    if not self.is_running:
-                        stop_reason = "پردازش توسط کاربر متوقف شد"
-                        break
-
-                    # Check for duplicate link
-                    if link in existing_links:
-                        self.log_message(f"⛔ لینک تکراری شناسایی شد: {link}")
-                        raise Exception(f"لینک تکراری شناسایی شد: {link}")  # توقف پردازش در صورت لینک تکراری
-
-                    # ادامه پردازش لینک
-                    self.update_progress(i + 1, len(input_links))
-                    self.log_message(f"پردازش لینک {i+1}: {link}")
-
-                    attempt = 0
-                    data = None
-                    while attempt < 3:  # تلاش تا 3 بار
-                        try:
-                            attempt += 1
-                            self.log_message(f"🔄 تلاش {attempt} برای استخراج داده از لینک: {link}")
-                            data = self.scraper.extract_job_data(link)
-                            if data:
-                                self.log_message(f"✅ داده با موفقیت استخراج شد از لینک: {link}")
-                                break
-                        except Exception as e:
-                            self.log_message(f"⚠️ خطا در تلاش {attempt} برای استخراج داده از لینک {link}: {str(e)}")
-
-                    if not data:  # اگر بعد از 3 تلاش داده‌ای استخراج نشد
-                        self.log_message(f"❌ داده‌ای از لینک {link} استخراج نشد. ذخیره مقدار پیش‌فرض در اکسل.")
-                        data = {
-                            "Job Title": "داده استخراج نشد",
-                            "Category": "داده استخراج نشد",
-                            "Location": "داده استخراج نشد",
-                            "Cooperation Type": "داده استخراج نشد",
-                            "Work Experience": "داده استخراج نشد",
-                            "Salary": "داده استخراج نشد",
-                            "Languages": "داده استخراج نشد",
-                            "Skills": "داده استخراج نشد",
-                            "Gender": "داده استخراج نشد",
-                            "Military Status": "داده استخراج نشد",
-                            "Education Level": "داده استخراج نشد",
-                            "Job Description": "داده استخراج نشد",
-                            "Company Introduction": "داده استخراج نشد",
-                            "URL": link,
-                        }
-
-                    # ذخیره داده در اکسل
-                    try:
+            # شروع از ردیف دوم برای داده‌های جدید؛ ردیف‌های اجرای قبلی پیش از آن درج شده‌اند
+            current_row = 2 + counts[DONE] + counts[FAILED]
+
+            for i in state.indices(PENDING):
+                link = input_links[i]
+                while self.is_paused:
+                    time.sleep(1)  # توقف در حالت Pause
+
+                if not self.is_running:
+                    stop_reason = "پردازش توسط کاربر متوقف شد"
+                    break
+
+                # Skip duplicate links instead of aborting the batch
+                if link in existing_links:
+                    self.log_message(f"⛔ لینک تکراری رد شد: {link}")
+                    state.set(i, DUPLICATE)
+                    duplicate_count += 1
+                    continue
+
+                # ادامه پردازش لینک
+                self.update_progress(i + 1, len(input_links))
+                self.log_message(f"پردازش لینک {i+1}: {link}")
+
+                # یک تلاش در مسیر اصلی؛ تلاش‌های بعدی در پس‌زمینه انجام می‌شود
+                data = None
+                error = "no data"
+                try:
+                    data = self.scraper.extract_job_data(link)
+                    if data:
+                        self.log_message(f"✅ داده با موفقیت استخراج شد از لینک: {link}")
+                except Exception as e:
+                    error = str(e)
+                    self.log_message(f"⚠️ خطا در استخراج داده از لینک {link}: {error}")
+
+                extracted = bool(data)
+                if not extracted:  # ردیف موقت تا زمانی که تلاش مجدد جایگزینش کند
+                    self.log_message(f"❌ داده‌ای از لینک {link} استخراج نشد. ذخیره مقدار پیش‌فرض و افزودن به صف تلاش مجدد.")
+                    self.retry_queue.push(link, self.new_output_file, RETRY_SOURCE, error)
+                    data = {
+                        "Job Title": "داده استخراج نشد",
+                        "Category": "داده استخراج نشد",
+                        "Location": "داده استخراج نشد",
+                        "Cooperation Type": "داده استخراج نشد",
+                        "Work Experience": "داده استخراج نشد",
+                        "Salary": "داده استخراج نشد",
+                        "Languages": "داده استخراج نشد",
+                        "Skills": "داده استخراج نشد",
+                        "Gender": "داده استخراج نشد",
+                        "Military Status": "داده استخراج نشد",
+                        "Education Level": "داده استخراج نشد",
+                        "Job Description": "داده استخراج نشد",
+                        "Company Introduction": "داده استخراج نشد",
+                        "URL": link,
+                    }
+
+                # ذخیره داده در اکسل
+                data = normalize_record(data)
+                try:
+                    with self.workbook_lock:
                         wb_output = openpyxl.load_workbook(self.new_output_file)
                         ws_output = wb_output.active
                         if ws_output is None:
@@ -602,42 +700,83 @@ class JobinjaExcelUpdaterApp:
 
                         # ذخیره تغییرات در فایل خروجی
                         wb_output.save(self.new_output_file)
-                        self.log_message(f"✅ داده با موفقیت در اکسل ذخیره شد برای لینک: {link}")
-                        existing_links.add(link)
-                    except Exception as e:
-                        self.log_message(f"⚠️ خطا در ذخیره داده در اکسل برای لینک {link}: {str(e)}")
-
-                    # Random delay between requests
-                    time.sleep(self.delay_seconds.get())
-
-                # پشتیبان‌گیری
-                self.save_backup()
-
-                if self.schedule_mode.get() == "Immediate":
-                    break
-
-            # Final status message
+                    self.log_message(f"✅ داده با موفقیت در اکسل ذخیره شد برای لینک: {link}")
+                    existing_links.add(link)
+                    state.set(i, DONE if extracted else FAILED)
+                    if extracted:
+                        processed_count += 1
+                        # Placeholder rows stay out of the indexes; apply_retry_result adds the real job
+                        self.numeric_index.upsert_record({**data, "URL": link}, "jobinja")
+                        self.search_index.add_records([{**data, "URL": link}], "jobinja")
+                        self.rollups.add_records([{**data, "URL": link}], "jobinja")
+                except Exception as e:
+                    self.log_message(f"⚠️ خطا در ذخیره داده در اکسل برای لینک {link}: {str(e)}")
+
+            # پشتیبان‌گیری
+            self.save_backup()
+
+            # Final status message (no blocking dialogs for scheduled runs)
+            notify = self.scheduler.next_run(UPDATE_JOB) is None
             if stop_reason:
                 self.log_message(f"⏹️ {stop_reason}")
-                messagebox.showinfo("توقف پردازش", stop_reason)
+                if notify:
+                    messagebox.showinfo("توقف پردازش", stop_reason)
             elif self.is_running:
+                if duplicate_count:
+                    self.log_message(f"⛔ {duplicate_count} لینک تکراری رد شد")
                 self.log_message(f"✅ پردازش با موفقیت заверш شد! {processed_count} رکورد جدید اضافه شد")
-                messagebox.showinfo("موفقیت", f"پردازش کامل شد. {processed_count} رکورد جدید به فایل اضافه شد.")
+                if notify:
+                    messagebox.showinfo("موفقیت", f"پردازش کامل شد. {processed_count} رکورد جدید به فایل اضافه شد.")
             else:
                 self.log_message(f"⏹️ پردازش متوقف شد! {processed_count} رکورد پردازش شد")
-                messagebox.showinfo("توقف", f"پردازش متوقف شد. {processed_count} رکورد پردازش شد.")
+                if notify:
+                    messagebox.showinfo("توقف", f"پردازش متوقف شد. {processed_count} رکورد پردازش شد.")
             
         except Exception as e:
             self.log_message(f"⚠️ خطای جدی: {str(e)}")
             messagebox.showerror("خطا", f"خطای غیرمنتظره:\n{str(e)}")
         finally:
+            if state is not None:
+                state.close()
+            if self.retry_worker is not None:
+                # Worker keeps draining queued retries, then exits and closes its browser
+                self.retry_worker.keep_alive.clear()
             self.scraper.close()
             self.is_running = False
             self.start_button.config(state=tk.NORMAL)
-            self.stop_button.config(state=tk.DISABLED)
+            # While a schedule is active, Stop stays available to cancel it
+            scheduled = self.scheduler.next_run(UPDATE_JOB) is not None
+            self.stop_button.config(state=tk.NORMAL if scheduled else tk.DISABLED)
             self.pause_button.config(state=tk.DISABLED)
             self.status_label.config(text="آماده شروع مجدد")
 
+    def start_retry_worker(self):
+        """Start (or keep alive) the background worker that retries failed links"""
+        if self.retry_worker is not None and self.retry_worker.is_alive():
+            self.retry_worker.keep_alive.set()
+            return
+        # Selenium drivers are not thread-safe: the worker gets its own browser
+        retry_scraper = JobinjaScraper(self.chrome_driver_path, self.html_archive, self.rate_limiter)
+        self.retry_worker = RetryWorker(self.retry_queue, RETRY_SOURCE, retry_scraper.extract_job_data,
+                                        self.apply_retry_result, retry_scraper.close, self.log_message)
+        self.retry_worker.keep_alive.set()
+        self.retry_worker.start()
+        pending = self.retry_queue.counts(RETRY_SOURCE).get("pending", 0)
+        if pending:
+            self.log_message(f"🔁 {pending} لینک در صف تلاش مجدد")
+
+    def apply_retry_result(self, item: RetryItem, data: Dict[str, str]):
+        """Replace the placeholder row of a retried link in place"""
+        data = normalize_record({**data, "URL": item.url})
+        with self.workbook_lock:
+            replaced = self.excel_handler.replace_row(item.output_file, item.url, data)
+        if not replaced:
+            self.log_message(f"⚠️ ردیف لینک {item.url} در {item.output_file} یافت نشد")
+            return
+        self.numeric_index.upsert_record(data, "jobinja")
+        self.search_index.add_records([data], "jobinja")
+        self.rollups.add_records([data], "jobinja")
+
     def save_backup(self):
         """Create a backup of the output file"""
         try:
@@ -663,8 +802,13 @@ class JobinjaExcelUpdaterApp:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Jobinja Excel updater GUI")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile processing runs and write hot-spot reports to profiles/")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = JobinjaExcelUpdaterApp(root)
+    app = JobinjaExcelUpdaterApp(root, profile=args.profile)
     root.mainloop()
 
 
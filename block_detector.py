@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import time
+import logging
+from threading import Lock
+from typing import Optional, Dict, List, Callable, Pattern
+
+from rate_limiter import RateLimiter
+from retry_queue import backoff_delay
+from metrics import metrics
+
+# تنظیمات تشخیص مسدودی
+SIGNATURES_FILE = "block_signatures.json"
+BACKOFF_BASE = 60.0          # first global pause after a block (seconds)
+BACKOFF_CAP = 30 * 60.0
+GIVE_UP_AFTER = 6            # consecutive blocked pages before a run stops
+
+# Verdicts
+OK = "ok"
+EMPTY = "empty"
+BLOCKED = "blocked"
+CAPTCHA = "captcha"
+RATE_LIMITED = "rate_limited"
+BLOCKING = (BLOCKED, CAPTCHA, RATE_LIMITED)
+
+# Actions
+CONTINUE = "continue"
+RETRY = "retry"      # same session, after the backoff
+ROTATE = "rotate"    # new user agent / cookies / browser / proxy, after the backoff
+STOP = "stop"
+
+# Checked in this order, and only for pages where no job was found
+DEFAULT_SIGNATURES: Dict[str, List[str]] = {
+    CAPTCHA: [r"g-recaptcha", r"hcaptcha\.com|h-captcha", r"cf-turnstile|challenges\.cloudflare\.com",
+              r"captcha", r"کد امنیتی"],
+    RATE_LIMITED: [r"too many requests", r"rate limit", r"تعداد درخواست‌های شما"],
+    BLOCKED: [r"access denied", r"403 forbidden", r"request (?:was )?blocked", r"<title>\s*just a moment",
+              r"دسترسی شما.{0,30}(?:مسدود|محدود)"],
+    EMPTY: [r"نتیجه‌ای یافت نشد", r"آگهی(?:‌ای)? یافت نشد", r"no results"],
+}
+STATUS_VERDICTS = {403: BLOCKED, 429: RATE_LIMITED, 503: RATE_LIMITED}
+
+
+class BlockDetector:
+    """Tells a block, captcha or rate-limit page apart from a genuinely empty result page
+
+    Signatures are case-insensitive regexes per verdict. Extra ones can be added in
+    `block_signatures.json` (`{"captcha": ["..."], "blocked": ["..."]}`) without code changes.
+    """
+
+    def __init__(self, signatures_file: str = SIGNATURES_FILE):
+        signatures = {verdict: list(patterns) for verdict, patterns in DEFAULT_SIGNATURES.items()}
+        if os.path.exists(signatures_file):
+            try:
+                with open(signatures_file, "r", encoding="utf-8") as f:
+                    for verdict, patterns in json.load(f).items():
+                        signatures.setdefault(verdict, []).extend(patterns)
+            except Exception as e:
+                logging.error(f"Error loading block signatures: {e}")
+        self.patterns: Dict[str, List[Pattern]] = {
+            verdict: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for verdict, patterns in signatures.items()
+        }
+
+    def classify(self, html: str, status: Optional[int] = None, items: int = 0) -> str:
+        """Verdict for a fetched page; `items` is how many jobs the parser found on it"""
+        if items:
+            return OK
+        if status in STATUS_VERDICTS:
+            return STATUS_VERDICTS[status]
+        for verdict in (CAPTCHA, RATE_LIMITED, BLOCKED, EMPTY):
+            if any(pattern.search(html) for pattern in self.patterns.get(verdict, ())):
+                return verdict
+        # Nothing recognised: keep the old behaviour and treat it as the end of the results
+        return EMPTY
+
+
+class BlockPolicy:
+    """Turns verdicts into a shared backoff and a retry/rotate/stop decision
+
+    The backoff is applied to the site's RateLimiter, so every thread using it pauses,
+    not only the one that saw the block. Blocks seen while a pause is already running
+    belong to the same incident and do not escalate it.
+    """
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, base: float = BACKOFF_BASE,
+                 cap: float = BACKOFF_CAP, give_up_after: int = GIVE_UP_AFTER,
+                 log: Callable[[str], None] = logging.warning):
+        self.limiter = limiter
+        self.base = base
+        self.cap = cap
+        self.give_up_after = give_up_after
+        self.log = log
+        self.lock = Lock()
+        self.strikes = 0
+        self.paused_until = 0.0
+
+    def observe(self, verdict: str) -> str:
+        if verdict not in BLOCKING:
+            with self.lock:
+                self.strikes = 0
+            return CONTINUE
+
+        metrics.inc(f"blocks.{verdict}")
+        action = RETRY if verdict == RATE_LIMITED else ROTATE
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return action
+            self.strikes += 1
+            if self.strikes > self.give_up_after:
+                self.log(f"Still {verdict} after {self.give_up_after} backoffs, giving up")
+                return STOP
+            delay = backoff_delay(self.strikes - 1, self.base, self.cap)
+            self.paused_until = now + delay
+        if self.limiter is not None:
+            self.limiter.pause(delay)
+        self.log(f"Page looks {verdict.replace('_', ' ')}: backing off {delay / 60:.1f} min "
+                 f"(strike {self.strikes}/{self.give_up_after}), then {action}")
+        return action
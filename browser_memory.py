@@ -0,0 +1,236 @@
+import os
+import sys
+import logging
+from collections import deque
+from typing import Optional, Dict, List, Any, Iterable, NamedTuple
+
+try:
+    import psutil
+except ImportError:  # /proc keeps sampling available on Linux workers without psutil
+    psutil = None
+
+from metrics import metrics
+
+# تنظیمات پایش حافظه مرورگر
+MAX_RSS_MB = 1500            # browser process tree; keeps two browsers plus Python inside a 4 GB worker
+MAX_HANDLES = 20000          # open handles (Windows) / file descriptors (POSIX) across the tree
+MIN_AVAILABLE_MB = 400       # recycle early when the machine itself runs low
+LEAK_MB_PER_PAGE = 6.0       # steady RSS growth per page that counts as a leak...
+LEAK_FLOOR_MB = 600          # ...once the tree is at least this large
+LEAK_WINDOW = 10             # pages used to estimate the growth rate
+MIN_PAGES = 3                # never recycle a fresh browser before this many pages
+MAX_PAGES = 500              # safety cap when memory cannot be sampled
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell", "msedge")
+
+
+class Usage(NamedTuple):
+    rss_mb: float
+    handles: int
+    processes: int
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                # The name field may contain spaces; ppid is the 2nd field after the closing paren
+                ppid = int(f.read().rsplit(b")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _proc_name(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/comm", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _process_name(pid: int) -> str:
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return ""
+    return _proc_name(pid)
+
+
+def _proc_usage(pids: Iterable[int]) -> Usage:
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    rss = handles = count = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/statm", "r") as f:
+                rss += int(f.read().split()[1]) * page_size
+            count += 1
+        except (OSError, IndexError, ValueError):
+            continue
+        try:
+            handles += len(os.listdir(f"/proc/{pid}/fd"))
+        except OSError:
+            pass
+    return Usage(rss / 2 ** 20, handles, count)
+
+
+def _descendants(root_pid: int) -> List[int]:
+    if psutil is not None:
+        try:
+            return [child.pid for child in psutil.Process(root_pid).children(recursive=True)]
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return []
+    children = _proc_children()
+    found, stack = [], list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        found.append(pid)
+        stack.extend(children.get(pid, []))
+    return found
+
+
+def tree_usage(root_pid: int, include_root: bool = True,
+               name_filter: Optional[Iterable[str]] = None) -> Optional[Usage]:
+    """Summed RSS and handle count of a process and its descendants; None if it cannot be sampled"""
+    pids = ([root_pid] if include_root else []) + _descendants(root_pid)
+    if name_filter is not None:
+        names = tuple(name_filter)
+        pids = [pid for pid in pids if any(name in _process_name(pid).lower() for name in names)]
+    if not pids:
+        return None
+    if psutil is not None:
+        rss = handles = count = 0
+        for pid in pids:
+            try:
+                process = psutil.Process(pid)
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    handles += process.num_handles() if sys.platform == "win32" else process.num_fds()
+                count += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return Usage(rss / 2 ** 20, handles, count) if count else None
+    if os.path.isdir("/proc"):
+        usage = _proc_usage(pids)
+        return usage if usage.processes else None
+    return None
+
+
+def available_memory_mb() -> Optional[float]:
+    if psutil is not None:
+        return psutil.virtual_memory().available / 2 ** 20
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def selenium_browser_pid(driver: Any) -> Optional[int]:
+    """PID of chromedriver; Chrome and its helpers are its descendants"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class MemorySupervisor:
+    """Decides when a long-lived browser should be restarted, based on what it actually uses
+
+    Call `check(root_pid)` after each page. It returns a reason string when the browser
+    tree crosses the RSS or handle limits, when its RSS keeps growing page after page
+    (a leak), or when the machine is low on memory; otherwise None. `reset()` or
+    `recycled()` starts counting again for a new browser.
+    """
+
+    def __init__(self, max_rss_mb: float = MAX_RSS_MB, max_handles: int = MAX_HANDLES,
+                 min_available_mb: float = MIN_AVAILABLE_MB, leak_mb_per_page: float = LEAK_MB_PER_PAGE,
+                 min_pages: int = MIN_PAGES, max_pages: int = MAX_PAGES,
+                 name_filter: Optional[Iterable[str]] = None, include_root: bool = True):
+        self.max_rss_mb = max_rss_mb
+        self.max_handles = max_handles
+        self.min_available_mb = min_available_mb
+        self.leak_mb_per_page = leak_mb_per_page
+        self.min_pages = min_pages
+        self.max_pages = max_pages
+        self.name_filter = name_filter
+        self.include_root = include_root
+        self.pages = 0
+        self.samples: deque = deque(maxlen=LEAK_WINDOW)
+        self.last: Optional[Usage] = None
+
+    def reset(self) -> None:
+        """A new browser was started"""
+        self.pages = 0
+        self.samples.clear()
+
+    def recycled(self) -> None:
+        self.reset()
+        metrics.inc("browser_recycles")
+
+    def _growth_per_page(self) -> float:
+        """Least-squares slope of RSS over the recent pages"""
+        n = len(self.samples)
+        mean_x = sum(x for x, _ in self.samples) / n
+        mean_y = sum(y for _, y in self.samples) / n
+        var = sum((x - mean_x) ** 2 for x, _ in self.samples)
+        return sum((x - mean_x) * (y - mean_y) for x, y in self.samples) / var if var else 0.0
+
+    def check(self, root_pid: Optional[int]) -> Optional[str]:
+        self.pages += 1
+        usage = tree_usage(root_pid, self.include_root, self.name_filter) if root_pid else None
+        self.last = usage
+        if usage is None:
+            return f"{self.pages} pages (memory not measurable)" if self.pages >= self.max_pages else None
+
+        metrics.set_gauge("browser_rss_mb", usage.rss_mb)
+        metrics.set_gauge("browser_handles", usage.handles)
+        self.samples.append((self.pages, usage.rss_mb))
+        if self.pages < self.min_pages:
+            return None
+        if usage.rss_mb >= self.max_rss_mb:
+            return f"RSS {usage.rss_mb:.0f} MB over {self.max_rss_mb:.0f} MB"
+        if usage.handles >= self.max_handles:
+            return f"{usage.handles} handles over {self.max_handles}"
+        available = available_memory_mb()
+        if available is not None and available < self.min_available_mb:
+            return f"only {available:.0f} MB of system memory left"
+        if len(self.samples) == self.samples.maxlen and usage.rss_mb >= LEAK_FLOOR_MB:
+            growth = self._growth_per_page()
+            if growth >= self.leak_mb_per_page:
+                return f"RSS growing {growth:.1f} MB/page (leak), now {usage.rss_mb:.0f} MB"
+        return None
+
+
+# --- session hand-over -------------------------------------------------------
+
+def save_selenium_session(driver: Any) -> Dict[str, Any]:
+    """Cookies and current URL, to carry over into a fresh browser"""
+    try:
+        return {"cookies": driver.get_cookies(), "url": driver.current_url}
+    except Exception as e:
+        logging.warning(f"Could not save browser session: {e}")
+        return {"cookies": [], "url": None}
+
+
+def restore_selenium_session(driver: Any, session: Dict[str, Any]) -> None:
+    """Install saved cookies through CDP, so no page has to be loaded first"""
+    cookies = []
+    for cookie in session.get("cookies", []):
+        cookie = dict(cookie)
+        if "expiry" in cookie:
+            cookie["expires"] = cookie.pop("expiry")
+        cookies.append(cookie)
+    if not cookies:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+    except Exception as e:
+        logging.warning(f"Could not restore browser session: {e}")
@@ -0,0 +1,160 @@
+import os
+import time
+import shutil
+import logging
+from typing import Optional, List, Any, Sequence
+
+if os.name == "nt":
+    import msvcrt
+    fcntl = None
+else:
+    import fcntl
+    msvcrt = None
+
+# تنظیمات پروفایل پایدار مرورگر
+PROFILE_ROOT = "browser_profiles"
+DISK_CACHE_MB = 256          # Chrome evicts beyond this itself; trimmed by hand only if a profile overgrew it
+MAX_SLOTS = 8                # concurrent browsers per source, each with its own user-data-dir
+WARM_MAX_AGE_DAYS = 7        # re-run the pre-warm step once the cached bundles are this old
+WARM_MARKER = "warmed_at"
+LOCK_FILE = "profile.lock"
+WARM_URLS = {
+    "jobinja": ["https://jobinja.ir/"],
+    "jobvision": ["https://jobvision.ir/"],
+    "runner": ["https://jobinja.ir/", "https://jobvision.ir/"],
+}
+# Left behind by the previous session; removing them keeps Chrome from restoring tabs or
+# showing crash bubbles, and drops a stale lock after a killed run
+SESSION_LEFTOVERS = [
+    "SingletonLock", "SingletonCookie", "SingletonSocket", "Crashpad", "BrowserMetrics",
+    os.path.join("Default", "Sessions"), os.path.join("Default", "Current Session"),
+    os.path.join("Default", "Current Tabs"), os.path.join("Default", "Last Session"),
+    os.path.join("Default", "Last Tabs"),
+]
+CACHE_DIRS = [os.path.join("Default", "Cache"), os.path.join("Default", "Code Cache")]
+
+
+def _try_lock(f: Any) -> bool:
+    """Non-blocking exclusive lock, released by the OS if the process dies"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                pass
+    return total
+
+
+class BrowserProfile:
+    """A persistent Chrome user-data-dir per source, so JS bundles, CSS, fonts and TLS
+    session tickets are reused across runs instead of downloaded again
+
+    Each instance leases one slot (`browser_profiles/<source>-<n>`) for the life of the
+    process, so parallel browsers never share a directory. Call `clean()` before every
+    launch, pass `selenium_args()` (or `path` and `launch_args()` for Playwright), and
+    run `warm_*` when `needs_warmup()` says the cache is cold.
+    """
+
+    def __init__(self, source: str, root: str = PROFILE_ROOT, cache_mb: int = DISK_CACHE_MB):
+        self.source = source
+        self.cache_mb = cache_mb
+        self.lock_file = None
+        for slot in range(MAX_SLOTS):
+            path = os.path.abspath(os.path.join(root, f"{source}-{slot}"))
+            os.makedirs(path, exist_ok=True)
+            lock_file = open(os.path.join(path, LOCK_FILE), "a+")
+            if _try_lock(lock_file):
+                self.path = path
+                self.lock_file = lock_file
+                break
+            lock_file.close()
+        else:
+            raise RuntimeError(f"All {MAX_SLOTS} browser profiles for {source} are in use")
+
+    def launch_args(self) -> List[str]:
+        """Chrome arguments besides the profile directory (Playwright sets that one itself)"""
+        return [
+            f"--disk-cache-size={self.cache_mb * 2 ** 20}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--hide-crash-restore-bubble",
+        ]
+
+    def selenium_args(self) -> List[str]:
+        return [f"--user-data-dir={self.path}"] + self.launch_args()
+
+    def clean(self) -> None:
+        """Remove the previous session's leftovers; call while no browser uses the profile"""
+        for name in SESSION_LEFTOVERS:
+            target = os.path.join(self.path, name)
+            try:
+                if os.path.isdir(target) and not os.path.islink(target):
+                    shutil.rmtree(target, ignore_errors=True)
+                elif os.path.lexists(target):
+                    os.remove(target)
+            except OSError as e:
+                logging.debug(f"Could not remove {target}: {e}")
+        cache_dirs = [os.path.join(self.path, name) for name in CACHE_DIRS]
+        if sum(_dir_size(folder) for folder in cache_dirs) > 2 * self.cache_mb * 2 ** 20:
+            logging.info(f"Browser cache of {self.source} over {2 * self.cache_mb} MB, clearing it")
+            for folder in cache_dirs:
+                shutil.rmtree(folder, ignore_errors=True)
+            self._mark_cold()
+
+    def needs_warmup(self) -> bool:
+        try:
+            age = time.time() - os.path.getmtime(os.path.join(self.path, WARM_MARKER))
+        except OSError:
+            return True
+        return age > WARM_MAX_AGE_DAYS * 86400
+
+    def _mark_warm(self) -> None:
+        with open(os.path.join(self.path, WARM_MARKER), "w") as f:
+            f.write(time.strftime("%Y-%m-%d %H:%M:%S"))
+
+    def _mark_cold(self) -> None:
+        try:
+            os.remove(os.path.join(self.path, WARM_MARKER))
+        except FileNotFoundError:
+            pass
+
+    def _warm_urls(self, urls: Optional[Sequence[str]]) -> Sequence[str]:
+        return urls if urls is not None else WARM_URLS.get(self.source, [])
+
+    def warm_selenium(self, driver: Any, urls: Optional[Sequence[str]] = None) -> None:
+        """Load the site's entry pages once so their static assets land in the disk cache"""
+        try:
+            for url in self._warm_urls(urls):
+                driver.get(url)
+            self._mark_warm()
+            logging.info(f"Browser profile {os.path.basename(self.path)} warmed up")
+        except Exception as e:
+            logging.warning(f"Browser warm-up failed: {e}")
+
+    def warm_playwright(self, page: Any, urls: Optional[Sequence[str]] = None) -> None:
+        try:
+            for url in self._warm_urls(urls):
+                page.goto(url, wait_until="load", timeout=60000)
+            self._mark_warm()
+            logging.info(f"Browser profile {os.path.basename(self.path)} warmed up")
+        except Exception as e:
+            logging.warning(f"Browser warm-up failed: {e}")
+
+    def release(self) -> None:
+        """Give the slot back (also happens when the process exits)"""
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
@@ -0,0 +1,216 @@
+import os
+import json
+import logging
+import argparse
+from abc import abstractmethod
+from datetime import datetime
+from urllib.parse import urlencode, quote
+from typing import Optional, Dict, List, Any, Tuple
+
+from job_parser import parse_listing, parse_jobvision_listing, parse_jobinja_facets, parse_jobvision_facets
+from readiness import wait_ready
+from runner import (SourcePlugin, Task, BrowserPool, JobinjaListingSource, JobVisionListingSource,
+                    JOBINJA_LISTING_URL, JOBVISION_LISTING_URL, MAX_CONSECUTIVE_FAILURES,
+                    PAGE_TIMEOUT, DRIVER_PATH)
+from metrics import metrics
+
+# تنظیمات برنامه‌ریزی خزش
+FACETS_FILE = "facets.json"
+PRIMARY_FACET = "category"   # one stream per value of this facet
+SPLIT_FACET = "location"     # a primary stream that reaches PAGE_CAP is split by this one
+PAGE_CAP = 30                # deeper than this, paging gets slow or stops returning results
+PARALLEL_STREAMS = 3         # pages of different streams in flight at once per site
+JOBINJA_SEARCH_URL = "https://jobinja.ir/jobs"
+JOBVISION_FACET_URLS = {
+    ("category",): "https://jobvision.ir/jobs/category/{category}?page={page}&sort=0",
+    ("category", "location"): "https://jobvision.ir/jobs/category/{category}/city/{location}?page={page}&sort=0",
+}
+
+
+class FacetStream:
+    """One independent listing walk: a fixed set of facet values and the next page to fetch"""
+
+    def __init__(self, facets: Dict[str, str], last_page: Optional[int]):
+        self.facets = facets
+        self.page = 1
+        self.last_page = last_page
+        self.failures = 0
+        self.done = False
+
+    def active(self) -> bool:
+        return not self.done and (self.last_page is None or self.page <= self.last_page)
+
+    def __str__(self) -> str:
+        return ", ".join(f"{kind}={value}" for kind, value in self.facets.items()) or "all"
+
+
+class FacetedListingSource(SourcePlugin):
+    """A site's listing crawled as many shallow facet streams instead of one deep walk
+
+    The unfiltered listing stays one stream (it brings the newest jobs first); each
+    category gets its own stream, and `next_task` takes pages from them in turn so up to
+    `max_concurrency` streams load at once. A category still returning jobs at `page_cap`
+    is split into category x location streams rather than paged deeper. The source keeps
+    the flat source's `name`, so it shares that site's rate limit and its (source, url)
+    key in the sink: a job listed under several facets is stored once.
+    """
+
+    def __init__(self, facets: Dict[str, List[str]], max_pages: Optional[int] = None,
+                 page_cap: int = PAGE_CAP, parallel: int = PARALLEL_STREAMS):
+        super().__init__()
+        self.values = facets
+        self.max_pages = max_pages
+        self.page_cap = page_cap
+        self.streams = [FacetStream({}, max_pages)]
+        self.streams += [self._stream({PRIMARY_FACET: value}) for value in facets.get(PRIMARY_FACET, [])]
+        self.owners: Dict[str, Tuple[FacetStream, int]] = {}
+        self.turn = 0
+        self.max_concurrency = max(1, min(parallel, len(self.streams)))
+
+    def _stream(self, facets: Dict[str, str]) -> FacetStream:
+        splittable = SPLIT_FACET not in facets and bool(self.values.get(SPLIT_FACET))
+        last_page = min(self.page_cap, self.max_pages or self.page_cap) if splittable else self.max_pages
+        return FacetStream(facets, last_page)
+
+    def next_task(self) -> Optional[Task]:
+        active = [stream for stream in self.streams if stream.active()]
+        if not active:
+            return None
+        stream = active[self.turn % len(active)]
+        self.turn += 1
+        page = stream.page
+        stream.page += 1
+        task = self.task_for(stream.facets, page)
+        self.owners[task.url] = (stream, page)
+        return task
+
+    @abstractmethod
+    def task_for(self, facets: Dict[str, str], page: int) -> Task:
+        """Task for one page of a facet stream"""
+
+    def handle(self, task: Task, records: List[Dict[str, Any]]) -> None:
+        stream, page = self.owners.pop(task.url, (None, 0))
+        if stream is None:
+            return
+        stream.failures = 0
+        if not records:
+            logging.info(f"[{self.name}] {stream}: empty page {page}, end of stream")
+            stream.done = True
+        elif page == self.page_cap and stream.last_page == self.page_cap and PRIMARY_FACET in stream.facets:
+            children = [self._stream({**stream.facets, SPLIT_FACET: value})
+                        for value in self.values.get(SPLIT_FACET, [])]
+            logging.info(f"[{self.name}] {stream}: still full at page {page}, "
+                         f"splitting into {len(children)} {SPLIT_FACET} streams")
+            stream.done = True
+            self.streams.extend(children)
+            self.exhausted = False
+            metrics.inc(f"{self.name}.facet_splits")
+
+    def failed(self, task: Task, error: Exception) -> None:
+        super().failed(task, error)
+        stream, _ = self.owners.pop(task.url, (None, 0))
+        if stream is None:
+            return
+        stream.failures += 1
+        if stream.failures >= MAX_CONSECUTIVE_FAILURES:
+            logging.warning(f"[{self.name}] {stream}: {stream.failures} failed pages in a row, dropping this stream")
+            stream.done = True
+
+
+class JobinjaFacetedSource(FacetedListingSource):
+    """Jobinja listing sharded by the search form's category and location filters"""
+
+    name = JobinjaListingSource.name
+    interval = JobinjaListingSource.interval
+    ready_selectors = JobinjaListingSource.ready_selectors
+    parser = staticmethod(parse_listing)
+    FACET_PARAMS = {"category": "filters[job_categories][0]", "location": "filters[locations][0]"}
+
+    def task_for(self, facets: Dict[str, str], page: int) -> Task:
+        if not facets:
+            url = JOBINJA_LISTING_URL.format(page=page)
+        else:
+            params = [(self.FACET_PARAMS[kind], value) for kind, value in facets.items()]
+            url = f"{JOBINJA_SEARCH_URL}?{urlencode(params + [('page', page), ('sort_by', 'published_at_desc')])}"
+        return Task(url, (url,))
+
+
+class JobVisionFacetedSource(FacetedListingSource):
+    """JobVision listing sharded by its category and city pages"""
+
+    name = JobVisionListingSource.name
+    interval = JobVisionListingSource.interval
+    ready_selectors = JobVisionListingSource.ready_selectors
+    parser = staticmethod(parse_jobvision_listing)
+
+    def task_for(self, facets: Dict[str, str], page: int) -> Task:
+        if not facets:
+            return Task(JOBVISION_LISTING_URL.format(page=page), (page,))
+        template = JOBVISION_FACET_URLS[tuple(facets)]
+        return Task(template.format(page=page, **{kind: quote(value) for kind, value in facets.items()}), (page,))
+
+
+FACETED_SOURCES = {"jobinja": JobinjaFacetedSource, "jobvision": JobVisionFacetedSource}
+DISCOVERY = {
+    "jobinja": (JOBINJA_LISTING_URL.format(page=1), JobinjaListingSource.ready_selectors, parse_jobinja_facets),
+    "jobvision": (JOBVISION_LISTING_URL.format(page=1), JobVisionListingSource.ready_selectors,
+                  parse_jobvision_facets),
+}
+
+
+def load_facets(path: str = FACETS_FILE) -> Dict[str, Dict[str, List[str]]]:
+    """Facet values per site, as written by `discover` (and possibly pruned by hand)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `python crawl_planner.py discover` first")
+    with open(path, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    return {site: plan.get(site, {}) for site in FACETED_SOURCES}
+
+
+def discover(driver_path: Optional[str] = DRIVER_PATH, headless: bool = False) -> Dict[str, Any]:
+    """Load each site's first listing page and collect the facet values it offers"""
+    browsers = BrowserPool(1, driver_path, headless)
+    driver = browsers.acquire()
+    plan: Dict[str, Any] = {"discovered_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    try:
+        for site, (url, ready_selectors, parse) in DISCOVERY.items():
+            driver.get(url)
+            wait_ready(driver, ready_selectors, PAGE_TIMEOUT)
+            plan[site] = parse(driver.page_source.encode("utf-8"))
+            logging.info(f"{site}: " + ", ".join(f"{len(values)} {kind} values"
+                                                 for kind, values in plan[site].items()))
+    finally:
+        browsers.release(driver)
+        browsers.close()
+    return plan
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Facet-sharded crawl planning")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    discover_parser = subparsers.add_parser("discover", help="Collect category/location facets from both sites")
+    discover_parser.add_argument("--output", default=FACETS_FILE)
+    discover_parser.add_argument("--driver", default=DRIVER_PATH)
+    discover_parser.add_argument("--headless", action="store_true")
+
+    show_parser = subparsers.add_parser("show", help="Show the streams a facet file starts with")
+    show_parser.add_argument("--facets", default=FACETS_FILE)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "discover":
+        plan = discover(args.driver, args.headless)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(plan, f, ensure_ascii=False, indent=2)
+        logging.info(f"Facets saved to {args.output}")
+    elif args.command == "show":
+        for site, facets in load_facets(args.facets).items():
+            source = FACETED_SOURCES[site](facets)
+            print(f"{site}: {len(source.streams)} streams, {source.max_concurrency} in parallel, "
+                  f"{len(facets.get(SPLIT_FACET, []))} {SPLIT_FACET} values for splits")
+
+
+if __name__ == "__main__":
+    main()
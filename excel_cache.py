@@ -0,0 +1,133 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Optional, Dict, Any
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (Feather support for pandas)
+except ImportError:  # pickle sidecars keep the cache working without pyarrow
+    pyarrow = None
+
+from metrics import metrics
+
+# تنظیمات کش اکسل
+SIDECAR_SUFFIX = ".cache"
+FORMAT_FEATHER = "feather"
+FORMAT_PICKLE = "pickle"
+# read_excel arguments that do not change the resulting frame
+_NEUTRAL_KWARGS = {"engine"}
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sidecar_base(path: str, kwargs: Dict[str, Any]) -> str:
+    """`jobs.xlsx` -> `jobs.xlsx.cache`, with a suffix per distinct set of read arguments"""
+    relevant = {key: value for key, value in kwargs.items() if key not in _NEUTRAL_KWARGS}
+    if not relevant:
+        return f"{path}{SIDECAR_SUFFIX}"
+    key = hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:8]
+    return f"{path}{SIDECAR_SUFFIX}-{key}"
+
+
+def _load_meta(base: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(f"{base}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_frame(df: pd.DataFrame, base: str) -> str:
+    """Write `df` to `<base>.feather` (or `<base>.pkl` without pyarrow) atomically; returns the path"""
+    frame = df.reset_index(drop=True)
+    if pyarrow is not None:
+        try:
+            frame.to_feather(f"{base}.feather.tmp")
+            os.replace(f"{base}.feather.tmp", f"{base}.feather")
+            return f"{base}.feather"
+        except Exception as e:
+            # Mixed-type object columns (e.g. numbers and text) are not representable in Arrow
+            logging.debug(f"Feather not possible for {base} ({e}), using pickle")
+    frame.to_pickle(f"{base}.pkl.tmp")
+    os.replace(f"{base}.pkl.tmp", f"{base}.pkl")
+    return f"{base}.pkl"
+
+
+def load_frame(data_path: str) -> pd.DataFrame:
+    if data_path.endswith(".feather"):
+        return pd.read_feather(data_path)
+    return pd.read_pickle(data_path)
+
+
+def _write_sidecar(df: pd.DataFrame, path: str, base: str) -> None:
+    """Store `df` as the cached content of `path` in its current on-disk version"""
+    data_path = save_frame(df, base)
+    fmt = FORMAT_FEATHER if data_path.endswith(".feather") else FORMAT_PICKLE
+
+    stat = os.stat(path)
+    meta = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": _file_hash(path),
+            "format": fmt, "data": os.path.basename(data_path)}
+    with open(f"{base}.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(f"{base}.json.tmp", f"{base}.json")
+
+
+def _read_sidecar(base: str, meta: Dict[str, Any]) -> pd.DataFrame:
+    return load_frame(os.path.join(os.path.dirname(base), meta["data"]))
+
+
+def read_excel_cached(path: str, **kwargs: Any) -> pd.DataFrame:
+    """Drop-in for `pd.read_excel(path, **kwargs)` that reads a columnar sidecar when it is current
+
+    The sidecar is trusted when the workbook's mtime and size match; if only the mtime
+    changed (copied or touched file) the content hash decides. Otherwise the workbook is
+    parsed once and the sidecar rebuilt.
+    """
+    base = _sidecar_base(path, kwargs)
+    meta = _load_meta(base)
+    if meta is not None:
+        try:
+            stat = os.stat(path)
+            current = meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size
+            if not current and meta["size"] == stat.st_size and meta["sha1"] == _file_hash(path):
+                meta["mtime_ns"] = stat.st_mtime_ns
+                with open(f"{base}.json", "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                current = True
+            if current:
+                df = _read_sidecar(base, meta)
+                metrics.inc("excel_cache_hits")
+                return df
+        except Exception as e:
+            logging.debug(f"Ignoring sidecar for {path}: {e}")
+
+    df = pd.read_excel(path, **kwargs)
+    metrics.inc("excel_cache_misses")
+    try:
+        _write_sidecar(df, path, base)
+    except Exception as e:
+        logging.warning(f"Could not write cache for {path}: {e}")
+    return df
+
+
+def write_excel_cached(df: pd.DataFrame, path: str, **kwargs: Any) -> None:
+    """`df.to_excel(path, index=False, **kwargs)`, written atomically
+
+    No sidecar is written from `df`: the frame in memory is not what the workbook reads
+    back (None vs NaN, dtypes), so the next `read_excel_cached(path)` parses the workbook
+    once and caches that.
+    """
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{ext}"
+    # Written beside the target and swapped in, so an interrupted save never leaves a truncated workbook
+    df.to_excel(tmp_path, index=False, **kwargs)
+    os.replace(tmp_path, path)
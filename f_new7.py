@@ -10,7 +10,6 @@ from datetime import datetime
 from threading import Thread, Event, Lock
 from typing import Optional, Dict, List, Any, Hashable, Sequence, Callable, Union
 import urllib.parse
-import schedule
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -18,7 +17,25 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (TimeoutException, WebDriverException, 
-                                     NoSuchElementException, StaleElementReferenceException)
+                                     StaleElementReferenceException)
+from near_duplicates import NearDuplicateIndex
+from text_normalizer import normalize_frame, normalize_text
+from rollups import RollupStore
+from html_archive import HtmlArchive, KIND_LISTING
+from job_parser import parse_listing
+from tracing import tracer
+from profiling import profiled
+from metrics import metrics
+from readiness import use_eager_loading, wait_ready, wait_network_idle, wait_navigated
+from rate_limiter import RateLimiter
+from scheduler import Scheduler
+from block_detector import BlockDetector, BlockPolicy, OK, EMPTY, RETRY, ROTATE, STOP
+from excel_cache import read_excel_cached, write_excel_cached
+from browser_memory import (MemorySupervisor, selenium_browser_pid,
+                            save_selenium_session, restore_selenium_session)
+from url_set import UrlSet, output_set_name
+from browser_profile import BrowserProfile
+from prefetch import TabPrefetcher, PREFETCH_DEPTH
 
 # Constants
 STATUS_FILE = "scraping_status.pkl"
@@ -26,6 +43,15 @@ CONFIG_FILE = "scraper_config.json"
 MAX_RETRIES = 5
 BACKUP_DIR = "backups"
 MAX_MATCHES = 5
+NEAR_DUPLICATE_THRESHOLD = 0.8
+NEAR_DUPLICATE_INDEX_FILE = "near_duplicates_index.pkl"
+PAGE_INTERVAL = (3, 7)  # politeness spacing between listing page requests (seconds)
+LISTING_READY_SELECTORS = [".o-listView__itemInfo", ".paginator"]
+NEW_JOBS_SCAN_JOB = "new_jobs_scan"
+SCAN_JITTER_SECONDS = 5 * 60  # spread scheduled starts so runs do not hit the site on the minute
+STATS_REFRESH_MS = 1000
+STATS_FIELDS = ["Pages/min", "Jobs/min", "Page load p50/p95", "Extraction p50/p95",
+                "Retry rate", "Timeout rate", "Current delay", "Browser memory", "Page", "ETA"]
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -44,6 +70,16 @@ class JobScraper:
         self.new_jobs_paused = Event()
         self.new_jobs_stopped = Event()
         self.pause_lock = Lock()
+        self.rollups = RollupStore()
+        self.archive = HtmlArchive()
+        self.rate_limiter = RateLimiter(*PAGE_INTERVAL)
+        self.block_detector = BlockDetector()
+        self.block_policy = BlockPolicy(self.rate_limiter, log=self.log)
+        self.cancel_event = self.stopped  # cuts a backoff pause short; set per mode
+        self.memory = MemorySupervisor()
+        self.seen_urls: Optional[UrlSet] = None  # links of the workbook a New Jobs scan is writing
+        self.profile: Optional[BrowserProfile] = None  # persistent Chrome profile, kept warm across runs
+        self.prefetcher: Optional[TabPrefetcher] = None  # next listing pages loading in background tabs
         
     def extract_job_slug(self, url: str) -> str:
         """
@@ -60,7 +96,8 @@ class JobScraper:
                 slug_part = parts[1].split('?')[0]
                 # Further split to get just the title portion (after job ID)
                 slug = slug_part.split('/')[1] if '/' in slug_part else slug_part
-                return urllib.parse.unquote(slug)  # Decode URL-encoded characters
+                # Decode URL-encoded characters and canonicalize Arabic/Persian variants
+                return normalize_text(urllib.parse.unquote(slug), for_key=True)
             return url  # Fallback to full URL if pattern not found
         except Exception:
             return url  # Fallback to full URL on any error
@@ -83,9 +120,11 @@ class JobScraper:
             if new_slug == existing_slug:
                 return True
                 
-            # 2. Secondary check: Compare titles and companies (case-insensitive)
-            if (new_job['Title'].lower() == existing_job['Title'].lower() and 
-                new_job['Company'].lower() == existing_job['Company'].lower()):
+            # 2. Secondary check: Compare normalized titles and companies
+            if (normalize_text(str(new_job['Title']), for_key=True) ==
+                    normalize_text(str(existing_job['Title']), for_key=True) and
+                normalize_text(str(new_job['Company']), for_key=True) ==
+                    normalize_text(str(existing_job['Company']), for_key=True)):
                 return True
                 
             # 3. Fallback: Full URL comparison
@@ -94,6 +133,21 @@ class JobScraper:
                 
         return False
 
+    def build_near_duplicate_index(self, existing_jobs: Sequence[Dict[Hashable, Any]]) -> NearDuplicateIndex:
+        """Load the persisted near-duplicate index, rebuilding it if it does not match the history"""
+        try:
+            index = NearDuplicateIndex.load(NEAR_DUPLICATE_INDEX_FILE)
+        except Exception as e:
+            self.log(f"Error loading near-duplicate index: {str(e)}")
+            index = None
+
+        if (index is None or len(index) != len(existing_jobs) or
+                index.threshold != NEAR_DUPLICATE_THRESHOLD):
+            self.log(f"Building near-duplicate index over {len(existing_jobs)} jobs")
+            index = NearDuplicateIndex(NEAR_DUPLICATE_THRESHOLD)
+            index.add_records(existing_jobs, key_field='Link')
+        return index
+
     def initialize_driver(self) -> None:
         """Initialize Chrome WebDriver only when needed"""
         if self.driver is not None:
@@ -107,25 +161,127 @@ class JobScraper:
         chrome_options.add_argument(f"user-agent={self.current_user_agent}")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
+        use_eager_loading(chrome_options)
         
         try:
+            # Cached JS/CSS/fonts and TLS sessions from earlier runs instead of a fresh temporary profile
+            if self.profile is None:
+                self.profile = BrowserProfile("jobinja")
+            self.profile.clean()
+            for argument in self.profile.selenium_args():
+                chrome_options.add_argument(argument)
             service = Service(executable_path="C:/Users/ASUS/Desktop/chromedriver-win64/chromedriver.exe")
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
             self.driver.set_page_load_timeout(30)
+            if self.profile.needs_warmup():
+                self.profile.warm_selenium(self.driver)
+            if PREFETCH_DEPTH:
+                self.prefetcher = TabPrefetcher(self.driver, PREFETCH_DEPTH, self.polite_wait)
+            self.memory.reset()
             self.log("WebDriver initialized")
         except Exception as e:
             self.log(f"Failed to initialize WebDriver: {str(e)}")
             raise
 
+    def recycle_driver(self, reason: str) -> None:
+        """Restart Chrome with the same cookies once it uses too much memory"""
+        self.log(f"Recycling browser: {reason}")
+        session = save_selenium_session(self.driver)
+        try:
+            self.driver.quit()  # type: ignore
+        except WebDriverException:
+            pass
+        self.driver = None
+        self.prefetcher = None
+        self.initialize_driver()
+        restore_selenium_session(self.driver, session)
+        self.memory.recycled()
+
+    def advance_to(self, page_number: int) -> bool:
+        """Go to the next page; a browser that grew too large is recycled first and the page loaded by URL"""
+        reason = self.memory.check(selenium_browser_pid(self.driver))
+        if reason:
+            self.recycle_driver(reason)
+            return self.go_to_page(page_number)
+        if self.prefetcher is not None and self.prefetcher.take(self.get_page_url(page_number)) is not None:
+            return self.finish_prefetched(page_number)
+        return self.go_to_next_page(page_number)
+
+    def prefetch_ahead(self, current_page: int, max_pages: int) -> None:
+        """Start loading the following pages in background tabs while this one is parsed and saved"""
+        if self.prefetcher is None:
+            return
+        next_page = current_page + 1
+        while self.prefetcher.wants() and next_page <= max_pages and not self.cancel_event.is_set():
+            try:
+                self.prefetcher.prefetch(self.get_page_url(next_page))
+            except WebDriverException as e:
+                self.log(f"Prefetch failed, loading pages one at a time: {str(e)}")
+                self.prefetcher = None
+                return
+            next_page += 1
+
+    def finish_prefetched(self, page_number: int) -> bool:
+        """Wait for a page that has been loading in a background tab since the previous page"""
+        started = time.perf_counter()
+        try:
+            with tracer.span("wait_ready", selector=".o-listView__itemInfo|.paginator", timeout=20, prefetched=True):
+                wait_ready(self.driver, LISTING_READY_SELECTORS, timeout=20)
+            metrics.observe("page_load", time.perf_counter() - started)
+            return True
+        except TimeoutException:
+            # Slow or blocked in the background: load it the normal way, with its retry and block handling
+            metrics.inc("timeouts")
+            return self.go_to_page(page_number)
+
     def get_page_url(self, page_number: int = 1) -> str:
         """Generate URL for specific page number"""
         if page_number == 1:
             return f"{self.base_url}?{self.url_params}"
         return f"{self.base_url}?&page={page_number}&{self.url_params}"
 
-    def random_delay(self, min_seconds: float = 3, max_seconds: float = 7) -> None:
+    def random_delay(self, min_seconds: float = 3, max_seconds: float = 7) -> float:
         """Random delay between requests"""
-        time.sleep(random.uniform(min_seconds, max_seconds))
+        delay = random.uniform(min_seconds, max_seconds)
+        metrics.set_gauge("delay_seconds", delay)
+        time.sleep(delay)
+        return delay
+
+    def polite_wait(self) -> None:
+        """Politeness delay before a page request, shared with the rate limiter"""
+        self.rate_limiter.wait(self.cancel_event)
+        metrics.set_gauge("delay_seconds", self.rate_limiter.last_interval)
+
+    def blocked_action(self) -> Optional[str]:
+        """Classify a page without job cards: None if it is a real (empty) page, else RETRY/ROTATE/STOP
+
+        RETRY and ROTATE mean: load the page again; the backoff is applied by the next polite_wait.
+        """
+        if self.driver is None:
+            return None
+        try:
+            verdict = self.block_detector.classify(self.driver.page_source)
+        except WebDriverException as e:
+            self.log(f"Could not read page for block detection: {str(e)}")
+            return None
+        if verdict == EMPTY:
+            return None
+        if self.prefetcher is not None:
+            self.prefetcher.discard()  # pages loaded ahead are likely blocked too
+        action = self.block_policy.observe(verdict)
+        if action == ROTATE:
+            self.rotate_session()
+        return action
+
+    def rotate_session(self) -> None:
+        """New user agent and a clean cookie jar after a block or captcha"""
+        if self.driver is None:
+            return
+        self.rotate_user_agent()
+        try:
+            self.driver.delete_all_cookies()
+        except WebDriverException as e:
+            self.log(f"Could not clear cookies: {str(e)}")
 
     def rotate_user_agent(self) -> None:
         """Rotate to a different user agent"""
@@ -134,7 +290,12 @@ class JobScraper:
             
         new_ua = random.choice([ua for ua in USER_AGENTS if ua != self.current_user_agent])
         self.current_user_agent = new_ua
-        self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": new_ua})
+        # The override is per tab, so prefetch tabs need it too
+        current = self.driver.current_window_handle
+        for handle in self.driver.window_handles:
+            self.driver.switch_to.window(handle)
+            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": new_ua})
+        self.driver.switch_to.window(current)
         self.log(f"Rotated User Agent to: {new_ua[:50]}...")
 
     def load_status(self) -> Optional[Dict[str, Any]]:
@@ -169,24 +330,33 @@ class JobScraper:
         for attempt in range(MAX_RETRIES):
             try:
                 url = self.get_page_url(page_number)
-                self.log(f"Loading page: {url}")
-                self.driver.get(url)
-                self.random_delay()
-                
-                WebDriverWait(self.driver, 20).until(
-                    lambda d: d.find_elements(By.CSS_SELECTOR, ".o-listView__itemInfo") or 
-                             d.find_elements(By.CSS_SELECTOR, ".paginator")
-                )
+                with tracer.span("go_to_page", page=page_number, url=url, attempt=attempt + 1):
+                    self.polite_wait()
+                    self.log(f"Loading page: {url}")
+                    metrics.inc("navigations")
+                    started = time.perf_counter()
+                    self.driver.get(url)
+                    
+                    with tracer.span("wait_ready", selector=".o-listView__itemInfo|.paginator", timeout=20):
+                        wait_ready(self.driver, LISTING_READY_SELECTORS, timeout=20)
+                    metrics.observe("page_load", time.perf_counter() - started)
                 return True
             except TimeoutException:
                 self.log(f"Timeout on page {page_number}, attempt {attempt + 1}")
+                metrics.inc("timeouts")
                 if attempt == MAX_RETRIES - 1:
                     return False
-                self.random_delay(5, 10)
+                metrics.inc("retries")
+                action = self.blocked_action()
+                if action == STOP:
+                    return False
+                if action is None:
+                    self.random_delay(5, 10)
             except Exception as e:
                 self.log(f"Error loading page: {str(e)}")
                 if attempt == MAX_RETRIES - 1:
                     return False
+                metrics.inc("retries")
                 self.random_delay(5, 10)
         return False
 
@@ -198,9 +368,10 @@ class JobScraper:
 
         for attempt in range(MAX_RETRIES):
             try:
-                pagination = WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".paginator"))
-                )
+                with tracer.span("WebDriverWait", selector=".paginator", timeout=15, attempt=attempt + 1):
+                    pagination = WebDriverWait(self.driver, 15).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, ".paginator"))
+                    )
                 page_links = pagination.find_elements(By.CSS_SELECTOR, "li a")
                 page_numbers = [int(link.text) for link in page_links if link.text.isdigit()]
                 return max(page_numbers) if page_numbers else 1
@@ -224,76 +395,89 @@ class JobScraper:
 
         jobs = []
         try:
-            job_elements = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".o-listView__itemInfo"))
-            )
+            with tracer.span("WebDriverWait", selector=".o-listView__itemInfo", timeout=20):
+                job_elements = WebDriverWait(self.driver, 20).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".o-listView__itemInfo"))
+                )
+            page_source = self.driver.page_source
+            page_url = self.driver.current_url
+            self.archive.safe_put(page_url, page_source, KIND_LISTING)
 
-            for job in job_elements:
-                try:
-                    title = job.find_element(By.CSS_SELECTOR, ".c-jobListView__titleLink").text.strip()
-                    company = job.find_element(By.XPATH, ".//span[contains(text(), '|')]").text.strip()
-                    location = job.find_element(By.XPATH, ".//span[contains(text(), '،')]").text.strip()
-                    contract = job.find_element(By.XPATH, ".//span[contains(text(), 'قرارداد')]").text.strip()
-                    link = job.find_element(By.CSS_SELECTOR, ".c-jobListView__titleLink").get_attribute("href")
-
-                    jobs.append({
-                        'Title': title,
-                        'Company': company,
-                        'Location': location,
-                        'Contract Type': contract,
-                        'Link': link,
-                    })
-                except NoSuchElementException:
-                    continue
-                except Exception as e:
-                    self.log(f"Error parsing job: {str(e)}")
-                    continue
+            # One page_source read instead of a WebDriver round-trip per field
+            with tracer.span("extract", url=page_url, html_bytes=len(page_source)) as span, \
+                    metrics.timer("extraction"):
+                jobs = parse_listing(page_source.encode('utf-8'), page_url)
+                span.set("jobs", len(jobs))
+            metrics.inc("pages")
+            metrics.inc("jobs", len(jobs))
+            if jobs:
+                self.block_policy.observe(OK)
+            if len(jobs) < len(job_elements):
+                self.log(f"Skipped {len(job_elements) - len(jobs)} incomplete job cards")
 
         except TimeoutException:
             self.log("Timeout waiting for job listings")
+            metrics.inc("timeouts")
         except Exception as e:
             self.log(f"Error scraping page: {str(e)}")
 
+        if jobs:
+            # Canonicalize the page column-wise (drops the '|'/'،' separators used to locate the spans)
+            jobs = normalize_frame(pd.DataFrame(jobs)).to_dict('records')
         return jobs
 
-    def go_to_next_page(self) -> bool:
-        """Navigate to next page if available"""
+    def go_to_next_page(self, next_page: Optional[int] = None) -> bool:
+        """Navigate to next page if available; after a block, reload `next_page` by URL"""
         if self.driver is None:
             self.log("WebDriver not initialized")
             return False
 
         for attempt in range(MAX_RETRIES):
             try:
-                next_btn = WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "a[rel='next']"))
-                )
-                
-                if next_btn is None:
-                    self.log("Next button not found")
-                    return False
-                
-                next_btn_class = next_btn.get_attribute("class") or ""
-                if "disabled" in next_btn_class:
-                    return False
-                
-                self.driver.execute_script("arguments[0].click();", next_btn)
-                self.random_delay(2, 4)
-                
-                WebDriverWait(self.driver, 20).until(
-                    lambda d: d.find_elements(By.CSS_SELECTOR, ".o-listView__itemInfo") or 
-                             d.find_elements(By.CSS_SELECTOR, ".paginator")
-                )
+                with tracer.span("go_to_next_page", url=self.driver.current_url, attempt=attempt + 1):
+                    with tracer.span("WebDriverWait", selector="a[rel='next']", timeout=15):
+                        next_btn = WebDriverWait(self.driver, 15).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "a[rel='next']"))
+                        )
+                    
+                    if next_btn is None:
+                        self.log("Next button not found")
+                        return False
+                    
+                    next_btn_class = next_btn.get_attribute("class") or ""
+                    if "disabled" in next_btn_class:
+                        return False
+                    
+                    old_page = self.driver.find_element(By.TAG_NAME, "html")
+                    self.polite_wait()
+                    metrics.inc("navigations")
+                    started = time.perf_counter()
+                    self.driver.execute_script("arguments[0].click();", next_btn)
+                    
+                    with tracer.span("wait_ready", selector=".o-listView__itemInfo|.paginator", timeout=20):
+                        wait_navigated(self.driver, old_page, timeout=20)
+                        wait_ready(self.driver, LISTING_READY_SELECTORS, timeout=20)
+                    metrics.observe("page_load", time.perf_counter() - started)
                 return True
                 
             except TimeoutException:
                 self.log(f"Timeout on next page, attempt {attempt + 1}")
+                metrics.inc("timeouts")
+                action = self.blocked_action()
+                if action == STOP:
+                    return False
+                if action is not None and next_page is not None:
+                    # The block page has no next button: come back to the page by URL after the backoff
+                    return self.go_to_page(next_page)
                 if attempt == MAX_RETRIES - 1:
                     return False
+                metrics.inc("retries")
                 self.random_delay(3, 6)
             except Exception as e:
                 self.log(f"Error going to next page: {str(e)}")
                 if attempt == MAX_RETRIES - 1:
                     return False
+                metrics.inc("retries")
                 self.random_delay(3, 6)
         return False
 
@@ -301,25 +485,29 @@ class JobScraper:
                  existing_data: Optional[Sequence[Dict[Hashable, Any]]] = None) -> str:
         """Save data with backup"""
         try:
-            combined = list(existing_data) + list(data) if existing_data else list(data)
-            df = pd.DataFrame(combined)
-            
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            
-            # Main save
-            df.to_excel(output_file, index=False, engine='openpyxl')
-            self.log(f"Data saved to {output_file}")
-            
-            # Immediate backup
-            backup_path = f"{os.path.splitext(output_file)[0]}_backup.xlsx"
-            df.to_excel(backup_path, index=False, engine='openpyxl')
-            
-            # Timestamped backup
-            backup_dir = os.path.join(os.path.dirname(output_file), BACKUP_DIR)
-            os.makedirs(backup_dir, exist_ok=True)
-            timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')
-            timestamped_backup = os.path.join(backup_dir, f"backup_{timestamp}.xlsx")
-            df.to_excel(timestamped_backup, index=False, engine='openpyxl')
+            with tracer.span("save_data", output_file=output_file) as span:
+                combined = list(existing_data) + list(data) if existing_data else list(data)
+                df = normalize_frame(pd.DataFrame(combined))
+                span.set("rows", len(df))
+                
+                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                
+                # Main save (with a columnar sidecar so the next reference load skips xlsx parsing)
+                write_excel_cached(df, output_file, engine='openpyxl')
+                self.log(f"Data saved to {output_file}")
+                
+                # Immediate backup
+                backup_path = f"{os.path.splitext(output_file)[0]}_backup.xlsx"
+                df.to_excel(backup_path, index=False, engine='openpyxl')
+                
+                # Timestamped backup
+                backup_dir = os.path.join(os.path.dirname(output_file), BACKUP_DIR)
+                os.makedirs(backup_dir, exist_ok=True)
+                timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')
+                timestamped_backup = os.path.join(backup_dir, f"backup_{timestamp}.xlsx")
+                df.to_excel(timestamped_backup, index=False, engine='openpyxl')
+                span.set("bytes_written", sum(os.path.getsize(path) for path in
+                                              (output_file, backup_path, timestamped_backup)))
             
             return backup_path
             
@@ -333,20 +521,29 @@ class JobScraper:
         try:
             # Initialize driver only when needed
             self.initialize_driver()
+            metrics.reset()
             
             # Reset pause/stop events
             self.new_jobs_paused.clear()
             self.new_jobs_stopped.clear()
+            self.cancel_event = self.new_jobs_stopped
             
             # Load existing data
-            existing_df = pd.read_excel(reference_file)
+            existing_df = read_excel_cached(reference_file)
             existing_jobs = existing_df.to_dict('records')
             self.log(f"Loaded {len(existing_jobs)} jobs (checking first 5 for duplicates)")
+            near_index = self.build_near_duplicate_index(existing_jobs)
 
             # Initialize variables
             new_jobs = []
             current_page = 1
             matches_found = 0
+
+            # The output is rebuilt from the reference rows, so only links in those rows count as seen
+            self.seen_urls = UrlSet(output_set_name("jobinja", output_file))
+            links = existing_df['Link'].dropna() if 'Link' in existing_df else []
+            if self.seen_urls.sync(str(link) for link in links):
+                self.log(f"Seen-link set rebuilt from {len(self.seen_urls)} reference links")
             
             if not self.go_to_page(current_page):
                 return
@@ -374,40 +571,58 @@ class JobScraper:
                 self.log(f"\nChecking page {current_page} of {max_pages}")
                 
                 # Update progress
+                metrics.set_gauge("current_page", current_page)
+                metrics.set_gauge("max_pages", max_pages)
                 if progress_callback:
                     progress_callback(current_page, max_pages)
                 
-                # Scroll to load all content
+                # Scroll to load all content, then wait only until lazy loads settle
                 if self.driver:
                     self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                self.random_delay(2, 3)
+                    wait_network_idle(self.driver)
                 
                 jobs = self.scrape_page()
                 if not jobs:
+                    if self.blocked_action() in (RETRY, ROTATE) and self.go_to_page(current_page):
+                        continue  # same page again after the backoff
                     break
                     
+                self.prefetch_ahead(current_page, max_pages)
+                page_start = len(new_jobs)
                 for job in jobs:
                     if self.is_duplicate(job, existing_jobs, 5):
                         matches_found += 1
                         if matches_found >= MAX_MATCHES:
                             break
                     else:
+                        if job['Link'] in self.seen_urls:
+                            continue  # already scraped, further down the reference file
+                        # Listing cards carry only title and company, too little to tell a repost
+                        # from another opening with the same title, so matches are only reported
+                        reposts = near_index.query(job)
+                        if reposts:
+                            original, similarity = reposts[0]
+                            self.log(f"Possible repost ({similarity:.0%} similar to {original}): {job['Title']}")
+                            metrics.inc("possible_reposts")
                         new_jobs.append(job)
+                        near_index.add(job, job['Link'])
                 
                 # Save progress after each page
                 if new_jobs:
                     all_jobs = new_jobs + existing_jobs
                     backup_file = self.save_data(all_jobs, output_file)
                     self.save_new_jobs_status(current_page, matches_found, new_jobs, output_file)
+                    self.rollups.add_records(new_jobs[page_start:], "jobinja_listing")
+                    self.seen_urls.update(job['Link'] for job in new_jobs[page_start:])
+                    self.seen_urls.flush()
                 
                 if matches_found >= MAX_MATCHES:
                     break
                     
-                if not self.go_to_next_page():
+                if not self.advance_to(current_page + 1):
                     break
                     
                 current_page += 1
-                self.random_delay(4, 7)
             
             # Final progress update
             if progress_callback:
@@ -415,6 +630,7 @@ class JobScraper:
             
             if new_jobs:
                 self.log(f"\nAdded {len(new_jobs)} new jobs. Total jobs now: {len(existing_jobs) + len(new_jobs)}")
+                near_index.save(NEAR_DUPLICATE_INDEX_FILE)
             else:
                 self.log("\nNo new jobs found or stopped at duplicates")
                 
@@ -426,6 +642,10 @@ class JobScraper:
             self.log(f"Error in new jobs scanning: {str(e)}")
             self.save_new_jobs_status(current_page, matches_found, new_jobs, output_file)
         finally:
+            tracer.flush()
+            if self.seen_urls is not None:
+                self.seen_urls.close()
+                self.seen_urls = None
             self.new_jobs_stopped.set()
             self.new_jobs_paused.clear()
 
@@ -457,10 +677,12 @@ class JobScraper:
         try:
             # Initialize driver only when needed
             self.initialize_driver()
+            metrics.reset()
+            self.cancel_event = self.stopped
             
             if existing_file:
                 try:
-                    existing_df = pd.read_excel(existing_file)
+                    existing_df = read_excel_cached(existing_file)
                     existing_data = existing_df.to_dict('records')
                     self.log(f"Existing jobs loaded: {len(existing_data)}")
                 except Exception as e:
@@ -488,24 +710,33 @@ class JobScraper:
                     break
                 
                 # Update progress
+                metrics.set_gauge("current_page", current_page)
+                metrics.set_gauge("max_pages", max_pages)
                 if progress_callback:
                     progress_callback(current_page, max_pages)
                 
                 self.log(f"\nScraping page {current_page} of {max_pages}")
                 
-                jobs = self.scrape_page()
-                if not jobs:
-                    break
-                    
-                all_jobs.extend(jobs)
-                backup_file = self.save_data(all_jobs, output_file, existing_data)
-                self.save_status(current_page, output_file, backup_file)
-                
-                if current_page >= max_pages:
-                    break
+                with tracer.span("page", page=current_page, max_pages=max_pages) as page_span:
+                    jobs = self.scrape_page()
+                    page_span.set("jobs", len(jobs))
+                    if not jobs:
+                        if self.blocked_action() in (RETRY, ROTATE) and self.go_to_page(current_page):
+                            continue  # same page again after the backoff
+                        break
+                        
+                    # The next page downloads in another tab while this one is saved
+                    self.prefetch_ahead(current_page, max_pages)
+                    all_jobs.extend(jobs)
+                    backup_file = self.save_data(all_jobs, output_file, existing_data)
+                    self.save_status(current_page, output_file, backup_file)
+                    self.rollups.add_records(jobs, "jobinja_listing")
                     
-                if not self.go_to_next_page():
-                    break
+                    if current_page >= max_pages:
+                        break
+                        
+                    if not self.advance_to(current_page + 1):
+                        break
                     
                 current_page += 1
                 
@@ -516,8 +747,6 @@ class JobScraper:
                     if new_max > max_pages:
                         self.log(f"Updated max pages to {new_max}")
                         max_pages = new_max
-                
-                self.random_delay(3, 6)
             
             # Final progress update
             if progress_callback:
@@ -528,10 +757,12 @@ class JobScraper:
         except Exception as e:
             self.log(f"Error in full scraping: {str(e)}")
         finally:
+            tracer.flush()
             # Ensure WebDriver is closed after operation
             if hasattr(self, 'driver') and self.driver:
                 self.driver.quit()
                 self.driver = None
+                self.prefetcher = None
 
     def pause(self) -> None:
         """Pause main scraping"""
@@ -571,14 +802,15 @@ class JobScraper:
             print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
 
 class JobScraperGUI:
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, profile: bool = False):
         self.root = root
         self.root.title("Jobinja Scraper")
         self.root.geometry("800x600")
         self.log_text: Optional[scrolledtext.ScrolledText] = None
         self.scraper = JobScraper(self)
         self.running = False
-        self.scheduled_job: Optional[schedule.Job] = None
+        self.profile_var = tk.BooleanVar(value=profile)
+        self.scheduler = Scheduler(log=self.log_message)
         self.periodic_update_active = False
         
         # Progress tracking
@@ -588,13 +820,9 @@ class JobScraperGUI:
         self.create_widgets()
         self.load_config()
         
-        # Start the schedule checker
-        self.check_schedule()
-
-    def check_schedule(self):
-        """Check for scheduled jobs"""
-        schedule.run_pending()
-        self.root.after(1000, self.check_schedule)
+        # Scheduled scans run on the scheduler's own thread, not on the Tk loop
+        self.scheduler.start()
+        self.refresh_stats()
 
     def create_widgets(self) -> None:
         """Create all GUI widgets"""
@@ -604,15 +832,18 @@ class JobScraperGUI:
         # Create tabs
         self.operations_tab = ttk.Frame(self.notebook)
         self.new_jobs_tab = ttk.Frame(self.notebook)
+        self.stats_tab = ttk.Frame(self.notebook)
         self.log_tab = ttk.Frame(self.notebook)
         
         self.notebook.add(self.operations_tab, text="Operations")
         self.notebook.add(self.new_jobs_tab, text="New Jobs Mode")
+        self.notebook.add(self.stats_tab, text="Statistics")
         self.notebook.add(self.log_tab, text="Log")
         
         # Populate tabs
         self._create_operations_tab()
         self._create_new_jobs_tab()
+        self._create_stats_tab()
         self._create_log_tab()
         
     def _create_operations_tab(self) -> None:
@@ -667,6 +898,9 @@ class JobScraperGUI:
                                   command=self.stop_scraping, state=tk.DISABLED)
         self.stop_btn.pack(side=tk.LEFT, padx=5)
         
+        ttk.Checkbutton(control_frame, text="Profile run",
+                       variable=self.profile_var).pack(side=tk.LEFT, padx=5)
+        
     def _create_new_jobs_tab(self) -> None:
         """Create widgets for new jobs tab"""
         # Schedule Options
@@ -741,6 +975,50 @@ class JobScraperGUI:
         self.nj_status_var = tk.StringVar(value="Ready")
         ttk.Label(self.new_jobs_tab, textvariable=self.nj_status_var).pack()
         
+    def _create_stats_tab(self) -> None:
+        """Create live throughput/latency panel fed by the metrics registry"""
+        stats_frame = ttk.LabelFrame(self.stats_tab, text="Live Statistics")
+        stats_frame.pack(pady=10, padx=10, fill=tk.X)
+        
+        self.stats_vars: Dict[str, tk.StringVar] = {}
+        for row, label in enumerate(STATS_FIELDS):
+            ttk.Label(stats_frame, text=f"{label}:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+            self.stats_vars[label] = tk.StringVar(value="-")
+            ttk.Label(stats_frame, textvariable=self.stats_vars[label]).grid(
+                row=row, column=1, sticky=tk.W, padx=5, pady=2)
+        
+    def refresh_stats(self) -> None:
+        """Sample the metrics registry on the Tk loop"""
+        def latency(name: str) -> str:
+            p50, p95 = metrics.percentile(name, 50), metrics.percentile(name, 95)
+            return f"{p50:.2f}s / {p95:.2f}s" if p50 is not None else "-"
+        
+        pages_per_min = metrics.per_minute("pages")
+        current, total = metrics.gauge("current_page"), metrics.gauge("max_pages")
+        if current and total and pages_per_min > 0:
+            eta_seconds = int((total - current) * 60 / pages_per_min)
+            eta = f"{eta_seconds // 3600}h {eta_seconds % 3600 // 60:02d}m {eta_seconds % 60:02d}s"
+        else:
+            eta = "-"
+        delay = metrics.gauge("delay_seconds")
+        rss = metrics.gauge("browser_rss_mb")
+        
+        values = {
+            "Pages/min": f"{pages_per_min:.1f}",
+            "Jobs/min": f"{metrics.per_minute('jobs'):.1f}",
+            "Page load p50/p95": latency("page_load"),
+            "Extraction p50/p95": latency("extraction"),
+            "Retry rate": f"{metrics.ratio('retries', 'navigations'):.1%}",
+            "Timeout rate": f"{metrics.ratio('timeouts', 'navigations'):.1%}",
+            "Current delay": f"{delay:.1f}s" if delay is not None else "-",
+            "Browser memory": f"{rss:.0f} MB, {metrics.count('browser_recycles')} restarts" if rss is not None else "-",
+            "Page": f"{int(current)} / {int(total)}" if current and total else "-",
+            "ETA": eta,
+        }
+        for label, value in values.items():
+            self.stats_vars[label].set(value)
+        self.root.after(STATS_REFRESH_MS, self.refresh_stats)
+        
     def _create_log_tab(self) -> None:
         """Create logging widget"""
         self.log_text = scrolledtext.ScrolledText(self.log_tab, wrap=tk.WORD)
@@ -812,17 +1090,18 @@ class JobScraperGUI:
     def run_scraping(self, mode: str) -> None:
         """Run scraping in background thread"""
         try:
-            if mode == "new":
-                self.scraper.scrape_all_pages(
-                    output_file=self.output_file_var.get(),
-                    progress_callback=self.update_progress
-                )
-            elif mode == "continue":
-                self.scraper.scrape_all_pages(
-                    output_file=self.output_file_var.get(),
-                    existing_file=self.input_file_var.get(),
-                    progress_callback=self.update_progress
-                )
+            with profiled("scrape_all_pages", enabled=self.profile_var.get()):
+                if mode == "new":
+                    self.scraper.scrape_all_pages(
+                        output_file=self.output_file_var.get(),
+                        progress_callback=self.update_progress
+                    )
+                elif mode == "continue":
+                    self.scraper.scrape_all_pages(
+                        output_file=self.output_file_var.get(),
+                        existing_file=self.input_file_var.get(),
+                        progress_callback=self.update_progress
+                    )
         except Exception as e:
             self.log_message(f"Error in scraping: {str(e)}")
         finally:
@@ -875,14 +1154,16 @@ class JobScraperGUI:
         schedule_mode = self.schedule_var.get()
         
         if schedule_mode == "immediate":
-            Thread(target=self.run_new_jobs_scan, daemon=True).start()
+            # Single-flight: refused while a scheduled scan is still running
+            self.scheduler.run_once(NEW_JOBS_SCAN_JOB, self.run_new_jobs_scan)
         elif schedule_mode == "daily":
             schedule_time = self.schedule_time_var.get()
             try:
-                datetime.strptime(schedule_time, "%H:%M")
-                self.scheduled_job = schedule.every().day.at(schedule_time).do(self.run_new_jobs_scan)
+                self.scheduler.daily(NEW_JOBS_SCAN_JOB, self.run_new_jobs_scan, schedule_time,
+                                     jitter=SCAN_JITTER_SECONDS)
+                next_run = self.scheduler.next_run(NEW_JOBS_SCAN_JOB)
                 self.nj_status_var.set(f"Scheduled daily at {schedule_time}")
-                self.log_message(f"New jobs scan scheduled daily at {schedule_time}")
+                self.log_message(f"New jobs scan scheduled daily at {schedule_time}, next run {next_run:%Y-%m-%d %H:%M}")
             except ValueError:
                 messagebox.showerror("Error", "Invalid time format. Use HH:MM")
         elif schedule_mode == "periodic":
@@ -892,12 +1173,12 @@ class JobScraperGUI:
                 return
                 
             self.periodic_update_active = True
-            self.scheduled_job = schedule.every(hours).hours.do(self.run_new_jobs_scan)
+            # A new schedule runs immediately and then periodically; a restored one keeps its cadence
+            self.scheduler.every(NEW_JOBS_SCAN_JOB, self.run_new_jobs_scan, hours * 3600,
+                                 jitter=SCAN_JITTER_SECONDS, run_now=True)
+            next_run = self.scheduler.next_run(NEW_JOBS_SCAN_JOB)
             self.nj_status_var.set(f"Periodic scan every {hours} hours")
-            self.log_message(f"Periodic scan scheduled every {hours} hours")
-            
-            # Run immediately and then periodically
-            Thread(target=self.run_new_jobs_scan, daemon=True).start()
+            self.log_message(f"Periodic scan scheduled every {hours} hours, next run {next_run:%Y-%m-%d %H:%M}")
             
     def run_new_jobs_scan(self) -> None:
         """Run new jobs scan in background thread"""
@@ -950,9 +1231,7 @@ class JobScraperGUI:
     def stop_new_jobs_scan(self) -> None:
         """Stop new jobs scan"""
         self.scraper.stop_new_jobs()
-        if self.scheduled_job:
-            schedule.cancel_job(self.scheduled_job)
-            self.scheduled_job = None
+        self.scheduler.cancel(NEW_JOBS_SCAN_JOB)
         self.periodic_update_active = False
         self.reset_new_jobs_controls()
         self.nj_status_var.set("Scan stopped")
@@ -1005,10 +1284,58 @@ class JobScraperGUI:
             self.stop_scraping()
         if hasattr(self.scraper, 'driver') and self.scraper.driver:
             self.scraper.driver.quit()
+        self.scheduler.stop()
+        tracer.stop()
         self.root.destroy()
 
+def run_scheduled_scans(reference_file: str, output_file: str, every_hours: Optional[float] = None,
+                        daily_at: Optional[str] = None, profile: bool = False) -> None:
+    """Headless New Jobs Only scans driven by the scheduler (no Tk)"""
+    scraper = JobScraper()
+    scheduler = Scheduler(log=scraper.log)
+
+    def scan() -> None:
+        try:
+            with profiled("scrape_new_jobs", enabled=profile):
+                scraper.scrape_new_jobs(reference_file, output_file)
+        finally:
+            if scraper.driver:
+                scraper.driver.quit()
+                scraper.driver = None
+
+    if daily_at:
+        scheduler.daily(NEW_JOBS_SCAN_JOB, scan, daily_at, jitter=SCAN_JITTER_SECONDS)
+    else:
+        scheduler.every(NEW_JOBS_SCAN_JOB, scan, (every_hours or 2) * 3600,
+                        jitter=SCAN_JITTER_SECONDS, run_now=True)
+    scraper.log(f"Next new jobs scan at {scheduler.next_run(NEW_JOBS_SCAN_JOB):%Y-%m-%d %H:%M}")
+    scheduler.run_forever()
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Jobinja scraper GUI")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Write run spans to FILE (Chrome trace JSON, or OTLP/JSON if it ends in .otlp.json)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile scraping runs and write hot-spot reports to profiles/")
+    headless = parser.add_argument_group("headless scheduled scans (no GUI)")
+    headless.add_argument("--scan-every", type=float, metavar="HOURS", help="Run New Jobs Only scans every HOURS")
+    headless.add_argument("--scan-daily", metavar="HH:MM", help="Run a New Jobs Only scan every day at HH:MM")
+    headless.add_argument("--reference", help="Reference workbook for headless scans")
+    headless.add_argument("--output", help="Output workbook for headless scans")
+    args = parser.parse_args()
+    if args.trace:
+        tracer.start(args.trace)
+
+    if args.scan_every or args.scan_daily:
+        if not (args.reference and args.output):
+            parser.error("--reference and --output are required for headless scans")
+        run_scheduled_scans(args.reference, args.output, args.scan_every, args.scan_daily, args.profile)
+        tracer.stop()
+        raise SystemExit(0)
+
     root = tk.Tk()
-    app = JobScraperGUI(root)
+    app = JobScraperGUI(root, profile=args.profile)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
\ No newline at end of file
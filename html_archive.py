@@ -0,0 +1,297 @@
+import os
+import time
+import zlib
+import struct
+import sqlite3
+import logging
+import argparse
+from threading import Lock
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, List, Any, Tuple, Iterator, IO
+
+try:
+    import zstandard as zstd
+except ImportError:  # zlib keeps the archive usable where zstandard is not installed
+    zstd = None
+
+if os.name == "nt":
+    import msvcrt
+    fcntl = None
+else:
+    import fcntl
+    msvcrt = None
+
+# تنظیمات آرشیو HTML
+ARCHIVE_DIR = "html_archive"
+PACK_FILE = "pages.pack"
+INDEX_FILE = "index.sqlite"
+LOCK_FILE = "pages.pack.lock"
+COMPRESSION_LEVEL = 10
+DICTIONARY_SIZE = 112 * 1024
+TRAIN_AFTER = 200          # pages of one kind before a dictionary is trained
+MAX_TRAINING_SAMPLES = 2000
+
+KIND_DETAIL = "detail"
+KIND_LISTING = "listing"
+KIND_JOBVISION_LISTING = "jobvision_listing"
+
+# Each pack record is a small header followed by the compressed page
+_RECORD_HEADER = struct.Struct("<I")
+
+
+@contextmanager
+def _exclusive(lock_file: IO) -> Iterator[None]:
+    """Hold an OS-level lock on `lock_file`, so appends from several processes never interleave"""
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+    else:
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                pass  # LK_LOCK gives up after ~10 s; keep waiting
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class HtmlArchive:
+    """Append-only pack of compressed HTML pages indexed by URL and fetch time"""
+
+    def __init__(self, root: str = ARCHIVE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "dictionaries"), exist_ok=True)
+        self.pack_path = os.path.join(root, PACK_FILE)
+        self.lock = Lock()
+        # Scrapers and queue workers in other processes append to the same pack
+        self.lock_file = open(os.path.join(root, LOCK_FILE), "a+")
+        self.conn = sqlite3.connect(os.path.join(root, INDEX_FILE), check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                dict_id INTEGER NOT NULL DEFAULT 0,
+                meta TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_url ON pages(url, fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_pages_kind ON pages(kind, fetched_at);
+            CREATE TABLE IF NOT EXISTS dictionaries (
+                dict_id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                path TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+        """)
+        self._compressors: Dict[int, Any] = {}
+
+    # --- compression -------------------------------------------------------
+
+    def _dictionary_for(self, kind: str) -> int:
+        row = self.conn.execute(
+            "SELECT MAX(dict_id) FROM dictionaries WHERE kind = ?", (kind,)).fetchone()
+        return row[0] or 0
+
+    def _compress(self, data: bytes, kind: str) -> Tuple[bytes, str, int]:
+        if zstd is None:
+            return zlib.compress(data, 9), "zlib", 0
+        dict_id = self._dictionary_for(kind)
+        if dict_id not in self._compressors:
+            dictionary = load_dictionary(self.root, dict_id) if dict_id else None
+            self._compressors[dict_id] = zstd.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=dictionary)
+        return self._compressors[dict_id].compress(data), "zstd", dict_id
+
+    def train_dictionary(self, kind: str, sample_count: int = MAX_TRAINING_SAMPLES) -> Optional[int]:
+        """Train a zstd dictionary from the most recent pages of `kind`"""
+        if zstd is None:
+            return None
+        rows = self.conn.execute(
+            "SELECT id, offset, length, codec, dict_id FROM pages WHERE kind = ? "
+            "ORDER BY fetched_at DESC LIMIT ?", (kind, sample_count)).fetchall()
+        if len(rows) < 10:
+            return None
+        samples = [read_record(self.root, offset, length, codec, dict_id)
+                   for _, offset, length, codec, dict_id in rows]
+        dictionary = zstd.train_dictionary(DICTIONARY_SIZE, samples)
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO dictionaries (kind, path, created_at) VALUES (?, '', ?)", (kind, time.time()))
+            dict_id = cursor.lastrowid
+            path = os.path.join("dictionaries", f"{kind}_{dict_id}.zdict")
+            with open(os.path.join(self.root, path), "wb") as f:
+                f.write(dictionary.as_bytes())
+            self.conn.execute("UPDATE dictionaries SET path = ? WHERE dict_id = ?", (path, dict_id))
+        logging.info(f"Trained {kind} dictionary {dict_id} from {len(samples)} pages")
+        return dict_id
+
+    # --- writing and reading -----------------------------------------------
+
+    def put(self, url: str, page: str, kind: str, fetched_at: Optional[float] = None,
+            meta: Optional[str] = None) -> int:
+        """Append one fetched page, return its archive id"""
+        data = page.encode('utf-8') if isinstance(page, str) else page
+        with self.lock:
+            compressed, codec, dict_id = self._compress(data, kind)
+            with _exclusive(self.lock_file), open(self.pack_path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(_RECORD_HEADER.pack(len(compressed)) + compressed)
+            with self.conn:
+                cursor = self.conn.execute(
+                    "INSERT INTO pages (url, kind, fetched_at, offset, length, codec, dict_id, meta) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, kind, fetched_at or time.time(), offset + _RECORD_HEADER.size,
+                     len(compressed), codec, dict_id, meta)
+                )
+            page_id = cursor.lastrowid
+
+            if dict_id == 0 and zstd is not None:
+                count = self.conn.execute("SELECT COUNT(*) FROM pages WHERE kind = ?", (kind,)).fetchone()[0]
+                if count >= TRAIN_AFTER:
+                    self.train_dictionary(kind)
+        return page_id
+
+    def safe_put(self, url: str, page: str, kind: str, meta: Optional[str] = None) -> None:
+        """`put` for use inside scrapers: archiving problems must never stop a run"""
+        try:
+            self.put(url, page, kind, meta=meta)
+        except Exception as e:
+            logging.error(f"Error archiving {url}: {e}")
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Latest archived copy of `url`"""
+        row = self.conn.execute(
+            "SELECT offset, length, codec, dict_id FROM pages WHERE url = ? "
+            "ORDER BY fetched_at DESC LIMIT 1", (url,)).fetchone()
+        return read_record(self.root, *row) if row else None
+
+    def records(self, kind: str, latest_only: bool = True) -> List[Tuple]:
+        """(url, fetched_at, offset, length, codec, dict_id, meta) rows for offline processing"""
+        if latest_only:
+            sql = """SELECT url, fetched_at, offset, length, codec, dict_id, meta FROM pages
+                     WHERE id IN (SELECT MAX(id) FROM pages WHERE kind = ? GROUP BY url) ORDER BY id"""
+        else:
+            sql = """SELECT url, fetched_at, offset, length, codec, dict_id, meta
+                     FROM pages WHERE kind = ? ORDER BY id"""
+        return self.conn.execute(sql, (kind,)).fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
+        self.lock_file.close()
+
+
+_dictionary_cache: Dict[Tuple[str, int], Any] = {}
+
+
+def load_dictionary(root: str, dict_id: int):
+    key = (root, dict_id)
+    if key not in _dictionary_cache:
+        conn = sqlite3.connect(os.path.join(root, INDEX_FILE))
+        try:
+            (path,) = conn.execute("SELECT path FROM dictionaries WHERE dict_id = ?", (dict_id,)).fetchone()
+        finally:
+            conn.close()
+        with open(os.path.join(root, path), "rb") as f:
+            _dictionary_cache[key] = zstd.ZstdCompressionDict(f.read())
+    return _dictionary_cache[key]
+
+
+def read_record(root: str, offset: int, length: int, codec: str, dict_id: int) -> bytes:
+    """Read and decompress one record; safe to call from worker processes"""
+    with open(os.path.join(root, PACK_FILE), "rb") as f:
+        f.seek(offset)
+        compressed = f.read(length)
+    if codec == "zlib":
+        return zlib.decompress(compressed)
+    if zstd is None:
+        raise RuntimeError("zstandard is required to read zstd-compressed archive records")
+    dictionary = load_dictionary(root, dict_id) if dict_id else None
+    return zstd.ZstdDecompressor(dict_data=dictionary).decompress(compressed)
+
+
+def _reextract(task: Tuple) -> List[Dict[str, Any]]:
+    """Worker: decompress one archived page and run the current parser over it"""
+    import job_parser
+
+    root, kind, url, fetched_at, offset, length, codec, dict_id, meta = task
+    page = read_record(root, offset, length, codec, dict_id)
+    if kind == KIND_DETAIL:
+        return [job_parser.parse_job_detail(page, url)]
+    if kind == KIND_LISTING:
+        return job_parser.parse_listing(page, url)
+    fetched = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(fetched_at))
+    return job_parser.parse_jobvision_listing(page, int(meta or 0), fetched)
+
+
+def reextract(root: str, kind: str, workers: Optional[int] = None,
+              chunksize: int = 16) -> List[Dict[str, Any]]:
+    """Re-parse every archived page of `kind` with the current selectors on all cores"""
+    archive = HtmlArchive(root)
+    try:
+        tasks = [(root, kind) + tuple(row) for row in archive.records(kind)]
+    finally:
+        archive.close()
+
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for records in pool.map(_reextract, tasks, chunksize=chunksize):
+            results.extend(records)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compressed HTML archive of fetched pages")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reextract_parser = subparsers.add_parser("reextract", help="Re-parse archived pages into a workbook")
+    reextract_parser.add_argument("kind", choices=[KIND_DETAIL, KIND_LISTING, KIND_JOBVISION_LISTING])
+    reextract_parser.add_argument("output_file")
+    reextract_parser.add_argument("--workers", type=int)
+
+    train_parser = subparsers.add_parser("train", help="(Re)train the compression dictionary")
+    train_parser.add_argument("kind", choices=[KIND_DETAIL, KIND_LISTING, KIND_JOBVISION_LISTING])
+
+    subparsers.add_parser("stats", help="Pages and bytes per kind")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "reextract":
+        import pandas as pd
+        from text_normalizer import normalize_frame
+
+        started = time.perf_counter()
+        records = reextract(args.root, args.kind, args.workers)
+        normalize_frame(pd.DataFrame(records)).to_excel(args.output_file, index=False, engine='openpyxl')
+        logging.info(f"{len(records)} records re-extracted in {time.perf_counter() - started:.1f}s "
+                     f"-> {args.output_file}")
+        return
+
+    archive = HtmlArchive(args.root)
+    try:
+        if args.command == "train":
+            archive.train_dictionary(args.kind)
+        else:
+            for kind, pages, size in archive.conn.execute(
+                    "SELECT kind, COUNT(*), SUM(length) FROM pages GROUP BY kind"):
+                print(f"{kind}\t{pages} pages\t{size / 1024 / 1024:.1f} MB")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import copy
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit, unquote
+from typing import Optional, Dict, List, Union
+
+from lxml import html as lxml_html
+
+# Jobinja detail page: output column -> label of the <h4> heading that precedes the value
+DETAIL_LABELS = {
+    "Category": "دسته‌بندی شغلی",
+    "Location": "موقعیت مکانی",
+    "Cooperation Type": "نوع همکاری",
+    "Work Experience": "حداقل سابقه کار",
+    "Salary": "حقوق",
+    "Languages": "زبان‌های مورد نیاز",
+    "Gender": "جنسیت",
+    "Military Status": "وضعیت نظام وظیفه",
+    "Education Level": "حداقل مدرک تحصیلی",
+}
+SKILLS_LABEL = "مهارت‌های مورد نیاز"
+DETAIL_HEADERS = [
+    "Job Title", "Category", "Location", "Cooperation Type",
+    "Work Experience", "Salary", "Languages", "Skills",
+    "Gender", "Military Status", "Education Level",
+    "Job Description", "Company Introduction", "URL"
+]
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate equivalent to the CSS class selector `.name`"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _label_xpath(label: str) -> str:
+    return f'//h4[text()="{label}"]/following-sibling::div/span'
+
+
+JOB_DESCRIPTION_XPATH = f"//*[{_has_class('o-box__text')} and {_has_class('s-jobDesc')}]"
+COMPANY_INTRO_XPATH = f"//*[{_has_class('o-box__text')} and not({_has_class('s-jobDesc')})]"
+LISTING_ITEM_XPATH = f"//*[{_has_class('o-listView__itemInfo')}]"
+LISTING_TITLE_XPATH = f".//*[{_has_class('c-jobListView__titleLink')}]"
+
+JOBVISION_BASE_URL = "https://jobvision.ir"
+# Listing facets: Jobinja names them in its search form, JobVision links to one path per value
+JOBINJA_FACET_FIELDS = {"category": "filters[job_categories]", "location": "filters[locations]"}
+JOBVISION_FACET_PATHS = {"category": "/jobs/category/", "location": "/jobs/city/"}
+JOBVISION_CARD_XPATH = (f"//job-card[{_has_class('col-12')} and {_has_class('row')} and "
+                        f"{_has_class('cursor')} and {_has_class('px-0')} and {_has_class('ng-star-inserted')}]")
+
+
+def _document(page: Union[bytes, str]):
+    if isinstance(page, bytes):
+        # lxml only honours <meta charset> for bytes; Jobinja and JobVision are UTF-8
+        page = page.decode('utf-8', errors='replace')
+    return lxml_html.fromstring(page)
+
+
+# Elements a browser renders on their own line; Selenium's `.text` keeps those breaks
+_BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section", "article"}
+
+
+def _text(node) -> str:
+    return " ".join(node.text_content().split())
+
+
+def _multiline_text(node) -> str:
+    """Like `_text`, but keeps paragraphs and <br> breaks as newlines (long-text fields)"""
+    node = copy.deepcopy(node)
+    for element in node.iter():
+        if not isinstance(element.tag, str):
+            continue
+        # Newlines already in the text are kept too: descriptions are often pre-line text
+        if element.tag == "br":
+            element.tail = "\n" + (element.tail or "")
+        elif element.tag in _BLOCK_TAGS:
+            element.text = "\n" + (element.text or "")
+            element.tail = "\n" + (element.tail or "")
+    lines = (" ".join(line.split()) for line in node.text_content().split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _first_text(root, xpath: str, default: str = "N/A", multiline: bool = False) -> str:
+    nodes = root.xpath(xpath)
+    if not nodes:
+        return default
+    text = _multiline_text(nodes[0]) if multiline else _text(nodes[0])
+    return text if text else default
+
+
+def parse_job_detail(page: Union[bytes, str], url: str) -> Dict[str, str]:
+    """Pure version of `JobinjaScraper.extract_job_data` over the page HTML"""
+    root = _document(page)
+    data = {"Job Title": _first_text(root, "//h1")}
+    for column, label in DETAIL_LABELS.items():
+        data[column] = _first_text(root, _label_xpath(label))
+
+    skills = [_text(node) for node in root.xpath(_label_xpath(SKILLS_LABEL))]
+    data["Skills"] = ", ".join(skill for skill in skills if skill) or "N/A"
+    data["Job Description"] = _first_text(root, JOB_DESCRIPTION_XPATH, multiline=True)
+    data["Company Introduction"] = _first_text(root, COMPANY_INTRO_XPATH, multiline=True)
+    data["URL"] = url
+    return {header: data[header] for header in DETAIL_HEADERS}
+
+
+def parse_listing(page: Union[bytes, str], page_url: str = "https://jobinja.ir") -> List[Dict[str, str]]:
+    """Pure version of `JobScraper.scrape_page` over a Jobinja listing page"""
+    root = _document(page)
+    jobs = []
+    for item in root.xpath(LISTING_ITEM_XPATH):
+        title_nodes = item.xpath(LISTING_TITLE_XPATH)
+        company = item.xpath(".//span[contains(text(), '|')]")
+        location = item.xpath(".//span[contains(text(), '،')]")
+        contract = item.xpath(".//span[contains(text(), 'قرارداد')]")
+        # Same rule as the Selenium version: skip cards that miss any field
+        if not (title_nodes and company and location and contract):
+            continue
+        jobs.append({
+            'Title': _text(title_nodes[0]),
+            'Company': _text(company[0]),
+            'Location': _text(location[0]),
+            'Contract Type': _text(contract[0]),
+            'Link': urljoin(page_url, title_nodes[0].get("href", "")),
+        })
+    return jobs
+
+
+def parse_jobvision_listing(page: Union[bytes, str], page_num: int,
+                            extraction_date: Optional[str] = None) -> List[Dict[str, object]]:
+    """Pure version of `JobVisionScraper.extract_job_data` over a whole listing page"""
+    root = _document(page)
+    extraction_date = extraction_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    jobs = []
+    for card in root.xpath(JOBVISION_CARD_XPATH):
+        href = card.get("href")
+        salary = _first_text(card, f".//span[{_has_class('font-size-12px')} and not({_has_class('text-secondary')})]")
+        if salary == "N/A":
+            salary_divs = card.xpath(f".//div[{_has_class('d-flex')} and {_has_class('flex-wrap')}]")
+            if salary_divs:
+                salary_text = salary_divs[0].text_content()
+                if 'میلیون' in salary_text or 'تومان' in salary_text:
+                    salary = salary_text.split('|')[-1].strip()
+
+        jobs.append({
+            "job_title": _first_text(card, f".//*[{_has_class('job-card-title')}]"),
+            "company": _first_text(card, f".//a[{_has_class('text-black')} and {_has_class('line-height-24')}]"),
+            "location": _first_text(card, f".//span[{_has_class('text-secondary')} and {_has_class('pointer-events-none')}]"),
+            "salary": salary if salary != "N/A" else "Negotiable",
+            "status": "Urgent" if card.xpath(f".//*[{_has_class('urgent-tag')}]") else "Normal",
+            "job_link": urljoin(JOBVISION_BASE_URL, href.split('?')[0]) if href else "N/A",
+            "page": page_num,
+            "extraction_date": extraction_date,
+        })
+    return jobs
+
+
+def parse_jobinja_facets(page: Union[bytes, str]) -> Dict[str, List[str]]:
+    """Category and location values offered by the search filters of a Jobinja listing page"""
+    root = _document(page)
+    facets = {}
+    for kind, field in JOBINJA_FACET_FIELDS.items():
+        values = []
+        for node in root.xpath(f'//*[starts-with(@name, "{field}")]'):
+            options = node.xpath(".//option") if node.tag == "select" else [node]
+            values.extend((option.get("value") or "").strip() for option in options)
+        facets[kind] = list(dict.fromkeys(value for value in values if value))
+    return facets
+
+
+def parse_jobvision_facets(page: Union[bytes, str]) -> Dict[str, List[str]]:
+    """Category and city slugs linked from a JobVision listing page"""
+    root = _document(page)
+    facets: Dict[str, List[str]] = {kind: [] for kind in JOBVISION_FACET_PATHS}
+    for href in root.xpath("//a/@href"):
+        path = urlsplit(urljoin(JOBVISION_BASE_URL, href)).path
+        for kind, prefix in JOBVISION_FACET_PATHS.items():
+            if path.startswith(prefix):
+                slug = unquote(path[len(prefix):].split("/")[0])
+                if slug and slug not in facets[kind]:
+                    facets[kind].append(slug)
+    return facets
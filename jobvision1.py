@@ -1,13 +1,29 @@
 import os
 import pickle
-from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
+from playwright.sync_api import sync_playwright, Playwright, Browser, BrowserContext, Page
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import pandas as pd
 import time
 import random
-from datetime import datetime
-from urllib.parse import urljoin
 import logging
+import argparse
 from typing import Optional, Dict, List, Tuple, Any
+from text_normalizer import normalize_frame
+from salary_parser import NumericIndex, add_parsed_columns
+from search_index import SearchIndex
+from rollups import RollupStore
+from html_archive import HtmlArchive, KIND_JOBVISION_LISTING
+from profiling import run_profiled
+from job_parser import parse_jobvision_listing
+from rate_limiter import RateLimiter
+from proxy_pool import ProxyPool, Proxy, playwright_proxy
+from block_detector import BlockDetector, BlockPolicy, BLOCKING, RETRY, ROTATE, STOP
+from browser_memory import MemorySupervisor, BROWSER_PROCESS_NAMES
+from excel_cache import write_excel_cached
+from segment_sink import SegmentSink
+from url_set import UrlSet, output_set_name
+from browser_profile import BrowserProfile
+from prefetch import PagePrefetcher, PREFETCH_DEPTH
 
 # تنظیمات پایه
 logging.basicConfig(
@@ -18,15 +34,13 @@ logging.basicConfig(
 # تنظیمات اسکراپر
 class Config:
     OUTPUT_PATH = "jobvision_data.xlsx"
+    LISTING_URL = "https://jobvision.ir/jobs?page={page}&sort=0"
     STATE_FILE = "scraper_state.pkl"
     MAX_RECORDS = 1200
-    PAGES_PER_BROWSER = 20
     DELAYS = {
-        'page_load': (3, 7),         # تأخیر بارگذاری صفحه
-        'between_jobs': (2, 5),     # تأخیر بین پردازش مشاغل
-        'between_pages': (5, 12),   # تأخیر بین صفحات
-        'new_browser': (10, 20)     # تأخیر برای مرورگر جدید
+        'between_pages': (5, 12)    # فاصله بین درخواست صفحات (محدودکننده نرخ)
     }
+    NETWORK_IDLE_TIMEOUT = 5000     # حداکثر انتظار برای بارگذاری تنبل پس از اسکرول (میلی‌ثانیه)
     USER_AGENTS = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.5735.199 Safari/537.36",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.5735.199 Safari/537.36",
@@ -37,21 +51,46 @@ class Config:
     ]
 
 class JobVisionScraper:
-    def __init__(self):
+    def __init__(self, proxy_pool: Optional[ProxyPool] = None, persistent_profile: bool = True):
+        self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
-        self.pages_scraped_in_session: int = 0
+        self.prefetcher: Optional[PagePrefetcher] = None  # صفحه بعد در یک صفحه دوم بارگذاری می‌شود
+        self.user_agent: Optional[str] = None
+        self.keep_identity = False  # مرورگر بعدی با همان User-Agent و کوکی‌ها
+        self.session_state: Optional[Dict[str, Any]] = None  # کوکی‌ها و localStorage برای مرورگر بعدی (پروفایل موقت)
+        # پروفایل پایدار: JS، CSS و فونت‌های اجراهای قبلی از کش دیسک خوانده می‌شوند
+        self.browser_profile = BrowserProfile("jobvision") if persistent_profile else None
+        # مرورگر فقط وقتی بازراه‌اندازی می‌شود که حافظه یا هندل‌هایش از حد بگذرد
+        self.memory = MemorySupervisor(name_filter=BROWSER_PROCESS_NAMES, include_root=False)
+        self.numeric_index = NumericIndex()
+        self.search_index = SearchIndex()
+        self.rollups = RollupStore()
+        self.archive = HtmlArchive()
+        self.rate_limiter = RateLimiter(*Config.DELAYS['between_pages'])
+        self.proxy_pool = proxy_pool
+        self.proxy: Optional[Proxy] = None
+        self.block_detector = BlockDetector()
+        self.block_policy = BlockPolicy(self.rate_limiter)
         self.init_files()
+        # هر صفحه فقط یک قطعه کوچک می‌نویسد؛ فایل اکسل در پایان اجرا یک‌جا به‌روز می‌شود
+        self.sink = SegmentSink(Config.OUTPUT_PATH)
+        # فقط لینک‌هایی که در همین فایل خروجی هستند «دیده‌شده» حساب می‌شوند
+        self.seen_urls = UrlSet(output_set_name("jobvision", Config.OUTPUT_PATH))
+        saved = self.sink.frame()
+        links = saved['job_link'].dropna() if 'job_link' in saved else []
+        self.seen_urls.sync(str(link) for link in links if link != "N/A")
         self.state = self.load_state()
 
     def init_files(self) -> None:
         """آماده‌سازی فایل‌های خروجی"""
         if not os.path.exists(Config.OUTPUT_PATH):
-            pd.DataFrame(columns=[
+            write_excel_cached(pd.DataFrame(columns=[
                 "job_title", "company", "location", "salary", "status",
-                "job_link", "page", "extraction_date", "description"
-            ]).to_excel(Config.OUTPUT_PATH, index=False)
+                "job_link", "page", "extraction_date", "description",
+                "salary_min", "salary_max", "salary_currency", "salary_negotiable"
+            ]), Config.OUTPUT_PATH)
 
     def load_state(self) -> Dict[str, Any]:
         """بارگذاری وضعیت قبلی"""
@@ -71,106 +110,180 @@ class JobVisionScraper:
         except Exception as e:
             logging.error(f"Error saving state: {e}")
 
-    def random_delay(self, delay_type: str) -> float:
-        """تاخیر تصادفی بر اساس نوع"""
-        min_d, max_d = Config.DELAYS[delay_type]
-        delay = random.uniform(min_d, max_d)
-        time.sleep(delay)
-        return delay
-
     def init_browser(self) -> None:
         """آماده‌سازی مرورگر جدید"""
         self.close_browser()
         
-        # انتخاب User-Agent جدید
-        current_user_agent = random.choice(Config.USER_AGENTS)
+        # انتخاب User-Agent جدید؛ با نشست منتقل‌شده همان هویت قبلی حفظ می‌شود
+        if not self.keep_identity or self.user_agent is None:
+            self.user_agent = random.choice(Config.USER_AGENTS)
+        self.keep_identity = False
+        current_user_agent = self.user_agent
         logging.info(f"استفاده از User-Agent: {current_user_agent}")
         
-        playwright = sync_playwright().start()
-        self.browser = playwright.chromium.launch(
-            headless=False,
-            args=[
-                "--disable-gpu",
-                "--disable-extensions",
-                "--disable-blink-features=AutomationControlled",
-                "--start-maximized"
-            ]
-        )
-        self.context = self.browser.new_context(
-            user_agent=current_user_agent,
-            viewport={'width': 1920, 'height': 1080},
-            java_script_enabled=True,
-            bypass_csp=True
-        )
+        # هر مرورگر جدید از سالم‌ترین پراکسی استخر عبور می‌کند
+        launch_options: Dict[str, Any] = {}
+        if self.proxy_pool:
+            self.proxy = self.proxy_pool.acquire(reserve=False)
+            launch_options['proxy'] = playwright_proxy(self.proxy)  # type: ignore
+            logging.info(f"استفاده از پراکسی: {self.proxy.server}")  # type: ignore
+        
+        # یک نمونه Playwright برای کل اجرا؛ قبلاً هر مرورگر جدید یک پردازه درایور رهاشده باقی می‌گذاشت
+        if self.playwright is None:
+            self.playwright = sync_playwright().start()
+        args = [
+            "--disable-gpu",
+            "--disable-extensions",
+            "--disable-blink-features=AutomationControlled",
+            "--start-maximized"
+        ]
+        context_options: Dict[str, Any] = {
+            'user_agent': current_user_agent,
+            'viewport': {'width': 1920, 'height': 1080},
+            'java_script_enabled': True,
+            'bypass_csp': True,
+        }
+        if self.browser_profile:
+            # کوکی‌ها و کش در خود پروفایل می‌مانند؛ storage_state لازم نیست
+            self.browser_profile.clean()
+            self.context = self.playwright.chromium.launch_persistent_context(
+                self.browser_profile.path,
+                headless=False,
+                **launch_options,
+                **context_options,
+                args=args + self.browser_profile.launch_args()
+            )
+        else:
+            self.browser = self.playwright.chromium.launch(headless=False, **launch_options, args=args)
+            self.context = self.browser.new_context(**context_options, storage_state=self.session_state)  # type: ignore
+        self.session_state = None
         self.context.route("**/*", lambda route, request: route.abort() if request.resource_type == "image" else route.continue_())
         
-        self.page = self.context.new_page()  # مقداردهی صفحه جدید
-        self.pages_scraped_in_session = 0
+        # مقداردهی صفحه جدید (پروفایل پایدار از ابتدا یک زبانه باز دارد)
+        self.page = self.context.pages[0] if self.context.pages else self.context.new_page()
+        if self.browser_profile and self.browser_profile.needs_warmup():
+            self.browser_profile.warm_playwright(self.page)
+        if PREFETCH_DEPTH:
+            self.prefetcher = PagePrefetcher(self.context, PREFETCH_DEPTH, self.reserve_request)
+        self.memory.reset()
         logging.info("مرورگر جدید راه‌اندازی شد")
 
-    def close_browser(self) -> None:
-        """بستن مرورگر فعلی"""
+    def close_browser(self, keep_session: bool = False) -> None:
+        """بستن مرورگر فعلی؛ با keep_session کوکی‌ها برای مرورگر بعدی نگه داشته می‌شوند"""
         if self.context:
+            self.session_state = None
+            self.keep_identity = keep_session
+            try:
+                if keep_session and not self.browser_profile:
+                    self.session_state = self.context.storage_state()  # type: ignore
+                elif not keep_session and self.browser_profile:
+                    self.context.clear_cookies()  # هویت مسدودشده به اجرای بعدی منتقل نشود؛ کش می‌ماند
+            except Exception as e:
+                logging.warning(f"ذخیره یا پاک کردن نشست ممکن نشد: {e}")
             self.context.close()
         if self.browser:
             self.browser.close()  # تغییر از stop به close
         self.browser = None
         self.context = None
         self.page = None
+        self.prefetcher = None
         logging.info("مرورگر فعلی بسته شد")
 
+    def reserve_request(self) -> None:
+        """فاصله مؤدبانه از درخواست قبلی و توکن پراکسی، پیش از هر درخواست صفحه"""
+        # زمان پردازش صفحه قبل هم جزو فاصله حساب می‌شود
+        delay = self.rate_limiter.wait()
+        logging.debug(f"تاخیر {delay:.1f} ثانیه قبل از بارگذاری صفحه")
+        if self.proxy:
+            self.proxy_pool.take(self.proxy)  # type: ignore
+
+    def prefetch_ahead(self, page_num: int) -> None:
+        """شروع بارگذاری صفحات بعد در پس‌زمینه، هم‌زمان با تجزیه و ذخیره صفحه فعلی"""
+        next_page = page_num + 1
+        while self.prefetcher and self.prefetcher.wants():
+            self.prefetcher.prefetch(Config.LISTING_URL.format(page=next_page))
+            next_page += 1
+
     def scrape_page(self, page_num: int) -> bool:
         """استخراج داده‌های یک صفحه"""
         try:
-            if not self.page or self.pages_scraped_in_session >= Config.PAGES_PER_BROWSER:
+            proxy_benched = self.proxy is not None and not self.proxy_pool.is_available(self.proxy)  # type: ignore
+            if not self.page or proxy_benched:
                 self.init_browser()
                 if not self.page:
                     raise RuntimeError("Page initialization failed")
 
-            url = f"https://jobvision.ir/jobs?page={page_num}&sort=0"
+            url = Config.LISTING_URL.format(page=page_num)
             logging.info(f"در حال پردازش صفحه {page_num} - {url}")
             
-            # تأخیر تصادفی قبل از بارگذاری صفحه
-            delay = self.random_delay('page_load')
-            logging.debug(f"تاخیر {delay:.1f} ثانیه قبل از بارگذاری صفحه")
-            
-            self.page.goto(url, timeout=30000)  # type: ignore
-            self.page.wait_for_selector('job-card', state='attached', timeout=15000)  # type: ignore
+            prefetched = self.prefetcher.take(url) if self.prefetcher else None
+            if prefetched:
+                # صفحه از زمان پردازش صفحه قبل در پس‌زمینه در حال بارگذاری بوده است
+                self.prefetcher.release(self.page)  # type: ignore
+                self.page, response, started = prefetched
+            else:
+                self.reserve_request()
+                # به محض ساخته شدن کارت‌ها ادامه می‌دهیم، نه پس از رویداد load کامل
+                started = time.monotonic()
+                try:
+                    response = self.page.goto(url, timeout=30000, wait_until='domcontentloaded')  # type: ignore
+                except Exception:
+                    if self.proxy:
+                        self.proxy_pool.report(self.proxy, ok=False)  # type: ignore
+                    raise
+            try:
+                self.page.wait_for_selector('job-card', state='attached', timeout=15000)  # type: ignore
+                cards_found = True
+            except PlaywrightTimeoutError:
+                # صفحه مسدودی یا کپچا هم کارت ندارد؛ تصمیم با طبقه‌بند پایین است
+                cards_found = False
+            latency = time.monotonic() - started
             
-            # اسکرول به پایین صفحه با تأخیر تصادفی
-            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
-            delay = self.random_delay('between_jobs')
-            logging.debug(f"تاخیر {delay:.1f} ثانیه پس از اسکرول")
+            if cards_found:
+                # اسکرول به پایین صفحه و انتظار تا آرام شدن شبکه
+                self.page.evaluate("window.scrollTo(0, document.body.scrollHeight);")  # type: ignore
+                try:
+                    self.page.wait_for_load_state('networkidle', timeout=Config.NETWORK_IDLE_TIMEOUT)  # type: ignore
+                except PlaywrightTimeoutError:
+                    logging.debug("شبکه پس از اسکرول آرام نشد؛ ادامه با محتوای فعلی")
             
-            # تأخیر تصادفی پس از بارگذاری صفحه
-            delay = self.random_delay('page_load')
-            logging.debug(f"تاخیر {delay:.1f} ثانیه پس از بارگذاری صفحه")
+            # یک بار خواندن HTML به جای رفت‌وبرگشت برای هر کارت
+            content = self.page.content()  # type: ignore
+            if cards_found:
+                self.prefetch_ahead(page_num)
+            self.archive.safe_put(url, content, KIND_JOBVISION_LISTING, meta=str(page_num))
+            batch_data = parse_jobvision_listing(content.encode('utf-8'), page_num) if cards_found else []
             
-            job_cards = self.page.query_selector_all('job-card.col-12.row.cursor.px-0.ng-star-inserted')  # type: ignore
-            if not job_cards:
+            # صفحه مسدودی/کپچا/محدودیت نرخ را از صفحه واقعاً خالی جدا می‌کنیم
+            verdict = self.block_detector.classify(content, response.status if response else None, len(batch_data))
+            if self.proxy:
+                blocked = verdict in BLOCKING
+                self.proxy_pool.report(self.proxy, ok=not blocked, latency=latency, blocked=blocked)  # type: ignore
+            action = self.block_policy.observe(verdict)
+            if action in (RETRY, ROTATE):
+                if self.prefetcher:
+                    self.prefetcher.discard()  # صفحات پیش‌بارگذاری‌شده هم احتمالاً مسدودند
+                if action == ROTATE:
+                    self.close_browser()  # مرورگر، User-Agent و پراکسی جدید در تلاش بعدی
+                return self.scrape_page(page_num)  # وقفه سراسری در rate_limiter.wait اعمال می‌شود
+            if action == STOP:
+                logging.error(f"صفحه {page_num} همچنان مسدود است؛ توقف اجرا")
+                return False
+            if not batch_data:
                 logging.warning(f"صفحه {page_num} خالی است")
                 return False
             
-            batch_data = []
-            for job in job_cards:
-                # تأخیر تصادفی بین پردازش هر شغل
-                delay = self.random_delay('between_jobs')
-                logging.debug(f"تاخیر {delay:.1f} ثانیه بین پردازش مشاغل")
-                
-                job_data = self.extract_job_data(job, page_num)
-                if job_data:
-                    batch_data.append(job_data)
-            
-            if batch_data:
-                self.save_data(batch_data)
-                self.state['current_page'] = page_num + 1
-                self.state['saved_records'] += len(batch_data)
-                self.save_state()
-                self.pages_scraped_in_session += 1
-            
-            # تأخیر تصادفی پس از پردازش صفحه
-            delay = self.random_delay('between_pages')
-            logging.debug(f"تاخیر {delay:.1f} ثانیه پس از پردازش صفحه")
+            # آگهی‌هایی که در اجراهای قبلی ذخیره شده‌اند (جابه‌جایی صفحات با آگهی‌های جدید) دوباره ذخیره نمی‌شوند
+            fresh = [job for job in batch_data if job['job_link'] not in self.seen_urls]
+            if len(fresh) < len(batch_data):
+                logging.info(f"{len(batch_data) - len(fresh)} آگهی تکراری در صفحه {page_num} رد شد")
+            if fresh:
+                self.save_data(fresh)
+                self.seen_urls.update(job['job_link'] for job in fresh if job['job_link'] != "N/A")
+                self.seen_urls.flush()
+                self.state['saved_records'] += len(fresh)
+            self.state['current_page'] = page_num + 1
+            self.save_state()
             
             return True
             
@@ -178,54 +291,15 @@ class JobVisionScraper:
             logging.error(f"خطا در پردازش صفحه {page_num}: {str(e)}")
             return False
 
-    def extract_job_data(self, job_element: Any, page_num: int) -> Optional[Dict[str, Any]]:
-        """استخراج داده‌های یک شغل"""
-        try:
-            href = job_element.get_attribute('href')
-            job_link = urljoin("https://jobvision.ir", href.split('?')[0]) if href else "N/A"
-            
-            title_element = job_element.query_selector('.job-card-title')
-            title = title_element.inner_text().strip() if title_element else "N/A"
-            
-            company_element = job_element.query_selector('a.text-black.line-height-24')
-            company = company_element.inner_text().strip() if company_element else "N/A"
-            
-            location_element = job_element.query_selector('span.text-secondary.pointer-events-none')
-            location = location_element.inner_text().strip() if location_element else "N/A"
-            
-            salary_element = job_element.query_selector('span.font-size-12px:not(.text-secondary)')
-            salary = salary_element.inner_text().strip() if salary_element else "N/A"
-            
-            if salary == "N/A":
-                salary_div = job_element.query_selector('div.d-flex.flex-wrap')
-                if salary_div:
-                    salary_text = salary_div.inner_text()
-                    if 'میلیون' in salary_text or 'تومان' in salary_text:
-                        salary = salary_text.split('|')[-1].strip()
-            
-            status = "Urgent" if job_element.query_selector('.urgent-tag') else "Normal"
-            
-            return {
-                "job_title": title,
-                "company": company,
-                "location": location,
-                "salary": salary if salary != "N/A" else "Negotiable",
-                "status": status,
-                "job_link": job_link,
-                "page": page_num,
-                "extraction_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-        except Exception as e:
-            logging.error(f"خطا در استخراج شغل: {str(e)}")
-            return None
-
     def save_data(self, new_data: List[Dict[str, Any]]) -> None:
         """ذخیره داده‌ها در فایل"""
         try:
-            existing_data = pd.read_excel(Config.OUTPUT_PATH) if os.path.exists(Config.OUTPUT_PATH) else pd.DataFrame()
-            updated_data = pd.concat([existing_data, pd.DataFrame(new_data)], ignore_index=True)
-            updated_data.to_excel(Config.OUTPUT_PATH, index=False)
-            logging.info(f"داده‌ها ذخیره شدند. کل رکوردها: {len(updated_data)}")
+            new_frame = add_parsed_columns(normalize_frame(pd.DataFrame(new_data)))
+            total = self.sink.append(new_frame)
+            self.numeric_index.upsert_frame(new_frame, "jobvision")
+            self.search_index.add_frame(new_frame, "jobvision")
+            self.rollups.add_records(new_data, "jobvision")
+            logging.info(f"داده‌ها ذخیره شدند. کل رکوردها: {total}")
         except Exception as e:
             logging.error(f"خطا در ذخیره داده‌ها: {str(e)}")
 
@@ -238,16 +312,14 @@ class JobVisionScraper:
                 success = self.scrape_page(self.state['current_page'])
                 if not success:
                     break
-                
-                delay = self.random_delay('between_pages')
-                logging.info(f"تاخیر {delay:.1f} ثانیه قبل از صفحه بعد...")
 
-                # بررسی تعداد صفحات پردازش شده و باز کردن مرورگر جدید با User-Agent جدید
-                if self.pages_scraped_in_session >= Config.PAGES_PER_BROWSER:
-                    self.close_browser()
-                    delay = self.random_delay('new_browser')
-                    logging.info(f"تغییر مرورگر و User-Agent پس از {Config.PAGES_PER_BROWSER} صفحه - تاخیر {delay:.1f} ثانیه")
-                    self.init_browser()  # باز کردن مرورگر جدید با User-Agent جدید
+                # بازراه‌اندازی مرورگر فقط در صورت رشد حافظه/هندل‌ها یا نشت؛ نشست حفظ می‌شود
+                reason = self.memory.check(os.getpid())
+                if reason:
+                    logging.info(f"بازراه‌اندازی مرورگر با حفظ نشست: {reason}")
+                    self.close_browser(keep_session=True)
+                    self.init_browser()
+                    self.memory.recycled()
             
             logging.info(f"استخراج کامل شد. کل رکوردها: {self.state['saved_records']}")
         except KeyboardInterrupt:
@@ -256,8 +328,26 @@ class JobVisionScraper:
             logging.error(f"خطای غیرمنتظره: {str(e)}")
         finally:
             self.close_browser()
+            if self.playwright:
+                self.playwright.stop()
+                self.playwright = None
+            self.seen_urls.close()
+            try:
+                self.sink.consolidate()
+            except Exception as e:
+                logging.error(f"خطا در نوشتن فایل اکسل (قطعه‌ها حفظ شدند): {e}")
             logging.info(f"آخرین صفحه پردازش شده: {self.state['current_page'] - 1}")
 
 if __name__ == "__main__":
-    scraper = JobVisionScraper()
-    scraper.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="JobVision scraper")
+    parser.add_argument("--profile", action="store_true",
+                        help="گزارش نقاط داغ CPU و حافظه در پوشه profiles/")
+    parser.add_argument("--proxies", metavar="FILE",
+                        help="فایل فهرست پراکسی‌ها (هر خط یک آدرس)")
+    parser.add_argument("--fresh-browser", action="store_true",
+                        help="پروفایل موقت مرورگر به جای پروفایل پایدار با کش گرم")
+    args = parser.parse_args()
+
+    scraper = JobVisionScraper(ProxyPool.from_file(args.proxies) if args.proxies else None,
+                               persistent_profile=not args.fresh_browser)
+    run_profiled("JobVisionScraper.run", scraper.run, enabled=args.profile)
\ No newline at end of file
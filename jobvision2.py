@@ -13,6 +13,14 @@ import random
 from urllib3.exceptions import MaxRetryError
 from requests.exceptions import SSLError
 import ssl
+from text_normalizer import normalize_frame
+from salary_parser import NumericIndex, add_parsed_columns
+from rollups import RollupStore
+from html_archive import HtmlArchive, KIND_JOBVISION_LISTING
+from excel_cache import write_excel_cached
+from segment_sink import SegmentSink
+from url_set import UrlSet, output_set_name
+from browser_profile import BrowserProfile
 
 # تنظیمات SSL
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -34,17 +42,36 @@ chrome_options.add_argument("--disable-blink-features=AutomationControlled")
 # ایجاد دایرکتوری اگر وجود نداشته باشد
 os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
+# ایندکس عددی حقوق برای جستجوی بازه‌ای
+numeric_index = NumericIndex()
+rollups = RollupStore()
+html_archive = HtmlArchive()
+# هر صفحه فقط یک قطعه کوچک می‌نویسد؛ فایل اکسل در پایان اجرا یک‌جا به‌روز می‌شود
+sink = SegmentSink(output_path, engine='openpyxl')
+# لینک‌های ذخیره‌شده در همین فایل خروجی، به صورت هش فشرده روی دیسک
+seen_urls = UrlSet(output_set_name("jobvision", output_path))
+# پروفایل پایدار: فایل‌های JS/CSS و فونت‌های اجرای قبلی از کش دیسک خوانده می‌شوند
+profile = BrowserProfile("jobvision")
+
 def init_driver():
+    profile.clean()
+    for argument in profile.selenium_args():
+        chrome_options.add_argument(argument)
     service = Service("C:/Users/ASUS/Desktop/chromedriver-win64/chromedriver.exe")
-    return webdriver.Chrome(service=service, options=chrome_options)
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    if profile.needs_warmup():
+        profile.warm_selenium(driver)
+    return driver
 
 def load_state():
     if os.path.exists(state_file):
         with open(state_file, 'rb') as f:
-            return pickle.load(f)
+            state = pickle.load(f)
+        # فایل‌های وضعیت قدیمی مجموعه لینک‌ها را در خود داشتند؛ حالا از خود فایل خروجی ساخته می‌شود
+        state.pop('processed_urls', None)
+        return state
     return {
         'current_page': 1,
-        'processed_urls': set(),
         'saved_records': 0
     }
 
@@ -54,26 +81,21 @@ def save_state(state):
 
 def init_excel():
     if not os.path.exists(output_path):
-        pd.DataFrame(columns=[
+        write_excel_cached(pd.DataFrame(columns=[
             "عنوان شغل", "شرکت", "محل کار", "حقوق", "وضعیت",
-            "لینک شغل", "صفحه", "تاریخ استخراج"
-        ]).to_excel(output_path, index=False, engine='openpyxl')
+            "لینک شغل", "صفحه", "تاریخ استخراج",
+            "salary_min", "salary_max", "salary_currency", "salary_negotiable"
+        ]), output_path, engine='openpyxl')
 
 def save_to_excel(new_data):
     try:
-        # خواندن داده‌های موجود
-        try:
-            existing_data = pd.read_excel(output_path, engine='openpyxl')
-        except:
-            existing_data = pd.DataFrame()
-
-        # اضافه کردن داده‌های جدید
-        updated_data = pd.concat([existing_data, pd.DataFrame(new_data)], ignore_index=True)
-        
-        # ذخیره فایل
-        updated_data.to_excel(output_path, index=False, engine='openpyxl')
-        print(f"ذخیره شد. کل رکوردها: {len(updated_data)}")
-        return len(updated_data)
+        # فقط داده‌های جدید به صورت یک قطعه نوشته می‌شوند
+        new_frame = add_parsed_columns(normalize_frame(pd.DataFrame(new_data)))
+        total = sink.append(new_frame)
+        numeric_index.upsert_frame(new_frame, "jobvision")
+        rollups.add_records(new_data, "jobvision")
+        print(f"ذخیره شد. کل رکوردها: {total}")
+        return total
     except Exception as e:
         print(f"خطا در ذخیره فایل: {str(e)}")
         return 0
@@ -130,6 +152,7 @@ def scrape_page(driver, page_num, state):
             EC.presence_of_element_located((By.CSS_SELECTOR, 'job-card'))
         )
         random_delay(3, 7)
+        html_archive.safe_put(url, driver.page_source, KIND_JOBVISION_LISTING, meta=str(page_num))
         
         job_cards = driver.find_elements(By.CSS_SELECTOR, 'job-card.col-12.row.cursor.px-0.ng-star-inserted')
         if not job_cards:
@@ -139,21 +162,29 @@ def scrape_page(driver, page_num, state):
         batch_data = []
         for job in job_cards:
             job_data = extract_job_data(job, page_num)
-            if job_data:
+            if job_data and job_data["لینک شغل"] not in seen_urls:
                 batch_data.append(job_data)
         
         if batch_data:
             state['saved_records'] = save_to_excel(batch_data)
-            state['current_page'] = page_num + 1
-            save_state(state)
+            seen_urls.update(job["لینک شغل"] for job in batch_data if job["لینک شغل"] != "N/A")
+            seen_urls.flush()
+        state['current_page'] = page_num + 1
+        save_state(state)
         
         return True
     except Exception as e:
         print(f"خطا در پردازش صفحه {page_num}: {str(e)}")
         return False
 
+def sync_seen_urls():
+    saved = sink.frame()
+    links = saved["لینک شغل"].dropna() if "لینک شغل" in saved else []
+    seen_urls.sync(str(link) for link in links if link != "N/A")
+
 def main():
     init_excel()
+    sync_seen_urls()
     state = load_state()
     driver = init_driver()
     
@@ -171,6 +202,11 @@ def main():
         print(f"خطای غیرمنتظره: {str(e)}")
     finally:
         driver.quit()
+        seen_urls.close()
+        try:
+            sink.consolidate()
+        except Exception as e:
+            print(f"خطا در نوشتن فایل اکسل (قطعه‌ها حفظ شدند): {str(e)}")
         print(f"پروسه متوقف شد. آخرین صفحه پردازش شده: {state['current_page'] - 1}")
         print(f"کل رکوردهای ذخیره شده: {state['saved_records']}")
 
@@ -0,0 +1,104 @@
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, Deque, Tuple
+
+RATE_WINDOW = 300        # seconds of history used for per-minute rates
+LATENCY_SAMPLES = 512    # most recent observations kept per latency series
+
+
+class MetricsRegistry:
+    """Low-overhead in-process counters, gauges and latency series for live dashboards
+
+    Scraper threads only append to deques and bump integers under one lock; the
+    expensive part (percentiles, rates) happens when the GUI reads them through
+    `count`, `gauge`, `per_minute`, `percentile` and `ratio`.
+    """
+
+    def __init__(self, rate_window: float = RATE_WINDOW, latency_samples: int = LATENCY_SAMPLES):
+        self.rate_window = rate_window
+        self.latency_samples = latency_samples
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new run: clear every series"""
+        with self.lock:
+            self.started = time.monotonic()
+            self.counters: Dict[str, int] = {}
+            self.events: Dict[str, Deque[Tuple[float, int]]] = {}
+            self.gauges: Dict[str, float] = {}
+            self.latencies: Dict[str, Deque[float]] = {}
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        now = time.monotonic()
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            series = self.events.setdefault(name, deque())
+            series.append((now, amount))
+            while series and series[0][0] < now - self.rate_window:
+                series.popleft()
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self.lock:
+            series = self.latencies.get(name)
+            if series is None:
+                series = self.latencies[name] = deque(maxlen=self.latency_samples)
+            series.append(seconds)
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self.lock:
+            self.gauges[name] = value
+
+    def timer(self, name: str) -> "_Timer":
+        """`with metrics.timer("page_load"):` records the block duration"""
+        return _Timer(self, name)
+
+    def count(self, name: str) -> int:
+        with self.lock:
+            return self.counters.get(name, 0)
+
+    def gauge(self, name: str, default: Optional[float] = None) -> Optional[float]:
+        with self.lock:
+            return self.gauges.get(name, default)
+
+    def per_minute(self, name: str) -> float:
+        """Event rate over the recent window (or since reset, if shorter)"""
+        now = time.monotonic()
+        with self.lock:
+            series = self.events.get(name)
+            total = sum(amount for stamp, amount in series if stamp >= now - self.rate_window) if series else 0
+        span = min(now - self.started, self.rate_window)
+        return total * 60 / span if span > 1 else 0.0
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        with self.lock:
+            series = self.latencies.get(name)
+            values = sorted(series) if series else []
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+    def ratio(self, numerator: str, denominator: str) -> float:
+        with self.lock:
+            total = self.counters.get(denominator, 0)
+            return self.counters.get(numerator, 0) / total if total else 0.0
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry: MetricsRegistry, name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+
+
+# Process-wide registry shared by the scrapers and the GUI panel
+metrics = MetricsRegistry()
@@ -0,0 +1,213 @@
+import os
+import re
+import zlib
+import pickle
+import logging
+import argparse
+from collections import defaultdict
+from typing import Optional, Dict, List, Any, Tuple, Hashable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from text_normalizer import normalize_text as normalize_persian
+
+# تنظیمات تشخیص تکراری تقریبی
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+SHINGLE_SIZE = 4
+DESCRIPTION_CHARS = 1500
+INDEX_FILE = "near_duplicates_index.pkl"
+
+# Column names used by the different scrapers for the same fields
+FIELD_ALIASES = {
+    'title': ["Title", "Job Title", "job_title", "عنوان شغل"],
+    'company': ["Company", "company", "شرکت"],
+    'description': ["Job Description", "description"],
+}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_MASK_64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _pick(record: Dict[Hashable, Any], field: str) -> str:
+    """Return the first non-empty alias of `field` in a scraped record"""
+    for key in FIELD_ALIASES[field]:
+        value = record.get(key)
+        if not pd.isna(value) and str(value).strip() not in ("", "N/A"):
+            return str(value)
+    return ""
+
+
+def normalize_text(text: str) -> str:
+    """Canonical dedup form so shingles ignore spelling variants and formatting"""
+    return _WHITESPACE_RE.sub(" ", normalize_persian(text, for_key=True)).strip()
+
+
+def record_shingles(record: Dict[Hashable, Any], k: int = SHINGLE_SIZE) -> np.ndarray:
+    """Character k-gram hashes over title, company and the start of the description"""
+    parts = [_pick(record, 'title'), _pick(record, 'company'),
+             _pick(record, 'description')[:DESCRIPTION_CHARS]]
+    text = normalize_text(" | ".join(part for part in parts if part))
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    if len(text) <= k:
+        grams = {text}
+    else:
+        grams = {text[i:i + k] for i in range(len(text) - k + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams),
+                       dtype=np.uint64, count=len(grams))
+
+
+def choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) so the LSH S-curve crosses 50% near `threshold`"""
+    best = (num_perm, 1)
+    best_error = float('inf')
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """Vectorized MinHash using multiply-shift hashing over 64-bit words"""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        high = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        low = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.a = (high << np.uint64(32)) | low | np.uint64(1)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64) << np.uint64(32)
+        self.num_perm = num_perm
+
+    def signature(self, shingles: np.ndarray) -> np.ndarray:
+        if shingles.size == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        with np.errstate(over='ignore'):
+            hashed = (shingles[:, None] * self.a[None, :] + self.b[None, :]) & _MASK_64
+        return (hashed >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index that finds reposted jobs in sub-linear time"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        self.buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        self.signatures: List[np.ndarray] = []
+        self.keys: List[Hashable] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def signature(self, record: Dict[Hashable, Any]) -> np.ndarray:
+        return self.hasher.signature(record_shingles(record))
+
+    def add(self, record: Dict[Hashable, Any], key: Optional[Hashable] = None,
+            signature: Optional[np.ndarray] = None) -> int:
+        """Index a record, return its position in the index"""
+        if signature is None:
+            signature = self.signature(record)
+        position = len(self.keys)
+        for band, band_key in zip(self.buckets, self._band_keys(signature)):
+            band[band_key].append(position)
+        self.signatures.append(signature)
+        self.keys.append(key if key is not None else position)
+        return position
+
+    def query(self, record: Dict[Hashable, Any],
+              signature: Optional[np.ndarray] = None) -> List[Tuple[Hashable, float]]:
+        """Return (key, estimated Jaccard) for indexed records above the threshold"""
+        if signature is None:
+            signature = self.signature(record)
+        candidates = set()
+        for band, band_key in zip(self.buckets, self._band_keys(signature)):
+            candidates.update(band.get(band_key, ()))
+
+        matches = []
+        for position in candidates:
+            similarity = float(np.mean(self.signatures[position] == signature))
+            if similarity >= self.threshold:
+                matches.append((self.keys[position], similarity))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def add_records(self, records: Iterable[Dict[Hashable, Any]], key_field: Optional[str] = None) -> None:
+        for record in records:
+            self.add(record, record.get(key_field) if key_field else None)
+
+    def save(self, path: str = INDEX_FILE) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE) -> Optional['NearDuplicateIndex']:
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def dedupe_dataframe(df: pd.DataFrame, threshold: float = DEFAULT_THRESHOLD,
+                     index: Optional[NearDuplicateIndex] = None) -> pd.DataFrame:
+    """Add `duplicate_of`/`similarity` columns; the first posting of each cluster is kept as original"""
+    if index is None:
+        index = NearDuplicateIndex(threshold)
+    duplicate_of: List[Any] = [None] * len(df)
+    similarity: List[Optional[float]] = [None] * len(df)
+
+    for position, record in enumerate(df.to_dict('records')):
+        signature = index.signature(record)
+        matches = index.query(record, signature)
+        if matches:
+            duplicate_of[position], similarity[position] = matches[0]
+        else:
+            index.add(record, df.index[position], signature)
+
+    result = df.copy()
+    result["duplicate_of"] = duplicate_of
+    result["similarity"] = similarity
+    return result
+
+
+def dedupe_workbook(input_file: str, output_file: str, threshold: float = DEFAULT_THRESHOLD,
+                    keep_duplicates: bool = False) -> Tuple[int, int]:
+    """Bulk near-duplicate pass over an existing workbook, return (rows, duplicates)"""
+    df = pd.read_excel(input_file)
+    marked = dedupe_dataframe(df, threshold)
+    duplicates = int(marked["duplicate_of"].notna().sum())
+    if keep_duplicates:
+        # Report rows by their Excel row number (header is row 1)
+        marked["duplicate_of"] = marked["duplicate_of"].map(lambda v: None if v is None else v + 2)
+        marked.to_excel(output_file, index=False, engine='openpyxl')
+    else:
+        marked[marked["duplicate_of"].isna()].drop(columns=["duplicate_of", "similarity"]) \
+            .to_excel(output_file, index=False, engine='openpyxl')
+    return len(df), duplicates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Near-duplicate pass over a scraped workbook")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--mark-only", action="store_true",
+                        help="Keep every row and add duplicate_of/similarity columns")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    rows, duplicates = dedupe_workbook(args.input_file, args.output_file, args.threshold, args.mark_only)
+    logging.info(f"{duplicates} near-duplicates found in {rows} rows -> {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
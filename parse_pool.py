@@ -0,0 +1,120 @@
+import os
+import logging
+from queue import Queue, Full
+from threading import Thread, Lock, Event
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Callable, Iterable, Iterator, Tuple, Any
+
+# Leave one core for the browser and the I/O threads
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+DEFAULT_PIPELINE_DEPTH = 4
+
+
+class ParsePool:
+    """Process pool for the CPU-bound HTML parsing stage
+
+    Fetchers hand over raw page bytes; the pure parsers in job_parser run in worker
+    processes so lxml work never holds the GIL of the threads driving the browser.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor
+
+    def submit(self, parser: Callable[..., Any], page: bytes, *args: Any) -> Future:
+        """Queue `parser(page, *args)` on a worker process"""
+        try:
+            return self._executor().submit(parser, page, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # A crashed or shut-down pool should not stop the scrape: parse inline instead
+            logging.warning(f"Parse pool unavailable ({e}), parsing in-process")
+            with self.lock:
+                self.executor = None
+            future: Future = Future()
+            try:
+                future.set_result(parser(page, *args))
+            except Exception as parse_error:
+                future.set_exception(parse_error)
+            return future
+
+    def parse(self, parser: Callable[..., Any], page: bytes, *args: Any) -> Any:
+        """Blocking convenience wrapper around `submit`"""
+        return self.submit(parser, page, *args).result()
+
+    def close(self) -> None:
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+
+_shared_pool: Optional[ParsePool] = None
+_shared_lock = Lock()
+
+
+def get_pool() -> ParsePool:
+    """Process-wide parse pool shared by every scraper in this process"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ParsePool()
+        return _shared_pool
+
+
+def pipelined(urls: Iterable[str], fetch: Callable[[str], bytes],
+              parse: Callable[[bytes, str], Future],
+              depth: int = DEFAULT_PIPELINE_DEPTH) -> Iterator[Tuple[str, Any, Optional[Exception]]]:
+    """Fetch on an I/O thread while earlier pages are parsed; yields (url, result, error) in input order
+
+    At most `depth` fetched pages wait for parsing, which bounds memory and keeps the
+    fetcher from running far ahead of the consumer. Request spacing is left to `fetch`.
+    """
+    handoff: Queue = Queue(maxsize=depth)
+    stopped = Event()
+    done = object()
+
+    def hand_over(item: Any) -> None:
+        while not stopped.is_set():
+            try:
+                handoff.put(item, timeout=0.5)
+                return
+            except Full:
+                continue
+
+    def fetcher() -> None:
+        for url in urls:
+            if stopped.is_set():
+                return
+            try:
+                hand_over((url, parse(fetch(url), url)))
+            except Exception as e:
+                hand_over((url, e))
+        hand_over(done)
+
+    thread = Thread(target=fetcher, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = handoff.get()
+            if item is done:
+                break
+            url, outcome = item
+            if isinstance(outcome, Exception):
+                yield url, None, outcome
+                continue
+            try:
+                yield url, outcome.result(), None
+            except Exception as e:
+                yield url, None, e
+    finally:
+        # Consumer finished or gave up early: let the fetcher exit before the browser is reused
+        stopped.set()
+        thread.join()
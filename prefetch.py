@@ -0,0 +1,135 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, List, Any, Callable, Tuple
+
+from metrics import metrics
+
+# تنظیمات پیش‌بارگذاری صفحات
+PREFETCH_DEPTH = 1           # listing pages loading ahead in background tabs (0 = off)
+
+
+class TabPrefetcher:
+    """Loads upcoming pages in background tabs of one Selenium Chrome
+
+    `prefetch(url)` starts the navigation in a spare tab and returns at once, so the page
+    downloads while the caller parses and saves the current one. `take(url)` switches to
+    that tab; the caller then waits for readiness as after a normal `driver.get`. The tab
+    that was current becomes the next spare. `before_request` runs before every request
+    (the politeness wait), so the request rate is the same as without prefetching.
+    """
+
+    def __init__(self, driver: Any, depth: int = PREFETCH_DEPTH,
+                 before_request: Callable[[], Any] = lambda: None):
+        self.driver = driver
+        self.depth = depth
+        self.before_request = before_request
+        self.spare: List[str] = []
+        self.pending: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # url -> (tab handle, started)
+
+    def _spare_tab(self) -> str:
+        if self.spare:
+            return self.spare.pop()
+        current = self.driver.current_window_handle
+        self.driver.switch_to.new_window("tab")
+        handle = self.driver.current_window_handle
+        self.driver.switch_to.window(current)
+        return handle
+
+    def wants(self) -> bool:
+        return len(self.pending) < self.depth
+
+    def prefetch(self, url: str) -> None:
+        """Start loading `url` in a background tab without waiting for it"""
+        if url in self.pending or not self.wants():
+            return
+        handle = self._spare_tab()
+        self.before_request()
+        current = self.driver.current_window_handle
+        self.driver.switch_to.window(handle)
+        try:
+            # A script navigation returns immediately, unlike driver.get
+            self.driver.execute_script("window.location.href = arguments[0];", url)
+        finally:
+            self.driver.switch_to.window(current)
+        self.pending[url] = (handle, time.perf_counter())
+        metrics.inc("prefetches")
+
+    def take(self, url: str) -> Optional[float]:
+        """Switch to the tab prefetching `url`; returns when its request started, None if not prefetched"""
+        if url not in self.pending:
+            return None
+        handle, started = self.pending.pop(url)
+        self.spare.append(self.driver.current_window_handle)
+        self.driver.switch_to.window(handle)
+        metrics.inc("prefetch_hits")
+        return started
+
+    def discard(self) -> None:
+        """Forget pages in flight (after a block, or when the plan changes); their tabs become spares"""
+        for handle, _ in self.pending.values():
+            self.spare.append(handle)
+        self.pending.clear()
+
+    def close(self) -> None:
+        """Close the extra tabs, keeping the current one"""
+        self.discard()
+        current = self.driver.current_window_handle
+        for handle in self.spare:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception as e:
+                logging.debug(f"Could not close prefetch tab: {e}")
+        self.spare = []
+        self.driver.switch_to.window(current)
+
+
+class PagePrefetcher:
+    """Playwright counterpart: upcoming pages load in extra pages of the same context
+
+    `prefetch(url)` returns once the response headers arrived (`wait_until="commit"`),
+    so the status code is known while the body keeps loading in the background.
+    """
+
+    def __init__(self, context: Any, depth: int = PREFETCH_DEPTH,
+                 before_request: Callable[[], Any] = lambda: None):
+        self.context = context
+        self.depth = depth
+        self.before_request = before_request
+        self.spare: List[Any] = []
+        self.pending: Dict[str, Tuple[Any, Any, float]] = OrderedDict()  # url -> (page, response, started)
+
+    def wants(self) -> bool:
+        return len(self.pending) < self.depth
+
+    def prefetch(self, url: str, timeout: float = 30000) -> None:
+        if url in self.pending or not self.wants():
+            return
+        page = self.spare.pop() if self.spare else self.context.new_page()
+        self.before_request()
+        started = time.monotonic()
+        try:
+            response = page.goto(url, timeout=timeout, wait_until="commit")
+        except Exception as e:
+            logging.debug(f"Prefetch of {url} failed: {e}")
+            self.spare.append(page)
+            return
+        self.pending[url] = (page, response, started)
+        metrics.inc("prefetches")
+
+    def take(self, url: str) -> Optional[Tuple[Any, Any, float]]:
+        """(page, response, request start) for a prefetched `url`, or None"""
+        entry = self.pending.pop(url, None)
+        if entry is not None:
+            metrics.inc("prefetch_hits")
+        return entry
+
+    def release(self, page: Any) -> None:
+        """Hand back a page that is no longer needed, for the next prefetch"""
+        self.spare.append(page)
+
+    def discard(self) -> None:
+        for page, _, _ in self.pending.values():
+            self.spare.append(page)
+        self.pending.clear()
@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional, List, Tuple, Callable, Iterator, Any
+
+# تنظیمات پروفایلینگ
+PROFILE_DIR = "profiles"
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+TOP_N = 25
+TRACEMALLOC_FRAMES = 1
+
+FrameKey = Tuple[str, int, str]  # (filename, first line, function)
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread at a fixed interval from a background thread
+
+    Sampling is wall-clock: time spent blocked in WebDriver calls or file I/O shows up
+    as samples in the waiting function, which is exactly what a slow run needs to show.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = 0
+        self.self_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[FrameKey] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            self.samples += 1
+            self.self_counts[stack[0]] += 1
+            for key in set(stack):
+                self.total_counts[key] += 1
+            self.stacks[";".join(name for _, _, name in reversed(stack))] += 1
+
+
+def _describe(key: FrameKey) -> str:
+    filename, line, name = key
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def write_report(label: str, profiler: SamplingProfiler, elapsed: float,
+                 memory_stats: List[tracemalloc.StatisticDiff], peak_bytes: int,
+                 report_dir: str = PROFILE_DIR, top_n: int = TOP_N) -> str:
+    """Write the ranked CPU/allocation report plus a folded-stacks file for flame graphs"""
+    os.makedirs(report_dir, exist_ok=True)
+    stem = os.path.join(report_dir, f"{label}_{time.strftime('%Y%m%d_%H%M%S')}")
+    samples = max(profiler.samples, 1)
+
+    lines = [f"Profile of {label}: {elapsed:.1f}s wall time, {profiler.samples} samples "
+             f"every {profiler.interval * 1000:.0f}ms", ""]
+    lines.append(f"Top {top_n} functions by inclusive time (function and everything it calls):")
+    for key, count in profiler.total_counts.most_common(top_n):
+        lines.append(f"  {count / samples:6.1%}  {_describe(key)}")
+    lines.append("")
+    lines.append(f"Top {top_n} functions by self time (the frame that was running):")
+    for key, count in profiler.self_counts.most_common(top_n):
+        lines.append(f"  {count / samples:6.1%}  {_describe(key)}")
+    lines.append("")
+    lines.append(f"Top {top_n} allocation sites still held at the end (peak traced: "
+                 f"{peak_bytes / 1024 / 1024:.1f} MB):")
+    for stat in memory_stats[:top_n]:
+        frame = stat.traceback[0]
+        lines.append(f"  {stat.size_diff / 1024:10.1f} KB  {stat.count_diff:+8d} blocks  "
+                     f"{os.path.basename(frame.filename)}:{frame.lineno}")
+
+    report_path = f"{stem}.txt"
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    # speedscope / flamegraph.pl input
+    with open(f"{stem}.folded", "w", encoding="utf-8") as f:
+        for stack, count in profiler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return report_path
+
+
+@contextmanager
+def profiled(label: str, enabled: bool = True, report_dir: str = PROFILE_DIR,
+             interval: float = SAMPLE_INTERVAL) -> Iterator[None]:
+    """Profile the enclosed block on the calling thread and write a hot-spot report when it ends"""
+    if not enabled:
+        yield
+        return
+
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.take_snapshot()
+    profiler = SamplingProfiler(interval=interval)
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        elapsed = time.perf_counter() - started
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        try:
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            memory_stats = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+            report_path = write_report(label, profiler, elapsed, memory_stats, peak, report_dir)
+            logging.info(f"Profile report written to {report_path}")
+        except Exception as e:
+            logging.error(f"Error writing profile report: {e}")
+
+
+def run_profiled(label: str, func: Callable[..., Any], *args: Any,
+                 enabled: bool = True, **kwargs: Any) -> Any:
+    """Call `func(*args, **kwargs)` under `profiled`; convenient as a Thread target"""
+    with profiled(label, enabled):
+        return func(*args, **kwargs)
@@ -0,0 +1,42 @@
+import time
+import random
+from threading import Lock, Event
+from typing import Optional
+
+
+class RateLimiter:
+    """Jittered minimum spacing between request starts, shared by every thread using it
+
+    The politeness delay is measured from the previous request, so time spent loading,
+    parsing and saving a page counts toward it instead of being added on top.
+    """
+
+    def __init__(self, min_interval: float, max_interval: Optional[float] = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval if max_interval is not None else min_interval
+        self.lock = Lock()
+        self.next_allowed = 0.0
+        self.last_interval = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every user of this limiter for at least `seconds` (global backoff)"""
+        with self.lock:
+            self.next_allowed = max(self.next_allowed, time.monotonic() + seconds)
+
+    def wait(self, cancel: Optional[Event] = None) -> float:
+        """Reserve the next request slot; returns the seconds actually slept
+
+        A long backoff pause can be cut short by setting `cancel` (e.g. the stop button).
+        """
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_allowed)
+            self.last_interval = random.uniform(self.min_interval, self.max_interval)
+            self.next_allowed = start + self.last_interval
+        delay = start - now
+        if delay > 0:
+            if cancel is not None:
+                cancel.wait(delay)
+            else:
+                time.sleep(delay)
+        return delay
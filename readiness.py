@@ -0,0 +1,86 @@
+from typing import Optional, Sequence
+
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# The page is usable once its DOM is parsed; stylesheets, fonts and trackers can keep loading
+PAGE_LOAD_STRATEGY = "eager"
+NETWORK_QUIET_SECONDS = 0.5
+
+# Resolves with the first selector that matches, reacting to DOM mutations instead of polling.
+# With quietMs > 0 it additionally waits until no new network resource has started for quietMs.
+_READY_SCRIPT = """
+const [selectors, timeoutMs, quietMs, done] = arguments;
+let lastActivity = performance.now();
+let observer = null, perfObserver = null, timer = null, quietTimer = null, finished = false;
+
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    if (perfObserver) perfObserver.disconnect();
+    clearTimeout(timer);
+    clearTimeout(quietTimer);
+    done(result);
+}
+function matched() {
+    for (const selector of selectors) {
+        if (document.querySelector(selector)) return selector;
+    }
+    return null;
+}
+function check() {
+    const selector = matched();
+    if (!selector) return;
+    const idleFor = performance.now() - lastActivity;
+    if (idleFor >= quietMs) { finish(selector); return; }
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(check, quietMs - idleFor);
+}
+
+if (quietMs > 0 && window.PerformanceObserver) {
+    perfObserver = new PerformanceObserver(() => { lastActivity = performance.now(); check(); });
+    perfObserver.observe({type: 'resource'});
+}
+observer = new MutationObserver(check);
+observer.observe(document.documentElement, {childList: true, subtree: true});
+timer = setTimeout(() => finish(null), timeoutMs);
+check();
+"""
+
+
+def use_eager_loading(options: Options) -> Options:
+    """`driver.get` returns at DOMContentLoaded instead of the full load event"""
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    return options
+
+
+def wait_ready(driver, selectors: Sequence[str], timeout: float = 20,
+               network_quiet: float = 0) -> str:
+    """Block until any of `selectors` exists (and the network is quiet); return the match
+
+    Raises TimeoutException like WebDriverWait, so existing retry handling keeps working.
+    """
+    driver.set_script_timeout(timeout + 5)
+    matched: Optional[str] = driver.execute_async_script(
+        _READY_SCRIPT, list(selectors), int(timeout * 1000), int(network_quiet * 1000))
+    if not matched:
+        raise TimeoutException(f"None of {list(selectors)} appeared within {timeout}s")
+    return matched
+
+
+def wait_network_idle(driver, quiet: float = NETWORK_QUIET_SECONDS, timeout: float = 5) -> bool:
+    """Wait for lazy-loaded content after a scroll; False if the network never settled"""
+    try:
+        wait_ready(driver, ["body"], timeout, quiet)
+        return True
+    except (TimeoutException, WebDriverException):
+        return False
+
+
+def wait_navigated(driver, old_element: WebElement, timeout: float = 20) -> None:
+    """Wait until a click has replaced the current document (its old nodes go stale)"""
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(EC.staleness_of(old_element))
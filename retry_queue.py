@@ -0,0 +1,150 @@
+import time
+import random
+import sqlite3
+import logging
+from threading import Thread, Event, Lock
+from typing import Optional, Dict, List, Callable, NamedTuple
+
+# تنظیمات صف تلاش مجدد
+RETRY_DB = "retry_queue.sqlite"
+BASE_DELAY = 30.0        # seconds before the first retry
+MAX_DELAY = 30 * 60.0    # backoff cap
+MAX_ATTEMPTS = 6         # retries before an item is given up
+POLL_SECONDS = 5.0
+
+
+class RetryItem(NamedTuple):
+    url: str
+    output_file: str
+    source: str
+    attempts: int
+
+
+def backoff_delay(attempts: int, base: float = BASE_DELAY, cap: float = MAX_DELAY) -> float:
+    """Exponential backoff with equal jitter: half fixed, half random"""
+    delay = min(cap, base * 2 ** attempts)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryQueue:
+    """Persistent queue of detail pages whose extraction failed, keyed by (url, output file)"""
+
+    def __init__(self, db_path: str = RETRY_DB, max_attempts: int = MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.lock = Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS retries (
+                url TEXT NOT NULL,
+                output_file TEXT NOT NULL,
+                source TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                PRIMARY KEY (url, output_file)
+            );
+            CREATE INDEX IF NOT EXISTS idx_retries_due ON retries(status, source, next_attempt_at);
+        """)
+
+    def push(self, url: str, output_file: str, source: str, error: str = "") -> None:
+        """Queue a failed extraction; the first retry waits one backoff step"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO retries (url, output_file, source, next_attempt_at, last_error) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(url, output_file) DO UPDATE SET "
+                "status = 'pending', last_error = excluded.last_error",
+                (url, output_file, source, time.time() + backoff_delay(0), error)
+            )
+
+    def due(self, source: str, limit: int = 10) -> List[RetryItem]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url, output_file, source, attempts FROM retries "
+                "WHERE status = 'pending' AND source = ? AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT ?", (source, time.time(), limit)).fetchall()
+        return [RetryItem(*row) for row in rows]
+
+    def next_due_in(self, source: str) -> Optional[float]:
+        """Seconds until the next pending item is due, None when nothing is pending"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(next_attempt_at) FROM retries WHERE status = 'pending' AND source = ?",
+                (source,)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def succeeded(self, item: RetryItem) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM retries WHERE url = ? AND output_file = ?",
+                              (item.url, item.output_file))
+
+    def failed(self, item: RetryItem, error: str) -> bool:
+        """Schedule the next attempt; returns False once the item is given up"""
+        attempts = item.attempts + 1
+        give_up = attempts >= self.max_attempts
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE retries SET attempts = ?, next_attempt_at = ?, last_error = ?, status = ? "
+                "WHERE url = ? AND output_file = ?",
+                (attempts, time.time() + backoff_delay(attempts), error,
+                 "gave_up" if give_up else "pending", item.url, item.output_file)
+            )
+        return not give_up
+
+    def counts(self, source: str) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM retries WHERE source = ? GROUP BY status", (source,)))
+
+
+class RetryWorker(Thread):
+    """Drains one source's retry queue in the background with its own browser
+
+    `extract(url)` returns the job data or raises; `on_success(item, data)` replaces the
+    placeholder row. The worker exits once nothing is pending, calling `on_exit` so the
+    owner can close the browser it handed over.
+    """
+
+    def __init__(self, queue: RetryQueue, source: str,
+                 extract: Callable[[str], Dict[str, str]],
+                 on_success: Callable[[RetryItem, Dict[str, str]], None],
+                 on_exit: Optional[Callable[[], None]] = None,
+                 log: Callable[[str], None] = logging.info,
+                 poll_seconds: float = POLL_SECONDS):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.source = source
+        self.extract = extract
+        self.on_success = on_success
+        self.on_exit = on_exit
+        self.log = log
+        self.poll_seconds = poll_seconds
+        self.stopped = Event()
+        self.keep_alive = Event()  # set while the main pass may still push new items
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def run(self) -> None:
+        try:
+            while not self.stopped.is_set():
+                for item in self.queue.due(self.source):
+                    if self.stopped.is_set():
+                        return
+                    try:
+                        data = self.extract(item.url)
+                        self.on_success(item, data)
+                        self.queue.succeeded(item)
+                        self.log(f"🔁 Retry succeeded for {item.url} (attempt {item.attempts + 1})")
+                    except Exception as e:
+                        if not self.queue.failed(item, str(e)):
+                            self.log(f"❌ Giving up on {item.url} after {item.attempts + 1} retries: {e}")
+
+                wait = self.queue.next_due_in(self.source)
+                if wait is None and not self.keep_alive.is_set():
+                    return
+                self.stopped.wait(min(wait if wait is not None else self.poll_seconds, self.poll_seconds * 12))
+        finally:
+            if self.on_exit is not None:
+                self.on_exit()
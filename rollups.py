@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import logging
+import argparse
+from collections import Counter
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Iterable, Tuple
+
+# تنظیمات تجمیع آماری
+ROLLUP_DB = "jobs_rollups.sqlite"
+
+# Scraper column -> rollup dimension
+DIMENSION_COLUMNS = {
+    "Category": "category",
+    "Location": "location", "location": "location", "محل کار": "location",
+    "Cooperation Type": "cooperation_type",
+    "Contract Type": "contract_type",
+    "Company": "company", "company": "company", "شرکت": "company",
+    "status": "status", "وضعیت": "status",
+}
+URL_COLUMNS = ["URL", "Link", "job_link", "لینک شغل"]
+DATE_COLUMNS = ["extraction_date", "تاریخ استخراج"]
+# JobVision writes the urgent flag in English or Persian depending on the script
+STATUS_VALUES = {"Urgent": "urgent", "فوری": "urgent", "Normal": "normal", "معمولی": "normal"}
+
+
+def _record_day(record: Dict[str, Any], default_day: str) -> str:
+    for column in DATE_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, str) and len(value) >= 10:
+            return value[:10]
+    return default_day
+
+
+class RollupStore:
+    """Pre-aggregated job counts per day, source and dimension value, updated as records are saved"""
+
+    def __init__(self, db_path: str = ROLLUP_DB):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS rollups (
+                day TEXT NOT NULL,
+                source TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (dimension, day, source, value)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS rollup_seen (
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (source, url)
+            ) WITHOUT ROWID;
+        """)
+
+    def add_records(self, records: Iterable[Dict[str, Any]], source: str,
+                    day: Optional[str] = None) -> int:
+        """Fold newly saved records into the rollups; records already counted (same URL) are skipped"""
+        default_day = day or datetime.now().strftime('%Y-%m-%d')
+        counts: Counter = Counter()
+        added = 0
+        with self.conn:
+            for record in records:
+                url = next((record[c] for c in URL_COLUMNS if record.get(c)), None)
+                if url is not None:
+                    cursor = self.conn.execute(
+                        "INSERT OR IGNORE INTO rollup_seen (source, url) VALUES (?, ?)", (source, str(url)))
+                    if cursor.rowcount == 0:
+                        continue
+                added += 1
+                record_day = _record_day(record, default_day)
+                counts[(record_day, "total", "all")] += 1
+                for column, dimension in DIMENSION_COLUMNS.items():
+                    value = record.get(column)
+                    if value is None or value != value or str(value).strip() in ("", "N/A"):
+                        continue
+                    value = str(value).strip()
+                    if dimension == "status":
+                        value = STATUS_VALUES.get(value, value)
+                    counts[(record_day, dimension, value)] += 1
+
+            self.conn.executemany(
+                """INSERT INTO rollups (day, source, dimension, value, count) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (dimension, day, source, value) DO UPDATE SET count = count + excluded.count""",
+                [(d, source, dimension, value, count) for (d, dimension, value), count in counts.items()]
+            )
+        return added
+
+    def counts(self, dimension: str, source: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None, by_day: bool = False, limit: int = 50) -> List[Tuple]:
+        """Dashboard query: (value, count) or (day, value, count) rows, largest first"""
+        conditions, params = ["dimension = ?"], [dimension]
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+        if start is not None:
+            conditions.append("day >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("day <= ?")
+            params.append(end)
+        columns = "day, value" if by_day else "value"
+        order = "day, total DESC" if by_day else "total DESC"
+        sql = (f"SELECT {columns}, SUM(count) AS total FROM rollups WHERE {' AND '.join(conditions)} "
+               f"GROUP BY {columns} ORDER BY {order} LIMIT ?")
+        return self.conn.execute(sql, params + [limit]).fetchall()
+
+    def dimensions(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT dimension FROM rollups ORDER BY 1")]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def backfill(store: RollupStore, path: str, source: str) -> int:
+    """Fold an existing workbook into the rollups (already counted URLs are ignored)"""
+    import pandas as pd
+
+    df = pd.read_excel(path)
+    day = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d')
+    return store.add_records(df.to_dict('records'), source, day)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Job count rollups for dashboards")
+    parser.add_argument("--db", default=ROLLUP_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Fold existing workbooks into the rollups")
+    backfill_parser.add_argument("source", help="Source label, e.g. jobinja or jobvision")
+    backfill_parser.add_argument("files", nargs="+")
+
+    report_parser = subparsers.add_parser("report", help="Print counts for one dimension")
+    report_parser.add_argument("dimension", help="e.g. category, location, cooperation_type, status, total")
+    report_parser.add_argument("--source")
+    report_parser.add_argument("--start", help="YYYY-MM-DD")
+    report_parser.add_argument("--end", help="YYYY-MM-DD")
+    report_parser.add_argument("--by-day", action="store_true")
+    report_parser.add_argument("--limit", type=int, default=50)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = RollupStore(args.db)
+    try:
+        if args.command == "backfill":
+            for path in args.files:
+                logging.info(f"{path}: {backfill(store, path, args.source)} records added")
+        else:
+            for row in store.counts(args.dimension, args.source, args.start, args.end,
+                                    args.by_day, args.limit):
+                print("\t".join(str(column) for column in row))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,618 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import argparse
+from collections import deque
+from abc import ABC, abstractmethod
+from datetime import datetime
+from threading import Thread, Event, Lock, Condition
+from typing import Optional, Dict, List, Any, Tuple, Callable, Sequence, NamedTuple, Deque
+
+import pandas as pd
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from job_parser import parse_listing, parse_job_detail, parse_jobvision_listing
+from parse_pool import ParsePool, DEFAULT_WORKERS
+from readiness import use_eager_loading, wait_ready
+from rate_limiter import RateLimiter
+from rollups import RollupStore, URL_COLUMNS
+from search_index import SearchIndex
+from metrics import metrics
+from proxy_pool import ProxyPool, Proxy, selenium_proxy_args
+from block_detector import BlockDetector, BlockPolicy, OK, BLOCKING, ROTATE, STOP
+from browser_memory import MemorySupervisor, selenium_browser_pid
+from browser_profile import BrowserProfile
+
+# تنظیمات اجراکننده چندمنبعی
+SINK_DB = "jobs_sink.sqlite"
+DEFAULT_BROWSERS = 2
+BROWSER_MEMORY_MB = 3000      # RSS budget shared by all pooled Chromes; each is recycled past its share
+PAGE_TIMEOUT = 30
+MAX_CONSECUTIVE_FAILURES = 3  # a listing source stops after this many failed pages in a row
+DRIVER_PATH = "C:/Users/ASUS/Desktop/chromedriver-win64/chromedriver.exe"
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/114.0.5735.199 Safari/537.36")
+
+JOBINJA_LISTING_URL = ("https://jobinja.ir/jobs/latest-job-post-%D8%A7%D8%B3%D8%AA%D8%AE%D8%AF%D8%A7%D9%85%DB%8C-"
+                       "%D8%AC%D8%AF%DB%8C%D8%AF?&page={page}&sort_by=published_at_desc")
+JOBVISION_LISTING_URL = "https://jobvision.ir/jobs?page={page}&sort=0"
+
+
+class BlockedPage(Exception):
+    """A fetch landed on a block, captcha or rate-limit page"""
+
+    def __init__(self, verdict: str, action: str):
+        super().__init__(f"page is {verdict}")
+        self.verdict = verdict
+        self.action = action
+
+
+class Task(NamedTuple):
+    """One page to fetch; `args` follow the page bytes in the source's parser call"""
+    url: str
+    args: Tuple[Any, ...]
+
+
+class SourcePlugin(ABC):
+    """A site section the runner can crawl: which pages to fetch and how to parse them
+
+    Parsers must be module-level functions from job_parser so they can run in the
+    shared process pool. `next_task` and `handle` are called under the runner's lock.
+    """
+
+    name: str = ""
+    interval: Tuple[float, float] = (3, 7)   # politeness spacing between this source's requests
+    max_concurrency: int = 1                 # pages of this source in flight at once
+    ready_selectors: Sequence[str] = ("body",)
+    parser: Callable[..., List[Dict[str, Any]]]
+
+    def __init__(self):
+        self.exhausted = False
+
+    @abstractmethod
+    def next_task(self) -> Optional[Task]:
+        """Next page to fetch, None once there is nothing left"""
+
+    def handle(self, task: Task, records: List[Dict[str, Any]]) -> None:
+        """React to a parsed page (e.g. stop paging at an empty listing)"""
+
+    def failed(self, task: Task, error: Exception) -> None:
+        logging.error(f"[{self.name}] {task.url}: {error}")
+
+
+class ListingSource(SourcePlugin):
+    """Numbered listing pages, until an empty page, `max_pages` or repeated failures"""
+
+    def __init__(self, start_page: int = 1, max_pages: Optional[int] = None):
+        super().__init__()
+        self.page = start_page
+        self.last_page = start_page + max_pages - 1 if max_pages else None
+        self.failures = 0
+
+    def next_task(self) -> Optional[Task]:
+        if self.exhausted or (self.last_page is not None and self.page > self.last_page):
+            return None
+        page = self.page
+        self.page += 1
+        return self.task_for(page)
+
+    @abstractmethod
+    def task_for(self, page: int) -> Task:
+        """Task for one listing page"""
+
+    def handle(self, task: Task, records: List[Dict[str, Any]]) -> None:
+        self.failures = 0
+        if not records:
+            logging.info(f"[{self.name}] empty page {task.url}, end of listing")
+            self.exhausted = True
+
+    def failed(self, task: Task, error: Exception) -> None:
+        super().failed(task, error)
+        self.failures += 1
+        if self.failures >= MAX_CONSECUTIVE_FAILURES:
+            logging.warning(f"[{self.name}] {self.failures} failed pages in a row, stopping this source")
+            self.exhausted = True
+
+
+class JobinjaListingSource(ListingSource):
+    """Latest-jobs listing, like `f_new7.JobScraper.scrape_all_pages`"""
+
+    name = "jobinja_listing"
+    interval = (3, 7)
+    ready_selectors = (".o-listView__itemInfo", ".paginator")
+    parser = staticmethod(parse_listing)
+
+    def task_for(self, page: int) -> Task:
+        url = JOBINJA_LISTING_URL.format(page=page)
+        return Task(url, (url,))
+
+
+class JobVisionListingSource(ListingSource):
+    """JobVision listing, like `jobvision1.JobVisionScraper.run`"""
+
+    name = "jobvision"
+    interval = (5, 12)
+    ready_selectors = ("job-card",)
+    parser = staticmethod(parse_jobvision_listing)
+
+    def task_for(self, page: int) -> Task:
+        return Task(JOBVISION_LISTING_URL.format(page=page), (page,))
+
+
+class JobinjaDetailSource(SourcePlugin):
+    """Detail pages for the links of an input workbook, like `Updater_table` and `table2`"""
+
+    name = "jobinja_detail"
+    interval = (2, 5)
+    max_concurrency = 2
+    ready_selectors = ("h1",)
+    parser = staticmethod(parse_job_detail)
+
+    def __init__(self, links: Sequence[str], skip: Sequence[str] = ()):
+        super().__init__()
+        known = set(skip)
+        self.links = iter([link for link in dict.fromkeys(links) if link not in known])
+
+    def next_task(self) -> Optional[Task]:
+        link = next(self.links, None)
+        return Task(link, (link,)) if link else None
+
+
+def _record_key(record: Dict[str, Any]) -> str:
+    for column in URL_COLUMNS:
+        value = record.get(column)
+        if value and value != "N/A":
+            return str(value)
+    return json.dumps(record, ensure_ascii=False, sort_keys=True)
+
+
+class CommonSink:
+    """One SQLite table for every source, keyed by (source, job URL), plus the shared indexes"""
+
+    def __init__(self, db_path: str = SINK_DB):
+        self.lock = Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                data TEXT NOT NULL,
+                scraped_at TEXT NOT NULL,
+                PRIMARY KEY (source, url)
+            );
+        """)
+        self.rollups = RollupStore()
+        self.search_index = SearchIndex()
+
+    def write(self, source: str, records: Sequence[Dict[str, Any]]) -> int:
+        """Store a page's records; returns how many were new"""
+        if not records:
+            return 0
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(source, _record_key(record), json.dumps(record, ensure_ascii=False, default=str), now)
+                for record in records]
+        with self.lock:
+            with self.conn:
+                before = self.conn.total_changes
+                self.conn.executemany("INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?)", rows)
+                added = self.conn.total_changes - before
+            # The index stores share their connections too, so they are written under the same lock
+            if added:
+                self.rollups.add_records(records, source)
+                self.search_index.add_records(records, source)
+        return added
+
+    def urls(self, source: str) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT url FROM jobs WHERE source = ?", (source,))]
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.conn.execute("SELECT source, COUNT(*) FROM jobs GROUP BY source"))
+
+    def export(self, path: str, source: Optional[str] = None) -> int:
+        """Write stored records to Excel, one sheet per source"""
+        with self.lock:
+            query = "SELECT source, data FROM jobs" + (" WHERE source = ?" if source else "") + " ORDER BY rowid"
+            rows = self.conn.execute(query, (source,) if source else ()).fetchall()
+        by_source: Dict[str, List[Dict[str, Any]]] = {}
+        for name, data in rows:
+            by_source.setdefault(name, []).append(json.loads(data))
+        with pd.ExcelWriter(path) as writer:
+            for name, records in by_source.items():
+                pd.DataFrame(records).to_excel(writer, sheet_name=name[:31], index=False)
+        return len(rows)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class BrowserPool:
+    """At most `max_browsers` Chromes shared by every source
+
+    A Chrome is recycled when its process tree outgrows its share of `memory_mb` or
+    leaks steadily, not after a fixed page count. With a proxy pool each Chrome is
+    launched through the healthiest proxy and is replaced as soon as that proxy gets
+    quarantined. Unless `persistent_profiles` is off, each Chrome runs on a warm
+    persistent profile that the next Chrome in the same slot reuses.
+    """
+
+    def __init__(self, max_browsers: int = DEFAULT_BROWSERS, driver_path: Optional[str] = DRIVER_PATH,
+                 headless: bool = False, memory_mb: float = BROWSER_MEMORY_MB,
+                 proxy_pool: Optional[ProxyPool] = None, persistent_profiles: bool = True):
+        self.max_browsers = max_browsers
+        self.driver_path = driver_path
+        self.headless = headless
+        self.memory_mb = memory_mb
+        self.proxy_pool = proxy_pool
+        self.persistent_profiles = persistent_profiles
+        self.idle: Deque[webdriver.Chrome] = deque()
+        self.supervisors: Dict[int, MemorySupervisor] = {}
+        self.proxies: Dict[int, Proxy] = {}
+        self.profiles: Dict[int, BrowserProfile] = {}
+        self.free_profiles: List[BrowserProfile] = []
+        self.created = 0
+        self.lock = Lock()
+        # Signalled whenever a browser goes idle or is quit, so waiters can take it or launch one
+        self.available = Condition(self.lock)
+
+    def proxy_for(self, driver: webdriver.Chrome) -> Optional[Proxy]:
+        return self.proxies.get(id(driver))
+
+    def _launch(self) -> webdriver.Chrome:
+        options = Options()
+        if self.headless:
+            options.add_argument("--headless=new")
+        proxy = self.proxy_pool.acquire(reserve=False) if self.proxy_pool else None
+        if proxy is not None:
+            for argument in selenium_proxy_args(proxy):
+                options.add_argument(argument)
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_argument(f"user-agent={USER_AGENT}")
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        use_eager_loading(options)
+        profile = None
+        if self.persistent_profiles:
+            with self.lock:
+                profile = self.free_profiles.pop() if self.free_profiles else None
+            profile = profile or BrowserProfile("runner")
+            profile.clean()
+            for argument in profile.selenium_args():
+                options.add_argument(argument)
+        try:
+            if self.driver_path and os.path.exists(self.driver_path):
+                driver = webdriver.Chrome(service=Service(executable_path=self.driver_path), options=options)
+            else:
+                driver = webdriver.Chrome(options=options)
+        except Exception:
+            if profile is not None:
+                with self.lock:
+                    self.free_profiles.append(profile)
+            raise
+        driver.set_page_load_timeout(PAGE_TIMEOUT)
+        if profile is not None:
+            self.profiles[id(driver)] = profile
+            if profile.needs_warmup():
+                profile.warm_selenium(driver)
+        if proxy is not None:
+            self.proxies[id(driver)] = proxy
+        return driver
+
+    def acquire(self) -> webdriver.Chrome:
+        """An idle browser, a new one while under budget, otherwise wait for one"""
+        with self.available:
+            while True:
+                if self.idle:
+                    return self.idle.popleft()
+                if self.created < self.max_browsers:
+                    self.created += 1
+                    break
+                self.available.wait()
+        try:
+            driver = self._launch()
+        except Exception:
+            with self.available:
+                self.created -= 1
+                self.available.notify()
+            raise
+        self.supervisors[id(driver)] = MemorySupervisor(max_rss_mb=self.memory_mb / self.max_browsers)
+        metrics.set_gauge("browsers", self.created)
+        return driver
+
+    def release(self, driver: webdriver.Chrome, broken: bool = False) -> None:
+        proxy = self.proxy_for(driver)
+        if proxy is not None and not self.proxy_pool.is_available(proxy):
+            broken = True  # relaunch through another proxy
+        reason = None if broken else self.supervisors[id(driver)].check(selenium_browser_pid(driver))
+        if reason:
+            logging.info(f"Recycling browser: {reason}")
+            metrics.inc("browser_recycles")
+        if broken or reason:
+            self._quit(driver)
+        else:
+            with self.available:
+                self.idle.append(driver)
+                self.available.notify()
+
+    def _quit(self, driver: webdriver.Chrome) -> None:
+        self.supervisors.pop(id(driver), None)
+        self.proxies.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        profile = self.profiles.pop(id(driver), None)
+        with self.available:
+            if profile is not None:
+                self.free_profiles.append(profile)  # the browser is gone, so the slot can be reused
+            self.created -= 1
+            self.available.notify()  # room for a waiter to launch a replacement
+        metrics.set_gauge("browsers", self.created)
+
+    def close(self) -> None:
+        with self.lock:
+            drivers = list(self.idle)
+            self.idle.clear()
+        for driver in drivers:
+            self._quit(driver)
+
+
+class Runner:
+    """Crawls several sources concurrently under one budget
+
+    * browsers: Chrome instances alive at once, shared by all sources
+    * connections: pages in flight at once (one worker thread each)
+    * cpu: parse worker processes
+    Each source keeps its own rate limit and concurrency cap; the next page always goes to
+    the source whose rate limit frees up first.
+    """
+
+    def __init__(self, sources: Sequence[SourcePlugin], sink: CommonSink,
+                 browsers: int = DEFAULT_BROWSERS, connections: Optional[int] = None,
+                 cpu: int = DEFAULT_WORKERS, driver_path: Optional[str] = DRIVER_PATH,
+                 headless: bool = False, proxy_pool: Optional[ProxyPool] = None,
+                 browser_memory_mb: float = BROWSER_MEMORY_MB, persistent_profiles: bool = True):
+        self.sources = list(sources)
+        self.sink = sink
+        self.connections = connections or browsers
+        self.proxy_pool = proxy_pool
+        self.browsers = BrowserPool(browsers, driver_path, headless, browser_memory_mb, proxy_pool,
+                                    persistent_profiles)
+        self.parse_pool = ParsePool(cpu)
+        self.limiters = {source.name: RateLimiter(*source.interval) for source in self.sources}
+        # A block pauses the whole source (every worker), not just the page that saw it
+        self.block_detector = BlockDetector()
+        self.block_policies = {source.name: BlockPolicy(self.limiters[source.name]) for source in self.sources}
+        self.retries: Dict[str, deque] = {source.name: deque() for source in self.sources}
+        self.in_flight = {source.name: 0 for source in self.sources}
+        self.condition = Condition()
+        self.stopped = Event()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        with self.condition:
+            self.condition.notify_all()
+
+    def _next_task(self) -> Optional[Tuple[SourcePlugin, Task]]:
+        """Claim a page from the source that may send soonest; None once every source is done"""
+        with self.condition:
+            while not self.stopped.is_set():
+                ready = [source for source in self.sources
+                         if (not source.exhausted or self.retries[source.name])
+                         and self.in_flight[source.name] < source.max_concurrency]
+                ready.sort(key=lambda source: self.limiters[source.name].next_allowed)
+                for source in ready:
+                    retries = self.retries[source.name]
+                    task = retries.popleft() if retries else source.next_task()
+                    if task is None:
+                        source.exhausted = True
+                        continue
+                    self.in_flight[source.name] += 1
+                    return source, task
+                if not any(self.in_flight.values()) and not any(self.retries.values()) \
+                        and all(source.exhausted for source in self.sources):
+                    return None
+                # Every remaining source is at its cap: wait for a page to finish
+                self.condition.wait(1.0)
+        return None
+
+    def _fetch(self, source: SourcePlugin, task: Task) -> bytes:
+        self.limiters[source.name].wait()
+        driver = self.browsers.acquire()
+        proxy = self.browsers.proxy_for(driver)
+        if proxy is not None:
+            self.proxy_pool.take(proxy)
+        broken = False
+        started = time.monotonic()
+        try:
+            with metrics.timer(f"{source.name}.page_load"):
+                driver.get(task.url)
+                try:
+                    wait_ready(driver, source.ready_selectors, PAGE_TIMEOUT)
+                except TimeoutException:
+                    verdict = self.block_detector.classify(driver.page_source)
+                    if verdict not in BLOCKING:
+                        raise
+                    if proxy is not None:
+                        self.proxy_pool.report(proxy, ok=False, blocked=True)
+                    action = self.block_policies[source.name].observe(verdict)
+                    broken = action == ROTATE  # fresh browser (and proxy) for the retry
+                    if broken:
+                        # The persistent profile would otherwise hand the flagged cookies to the next Chrome
+                        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                    raise BlockedPage(verdict, action)
+            if proxy is not None:
+                self.proxy_pool.report(proxy, ok=True, latency=time.monotonic() - started)
+            self.block_policies[source.name].observe(OK)
+            return driver.page_source.encode("utf-8")
+        except WebDriverException as e:
+            if proxy is not None:
+                self.proxy_pool.report(proxy, ok=False)
+            # Timeouts leave the browser usable; anything else may have killed it
+            broken = "timeout" not in type(e).__name__.lower()
+            raise
+        finally:
+            self.browsers.release(driver, broken)
+
+    def _worker(self) -> None:
+        while True:
+            claimed = self._next_task()
+            if claimed is None:
+                return
+            source, task = claimed
+            records: Optional[List[Dict[str, Any]]] = None
+            error: Optional[Exception] = None
+            try:
+                page = self._fetch(source, task)
+                # The browser is already back in the pool while this page is parsed
+                records = self.parse_pool.parse(source.parser, page, *task.args)
+                if isinstance(records, dict):
+                    records = [records]
+                added = self.sink.write(source.name, records)
+                metrics.inc(f"{source.name}.pages")
+                metrics.inc(f"{source.name}.jobs", added)
+                metrics.inc(f"{source.name}.duplicates", len(records) - added)
+            except BlockedPage as e:
+                if e.action != STOP:
+                    # Back in line; the source's rate limiter holds it until the backoff ends
+                    with self.condition:
+                        self.in_flight[source.name] -= 1
+                        self.retries[source.name].append(task)
+                        self.condition.notify_all()
+                    continue
+                error = e
+                metrics.inc(f"{source.name}.errors")
+            except Exception as e:
+                error = e
+                metrics.inc(f"{source.name}.errors")
+            with self.condition:
+                self.in_flight[source.name] -= 1
+                if error is None:
+                    source.handle(task, records or [])
+                else:
+                    source.failed(task, error)
+                    if isinstance(error, BlockedPage):
+                        source.exhausted = True  # still blocked after every backoff
+                self.condition.notify_all()
+
+    def run(self) -> Dict[str, int]:
+        """Crawl until every source is exhausted or `stop()`; returns stored records per source"""
+        metrics.reset()
+        workers = [Thread(target=self._worker, daemon=True) for _ in range(self.connections)]
+        started = time.monotonic()
+        try:
+            for worker in workers:
+                worker.start()
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(timeout=0.5)
+        except KeyboardInterrupt:
+            logging.info("Stopping after the pages in flight...")
+            self.stop()
+            for worker in workers:
+                worker.join()
+        finally:
+            self.browsers.close()
+            self.parse_pool.close()
+        elapsed = time.monotonic() - started
+        for source in self.sources:
+            pages = metrics.count(f"{source.name}.pages")
+            logging.info(f"[{source.name}] {pages} pages, {metrics.count(f'{source.name}.jobs')} new jobs, "
+                         f"{metrics.count(f'{source.name}.duplicates')} duplicates, "
+                         f"{metrics.count(f'{source.name}.errors')} errors")
+        if self.proxy_pool is not None:
+            for row in self.proxy_pool.stats():
+                logging.info(f"Proxy {row}")
+        logging.info(f"Finished in {elapsed / 60:.1f} min")
+        return self.sink.counts()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run Jobinja and JobVision scrapers under one budget")
+    parser.add_argument("--db", default=SINK_DB, help="Common SQLite sink")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Crawl the selected sources concurrently")
+    run_parser.add_argument("--jobinja-pages", type=int, default=0,
+                            help="Jobinja listing pages, per facet stream with --facets (0 = skip)")
+    run_parser.add_argument("--jobvision-pages", type=int, default=0,
+                            help="JobVision listing pages, per facet stream with --facets (0 = skip)")
+    run_parser.add_argument("--facets", metavar="FILE",
+                            help="Shard the listings by the category/location facets in this file")
+    run_parser.add_argument("--details", metavar="INPUT_XLSX", help="Fetch details for the links in this workbook")
+    run_parser.add_argument("--browsers", type=int, default=DEFAULT_BROWSERS, help="Chrome instances alive at once")
+    run_parser.add_argument("--browser-memory", type=float, default=BROWSER_MEMORY_MB,
+                            help="RSS budget in MB shared by all Chromes")
+    run_parser.add_argument("--connections", type=int, help="Pages in flight at once (default: --browsers)")
+    run_parser.add_argument("--cpu", type=int, default=DEFAULT_WORKERS, help="Parse worker processes")
+    run_parser.add_argument("--driver", default=DRIVER_PATH)
+    run_parser.add_argument("--headless", action="store_true")
+    run_parser.add_argument("--proxies", metavar="FILE", help="Proxy list, one URL per line")
+    run_parser.add_argument("--fresh-profiles", action="store_true",
+                            help="Temporary Chrome profiles instead of the persistent warm ones")
+
+    export_parser = subparsers.add_parser("export", help="Write the sink to Excel")
+    export_parser.add_argument("output_file")
+    export_parser.add_argument("--source")
+
+    subparsers.add_parser("stats", help="Show stored records per source")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sink = CommonSink(args.db)
+
+    try:
+        if args.command == "run":
+            sources: List[SourcePlugin] = []
+            if args.facets:
+                from crawl_planner import load_facets, JobinjaFacetedSource, JobVisionFacetedSource
+                facets = load_facets(args.facets)
+                if args.jobinja_pages:
+                    sources.append(JobinjaFacetedSource(facets["jobinja"], max_pages=args.jobinja_pages))
+                if args.jobvision_pages:
+                    sources.append(JobVisionFacetedSource(facets["jobvision"], max_pages=args.jobvision_pages))
+            else:
+                if args.jobinja_pages:
+                    sources.append(JobinjaListingSource(max_pages=args.jobinja_pages))
+                if args.jobvision_pages:
+                    sources.append(JobVisionListingSource(max_pages=args.jobvision_pages))
+            if args.details:
+                from Updater_table import ExcelHandler
+                links = ExcelHandler().read_input_links(args.details)
+                sources.append(JobinjaDetailSource(links, skip=sink.urls(JobinjaDetailSource.name)))
+            if not sources:
+                parser.error("select at least one source (--jobinja-pages, --jobvision-pages, --details)")
+            proxy_pool = ProxyPool.from_file(args.proxies) if args.proxies else None
+            if proxy_pool is not None:
+                # Chrome drops user:pass from --proxy-server, so these would only collect 407s and quarantines
+                authenticated = [proxy for proxy in proxy_pool.proxies if proxy.username]
+                if authenticated:
+                    parser.error(f"Selenium cannot use proxies with credentials ({authenticated}); "
+                                 f"use IP-whitelisted proxies or a local forwarder")
+            runner = Runner(sources, sink, browsers=args.browsers, connections=args.connections,
+                            cpu=args.cpu, driver_path=args.driver, headless=args.headless,
+                            proxy_pool=proxy_pool,
+                            browser_memory_mb=args.browser_memory,
+                            persistent_profiles=not args.fresh_profiles)
+            logging.info(f"Stored records: {runner.run()}")
+        elif args.command == "export":
+            logging.info(f"Exported {sink.export(args.output_file, args.source)} records to {args.output_file}")
+        elif args.command == "stats":
+            print(sink.counts())
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import os
+import sqlite3
+import logging
+import argparse
+from typing import Optional, Dict, List, Any
+
+import numpy as np
+import pandas as pd
+
+from text_normalizer import DIGIT_TABLE
+
+# تنظیمات ایندکس عددی
+INDEX_DB = "jobs_numeric.sqlite"
+
+# Source text column -> parsed columns, per scraper output
+SALARY_COLUMNS = ["Salary", "salary", "حقوق"]
+EXPERIENCE_COLUMNS = ["Work Experience"]
+URL_COLUMNS = ["URL", "Link", "job_link", "لینک شغل"]
+
+_NUMBER = r'\d+(?:\.\d+)?'
+_RANGE_SEPARATOR = r'\s*(?:تا|الی|-|–|—)\s*'
+_RANGE_RE = rf'(?P<low>{_NUMBER}){_RANGE_SEPARATOR}(?P<high>{_NUMBER})'
+_HAS_RANGE_RE = rf'{_NUMBER}{_RANGE_SEPARATOR}{_NUMBER}'
+_SINGLE_RE = rf'(?P<value>{_NUMBER})'
+_FROM_RE = r'^\s*(?:از|بیش از|بالای|حداقل)\s'
+_UP_TO_RE = r'^\s*(?:تا|حداکثر|کمتر از|زیر)\s'
+_NEGOTIABLE_RE = r'توافقی|negotiable|Negotiable'
+_NO_EXPERIENCE_RE = r'بدون|نیاز نیست|Not required'
+
+
+def _to_ascii_numbers(series: pd.Series) -> pd.Series:
+    """Persian/Arabic digits to ASCII and drop thousands separators, column-wise"""
+    return (series.astype("string")
+                  .str.translate(DIGIT_TABLE)
+                  .str.replace('٫', '.', regex=False)
+                  # "۱۲/۵" is how 12.5 is usually typed in Persian
+                  .str.replace(r'(?<=\d)/(?=\d)', '.', regex=True)
+                  .str.replace(r'(?<=\d)[,٬،](?=\d{3})', '', regex=True))
+
+
+def _contains(text: pd.Series, pattern: str) -> pd.Series:
+    return text.str.contains(pattern, regex=True).fillna(False).astype(bool)
+
+
+def _bounds(text: pd.Series) -> pd.DataFrame:
+    """Lower/upper numeric bounds from "X تا Y", "از X", "تا Y" or a single "X" """
+    ranges = text.str.extract(_RANGE_RE)
+
+    def numbers(values: pd.Series) -> pd.Series:
+        # Plain floats: string input gives nullable Int64/Float64, which cannot fill each other
+        return pd.to_numeric(values, errors='coerce').astype('float64')
+
+    single = numbers(text.str.extract(_SINGLE_RE)['value'])
+    low = numbers(ranges['low'])
+    high = numbers(ranges['high'])
+    is_from = _contains(text, _FROM_RE)
+    is_up_to = _contains(text, _UP_TO_RE)
+    bounds = pd.DataFrame({
+        'min': low.fillna(single.where(~is_up_to)),
+        'max': high.fillna(single.where(~is_from)),
+    })
+    # A range written high-to-low ("۲۰ تا ۱۵") still yields min <= max
+    reversed_range = bounds['min'] > bounds['max']
+    bounds.loc[reversed_range, ['min', 'max']] = bounds.loc[reversed_range, ['max', 'min']].to_numpy()
+    return bounds
+
+
+def parse_salary(series: pd.Series) -> pd.DataFrame:
+    """Parse free-text salaries into salary_min/salary_max (Toman), currency and negotiable flag"""
+    text = _to_ascii_numbers(series)
+    bounds = _bounds(text)
+
+    def has(pattern: str) -> np.ndarray:
+        return _contains(text, pattern).to_numpy()
+
+    is_rial = has('ریال')
+    # Salaries without a unit are written in millions unless the number is already large
+    magnitude = bounds.max(axis=1).fillna(bounds['min']).to_numpy()
+    multiplier = np.select(
+        [has('میلیارد'), has('میلیون'), has('هزار')],
+        [1e9, 1e6, 1e3],
+        default=np.where(magnitude >= 100_000, 1.0, 1e6)
+    )
+    multiplier = np.where(is_rial, multiplier / 10, multiplier)
+
+    salary_min = bounds['min'] * multiplier
+    salary_max = bounds['max'] * multiplier
+    parsed = salary_min.notna() | salary_max.notna()
+    currency = pd.Series(np.where(is_rial, "IRR", "IRT"), index=series.index).where(parsed)
+
+    return pd.DataFrame({
+        'salary_min': salary_min,
+        'salary_max': salary_max,
+        'salary_currency': currency,
+        'salary_negotiable': pd.Series(has(_NEGOTIABLE_RE), index=series.index),
+    }, index=series.index)
+
+
+def parse_experience(series: pd.Series) -> pd.DataFrame:
+    """Parse "حداقل سابقه کار" text into experience_min/experience_max in years"""
+    text = _to_ascii_numbers(series)
+    bounds = _bounds(text)
+    none_required = _contains(text, _NO_EXPERIENCE_RE)
+    # A single "N سال" under "حداقل سابقه کار" is a lower bound only
+    has_upper = _contains(text, _HAS_RANGE_RE) | _contains(text, _UP_TO_RE)
+    return pd.DataFrame({
+        'experience_min': bounds['min'].mask(none_required, 0.0),
+        'experience_max': bounds['max'].where(has_upper & ~none_required),
+    }, index=series.index)
+
+
+def _first_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
+    return next((column for column in candidates if column in df.columns), None)
+
+
+def add_parsed_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Return `df` with numeric salary/experience columns appended where the source columns exist"""
+    result = df.copy()
+    salary_column = _first_column(df, SALARY_COLUMNS)
+    if salary_column:
+        for column, values in parse_salary(df[salary_column]).items():
+            result[column] = values
+    experience_column = _first_column(df, EXPERIENCE_COLUMNS)
+    if experience_column:
+        for column, values in parse_experience(df[experience_column]).items():
+            result[column] = values
+    return result
+
+
+class NumericIndex:
+    """SQLite table of parsed numeric columns with B-tree indexes for range queries"""
+
+    def __init__(self, db_path: str = INDEX_DB):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS job_numeric (
+                url TEXT PRIMARY KEY,
+                source TEXT,
+                salary_min REAL,
+                salary_max REAL,
+                salary_currency TEXT,
+                salary_negotiable INTEGER,
+                experience_min REAL,
+                experience_max REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_numeric_salary ON job_numeric(salary_min, salary_max);
+            CREATE INDEX IF NOT EXISTS idx_job_numeric_salary_max ON job_numeric(salary_max);
+            CREATE INDEX IF NOT EXISTS idx_job_numeric_experience ON job_numeric(experience_min, experience_max);
+        """)
+
+    def upsert_frame(self, df: pd.DataFrame, source: str) -> int:
+        """Parse `df` (if needed) and upsert its numeric columns keyed by URL"""
+        url_column = _first_column(df, URL_COLUMNS)
+        if url_column is None:
+            return 0
+        if 'salary_min' not in df.columns and 'experience_min' not in df.columns:
+            df = add_parsed_columns(df)
+
+        frame = pd.DataFrame({'url': df[url_column].astype("string"), 'source': source})
+        for column in ['salary_min', 'salary_max', 'salary_currency', 'salary_negotiable',
+                       'experience_min', 'experience_max']:
+            frame[column] = df[column] if column in df.columns else None
+        frame = frame[frame['url'].notna()].astype(object).where(frame.notna(), None)
+        if 'salary_negotiable' in df.columns:
+            frame['salary_negotiable'] = frame['salary_negotiable'].map(
+                lambda value: None if value is None else int(bool(value)))
+
+        with self.conn:
+            self.conn.executemany(
+                """INSERT OR REPLACE INTO job_numeric
+                   (url, source, salary_min, salary_max, salary_currency, salary_negotiable,
+                    experience_min, experience_max)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                frame.itertuples(index=False, name=None)
+            )
+        return len(frame)
+
+    def upsert_record(self, record: Dict[str, Any], source: str) -> int:
+        return self.upsert_frame(pd.DataFrame([record]), source)
+
+    def query(self, salary_at_least: Optional[float] = None, salary_at_most: Optional[float] = None,
+              max_experience: Optional[float] = None, include_negotiable: bool = False,
+              source: Optional[str] = None, limit: int = 1000) -> List[str]:
+        """URLs whose salary range overlaps the request and whose required experience fits"""
+        conditions, params = [], []
+        if salary_at_least is not None:
+            # Written as an OR so SQLite can use both salary indexes
+            conditions.append("(salary_max >= ? OR (salary_max IS NULL AND salary_min >= ?))")
+            params.extend([salary_at_least, salary_at_least])
+        if salary_at_most is not None:
+            conditions.append("salary_min <= ?")
+            params.append(salary_at_most)
+        if conditions and include_negotiable:
+            conditions = [f"(({' AND '.join(conditions)}) OR salary_negotiable = 1)"]
+        if max_experience is not None:
+            conditions.append("(experience_min IS NULL OR experience_min <= ?)")
+            params.append(max_experience)
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.conn.execute(
+            f"SELECT url FROM job_numeric {where} ORDER BY salary_min DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parse salary/experience text into numeric columns")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Add numeric columns to workbooks and index them")
+    backfill_parser.add_argument("files", nargs="+")
+    backfill_parser.add_argument("--db", default=INDEX_DB)
+    backfill_parser.add_argument("--no-write", action="store_true", help="Only update the index")
+
+    query_parser = subparsers.add_parser("query", help="Range query over the index")
+    query_parser.add_argument("--db", default=INDEX_DB)
+    query_parser.add_argument("--min-salary", type=float)
+    query_parser.add_argument("--max-salary", type=float)
+    query_parser.add_argument("--max-experience", type=float)
+    query_parser.add_argument("--include-negotiable", action="store_true")
+    query_parser.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    index = NumericIndex(args.db)
+    try:
+        if args.command == "backfill":
+            for path in args.files:
+                df = add_parsed_columns(pd.read_excel(path))
+                count = index.upsert_frame(df, os.path.splitext(os.path.basename(path))[0])
+                if not args.no_write and _first_column(df, URL_COLUMNS) != "URL":
+                    # Jobinja detail files keep URL as the last column, so they are only indexed
+                    df.to_excel(path, index=False, engine='openpyxl')
+                logging.info(f"{path}: {count} rows indexed")
+        else:
+            for url in index.query(args.min_salary, args.max_salary, args.max_experience,
+                                   args.include_negotiable, limit=args.limit):
+                print(url)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import random
+import logging
+from datetime import datetime, timedelta
+from threading import Thread, Event, Lock
+from typing import Optional, Dict, Callable
+
+# تنظیمات زمان‌بند
+SCHEDULER_STATE_FILE = "scheduler_state.json"
+MAX_SLEEP_SECONDS = 30.0   # re-read the wall clock at least this often (detects sleep/hibernate)
+
+
+class ScheduledJob:
+    """A named job with an interval or daily trigger and a persisted next-run time"""
+
+    def __init__(self, name: str, func: Callable[[], None], interval: Optional[float] = None,
+                 daily_at: Optional[str] = None, jitter: float = 0.0, catch_up: bool = True):
+        if (interval is None) == (daily_at is None):
+            raise ValueError("Exactly one of interval or daily_at is required")
+        if daily_at is not None:
+            datetime.strptime(daily_at, "%H:%M")  # ValueError on bad input, like the GUI expects
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.daily_at = daily_at
+        self.jitter = jitter
+        self.catch_up = catch_up
+        self.next_run = 0.0
+
+    @property
+    def trigger(self) -> str:
+        """Identifies the trigger, so a changed schedule does not reuse a stale next-run time"""
+        return f"every {self.interval}s" if self.interval is not None else f"daily {self.daily_at}"
+
+    def compute_next(self, after: float) -> float:
+        if self.interval is not None:
+            base = after + self.interval
+        else:
+            hour, minute = map(int, self.daily_at.split(":"))
+            moment = datetime.fromtimestamp(after).replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if moment.timestamp() <= after:
+                moment += timedelta(days=1)
+            base = moment.timestamp()
+        return base + random.uniform(0, self.jitter)
+
+
+class Scheduler:
+    """Runs periodic jobs on a background thread, headless or next to a Tk loop
+
+    * single-flight: a job never starts while its previous run (scheduled or manual) is active
+    * catch-up: runs missed while the machine slept are coalesced into one run on wake-up
+    * jitter: each start is delayed by a random 0..jitter seconds
+    * next-run times are persisted, so a restart keeps the schedule instead of resetting it
+    """
+
+    def __init__(self, state_file: str = SCHEDULER_STATE_FILE, log: Callable[[str], None] = logging.info):
+        self.state_file = state_file
+        self.log = log
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.running: Dict[str, Lock] = {}
+        self.lock = Lock()
+        self.wakeup = Event()
+        self.stopped = Event()
+        self.thread: Optional[Thread] = None
+
+    # --- persistence ---------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            self.log(f"Error loading scheduler state: {e}")
+            return {}
+
+    def _save_state(self, removed: Optional[str] = None) -> None:
+        # Merge with the file: another app may keep its own jobs in the same state file
+        state = self._load_state()
+        state.pop(removed, None)
+        state.update({name: {"trigger": job.trigger, "next_run": job.next_run} for name, job in self.jobs.items()})
+        try:
+            temp_path = f"{self.state_file}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=4)
+            os.replace(temp_path, self.state_file)
+        except Exception as e:
+            self.log(f"Error saving scheduler state: {e}")
+
+    # --- registration --------------------------------------------------------
+
+    def add(self, job: ScheduledJob, run_now: bool = False) -> ScheduledJob:
+        """Register (or replace) a job; its persisted next-run time is kept if the trigger is unchanged
+
+        `run_now` only applies to a new schedule: a restarted one keeps its cadence.
+        """
+        now = time.time()
+        saved = self._load_state().get(job.name)
+        with self.lock:
+            if saved and saved.get("trigger") == job.trigger:
+                job.next_run = saved["next_run"]  # in the past -> caught up on the next tick
+            elif run_now:
+                job.next_run = now
+            else:
+                job.next_run = job.compute_next(now)
+            self.jobs[job.name] = job
+            self.running.setdefault(job.name, Lock())
+            self._save_state()
+        self.wakeup.set()
+        return job
+
+    def every(self, name: str, func: Callable[[], None], seconds: float,
+              jitter: float = 0.0, run_now: bool = False) -> ScheduledJob:
+        return self.add(ScheduledJob(name, func, interval=seconds, jitter=jitter), run_now)
+
+    def daily(self, name: str, func: Callable[[], None], at: str, jitter: float = 0.0) -> ScheduledJob:
+        return self.add(ScheduledJob(name, func, daily_at=at, jitter=jitter))
+
+    def cancel(self, name: str) -> None:
+        with self.lock:
+            self.jobs.pop(name, None)
+            self._save_state(removed=name)
+        self.wakeup.set()
+
+    def next_run(self, name: str) -> Optional[datetime]:
+        job = self.jobs.get(name)
+        return datetime.fromtimestamp(job.next_run) if job else None
+
+    def is_running(self, name: str) -> bool:
+        lock = self.running.get(name)
+        return lock is not None and lock.locked()
+
+    # --- execution -----------------------------------------------------------
+
+    def run_once(self, name: str, func: Callable[[], None], wait: bool = False) -> bool:
+        """Run `func` under the job's single-flight guard; False if a run is already active"""
+        with self.lock:
+            guard = self.running.setdefault(name, Lock())
+        if not guard.acquire(blocking=False):
+            self.log(f"'{name}' is still running, not starting another run")
+            return False
+
+        def target() -> None:
+            try:
+                func()
+            except Exception as e:
+                self.log(f"Scheduled job '{name}' failed: {e}")
+            finally:
+                guard.release()
+
+        thread = Thread(target=target, daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _run_due(self) -> Optional[float]:
+        """Start due jobs; return seconds until the next one"""
+        now = time.time()
+        due = []
+        changed = False
+        with self.lock:
+            for job in self.jobs.values():
+                if job.next_run > now:
+                    continue
+                changed = True
+                missed = now - job.next_run
+                if missed > MAX_SLEEP_SECONDS * 2:
+                    self.log(f"'{job.name}' missed its run by {missed / 60:.0f} min"
+                             + (", catching up now" if job.catch_up else ", skipping"))
+                if job.catch_up or missed <= MAX_SLEEP_SECONDS * 2:
+                    due.append(job)
+                # Several missed runs are coalesced: the next one is computed from now
+                job.next_run = job.compute_next(now)
+            if changed:
+                self._save_state()
+            next_due = min((job.next_run for job in self.jobs.values()), default=None)
+
+        for job in due:
+            self.run_once(job.name, job.func)
+        return None if next_due is None else max(0.0, next_due - time.time())
+
+    def _loop(self) -> None:
+        while not self.stopped.is_set():
+            wait = self._run_due()
+            self.wakeup.clear()
+            self.wakeup.wait(min(wait if wait is not None else MAX_SLEEP_SECONDS, MAX_SLEEP_SECONDS))
+
+    def start(self) -> None:
+        """Run the scheduler on a daemon thread (GUI use)"""
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = Thread(target=self._loop, daemon=True)
+            self.thread.start()
+
+    def run_forever(self) -> None:
+        """Run the scheduler on the calling thread (headless use); Ctrl+C stops it"""
+        try:
+            self._loop()
+        except KeyboardInterrupt:
+            self.log("Scheduler stopped by user")
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.wakeup.set()
@@ -0,0 +1,205 @@
+import os
+import time
+import hashlib
+import sqlite3
+import logging
+import argparse
+from typing import Optional, Dict, List, Any, Iterable
+
+import pandas as pd
+
+from text_normalizer import normalize_text, normalize_series
+
+# تنظیمات ایندکس جستجو
+SEARCH_DB = "jobs_search.sqlite"
+
+# Indexed field -> column names used by the different scrapers
+FIELD_COLUMNS = {
+    'url': ["URL", "Link", "job_link", "لینک شغل"],
+    'title': ["Job Title", "Title", "job_title", "عنوان شغل"],
+    'company': ["Company", "company", "شرکت"],
+    'description': ["Job Description", "description"],
+    'company_intro': ["Company Introduction"],
+}
+TEXT_FIELDS = ['title', 'company', 'description', 'company_intro']
+# bm25() weights per FTS column (url and source are unindexed)
+RANK_WEIGHTS = (0.0, 0.0, 10.0, 4.0, 1.0, 0.5)
+
+
+def _first_column(df: pd.DataFrame, field: str) -> Optional[str]:
+    return next((column for column in FIELD_COLUMNS[field] if column in df.columns), None)
+
+
+def build_query(text: str) -> str:
+    """Turn free text into an FTS5 query with the same normalization as the indexed documents"""
+    terms = normalize_text(text, for_key=True).split()
+    # Quote every term so FTS5 syntax characters in user input are harmless; last term is a prefix
+    quoted = [f'"{term}"' for term in terms]
+    if quoted:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class SearchIndex:
+    """Incrementally maintained SQLite FTS5 index over scraped job texts"""
+
+    def __init__(self, db_path: str = SEARCH_DB):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Documents are stored with the dedup-key normalization (ي/ی, ك/ک, digits, ZWNJ -> space),
+        # so unicode61 only has to split on whitespace and punctuation
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                url UNINDEXED, source UNINDEXED, title, company, description, company_intro,
+                tokenize = "unicode61 remove_diacritics 2"
+            );
+            CREATE TABLE IF NOT EXISTS jobs_meta (
+                url TEXT PRIMARY KEY,
+                fts_rowid INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                display_title TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS indexed_files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+        """)
+
+    def _upsert(self, url: str, source: str, fields: Dict[str, str], display_title: str) -> bool:
+        content_hash = hashlib.blake2b("\x1f".join(fields[f] for f in TEXT_FIELDS).encode('utf-8'),
+                                       digest_size=16).hexdigest()
+        existing = self.conn.execute(
+            "SELECT fts_rowid, content_hash FROM jobs_meta WHERE url = ?", (url,)).fetchone()
+        if existing and existing[1] == content_hash:
+            return False
+        if existing:
+            self.conn.execute("DELETE FROM jobs_fts WHERE rowid = ?", (existing[0],))
+
+        cursor = self.conn.execute(
+            "INSERT INTO jobs_fts (url, source, title, company, description, company_intro) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, source, *(fields[f] for f in TEXT_FIELDS))
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO jobs_meta (url, fts_rowid, content_hash, display_title, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (url, cursor.lastrowid, content_hash, display_title, time.time())
+        )
+        return True
+
+    def add_frame(self, df: pd.DataFrame, source: str) -> int:
+        """Index new or changed rows of a scraped DataFrame, return how many were written"""
+        url_column = _first_column(df, 'url')
+        if url_column is None or df.empty:
+            return 0
+        # Normalize whole columns at once, then write row by row inside one transaction
+        normalized = {}
+        for field in TEXT_FIELDS:
+            column = _first_column(df, field)
+            if column is None:
+                normalized[field] = pd.Series("", index=df.index)
+            else:
+                values = df[column].astype("string").mask(df[column].astype("string") == "N/A")
+                normalized[field] = normalize_series(values, for_key=True).fillna("")
+        title_column = _first_column(df, 'title')
+        titles = df[title_column].astype("string").fillna("") if title_column else pd.Series("", index=df.index)
+
+        written = 0
+        with self.conn:
+            for position, url in enumerate(df[url_column].astype("string")):
+                if pd.isna(url) or not url:
+                    continue
+                fields = {field: normalized[field].iat[position] for field in TEXT_FIELDS}
+                written += self._upsert(str(url), source, fields, titles.iat[position])
+        return written
+
+    def add_records(self, records: Iterable[Dict[str, Any]], source: str) -> int:
+        return self.add_frame(pd.DataFrame(list(records)), source)
+
+    def sync_file(self, path: str, source: Optional[str] = None) -> int:
+        """Index a workbook only if it changed since the last sync"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        known = self.conn.execute("SELECT mtime, size FROM indexed_files WHERE path = ?", (key,)).fetchone()
+        if known and known[0] == stat.st_mtime and known[1] == stat.st_size:
+            return 0
+        written = self.add_frame(pd.read_excel(path), source or os.path.splitext(os.path.basename(path))[0])
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO indexed_files (path, mtime, size) VALUES (?, ?, ?)",
+                              (key, stat.st_mtime, stat.st_size))
+        return written
+
+    def search(self, text: str, limit: int = 20, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ranked hits (best first) with a highlighted snippet from the description"""
+        query = build_query(text)
+        if not query:
+            return []
+        sql = f"""
+            SELECT jobs_fts.url, jobs_fts.source, jobs_meta.display_title,
+                   snippet(jobs_fts, 4, '[', ']', ' … ', 12),
+                   bm25(jobs_fts, {', '.join(str(w) for w in RANK_WEIGHTS)}) AS score
+            FROM jobs_fts JOIN jobs_meta ON jobs_meta.fts_rowid = jobs_fts.rowid
+            WHERE jobs_fts MATCH ?"""
+        params: List[Any] = [query]
+        if source is not None:
+            sql += " AND jobs_fts.source = ?"
+            params.append(source)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        return [
+            {'url': url, 'source': src, 'title': title, 'snippet': snippet, 'score': -score}
+            for url, src, title, snippet, score in self.conn.execute(sql, params)
+        ]
+
+    def optimize(self) -> None:
+        """Merge FTS5 b-tree segments after large imports"""
+        with self.conn:
+            self.conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('optimize')")
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM jobs_meta").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Full-text search over scraped job postings")
+    parser.add_argument("--db", default=SEARCH_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Index (or re-index changed) workbooks")
+    build_parser.add_argument("files", nargs="+")
+    build_parser.add_argument("--source", help="Source label, defaults to the file name")
+
+    search_parser = subparsers.add_parser("search", help="Query the index")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=20)
+    search_parser.add_argument("--source")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    index = SearchIndex(args.db)
+    try:
+        if args.command == "build":
+            for path in args.files:
+                written = index.sync_file(path, args.source)
+                logging.info(f"{path}: {written} postings indexed")
+            index.optimize()
+            logging.info(f"Index holds {index.count()} postings")
+        else:
+            started = time.perf_counter()
+            hits = index.search(args.query, args.limit, args.source)
+            elapsed = (time.perf_counter() - started) * 1000
+            for hit in hits:
+                print(f"{hit['score']:.2f}\t{hit['title']}\t{hit['url']}\n\t{hit['snippet']}")
+            print(f"{len(hits)} hits in {elapsed:.1f} ms")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import logging
+import argparse
+from threading import Lock
+from typing import Optional, Dict, List, Any
+
+import pandas as pd
+
+from excel_cache import read_excel_cached, write_excel_cached, save_frame, load_frame
+from metrics import metrics
+
+# تنظیمات ذخیره‌سازی افزایشی
+SEGMENTS_SUFFIX = ".segments"
+COMPACT_AFTER = 32           # merge the small per-page segments once this many have piled up
+MARKER_FILE = "consolidating.json"
+_SEGMENT_NAME = re.compile(r"^(\d{8})-(\d{8})-(\d+)\.(feather|pkl)$")
+
+
+class Segment:
+    """One segment file holding appends `first`..`last`, `rows` rows in total"""
+
+    def __init__(self, directory: str, name: str):
+        match = _SEGMENT_NAME.match(name)
+        self.path = os.path.join(directory, name)
+        self.name = name
+        self.first = int(match.group(1))
+        self.last = int(match.group(2))
+        self.rows = int(match.group(3))
+
+    def covers(self, other: "Segment") -> bool:
+        return other is not self and self.first <= other.first and other.last <= self.last
+
+
+class SegmentSink:
+    """Append-only store in front of an xlsx file, so saving a page costs O(page) instead of O(file)
+
+    Each `append` writes one small Feather/pickle segment into `<xlsx>.segments/`. Segment
+    names carry their sequence range and row count, so counting needs no reads and a crash
+    never leaves a half-registered batch. Small segments are compacted into one from time
+    to time; `consolidate()` folds everything into the workbook, which is done on demand
+    (end of a run, or `python segment_sink.py consolidate FILE`).
+    """
+
+    def __init__(self, xlsx_path: str, compact_after: int = COMPACT_AFTER, **excel_kwargs: Any):
+        self.xlsx_path = xlsx_path
+        self.directory = f"{xlsx_path}{SEGMENTS_SUFFIX}"
+        self.compact_after = compact_after
+        self.excel_kwargs = excel_kwargs
+        self.lock = Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._recover()
+        self.segments = self._scan()
+        self.workbook_rows = self._count_workbook()
+
+    # --- on-disk bookkeeping -------------------------------------------------
+
+    def _scan(self) -> List[Segment]:
+        segments = [Segment(self.directory, name) for name in os.listdir(self.directory)
+                    if _SEGMENT_NAME.match(name)]
+        # A compaction interrupted before deleting its inputs leaves covered segments behind
+        live = [segment for segment in segments if not any(other.covers(segment) for other in segments)]
+        for segment in segments:
+            if segment not in live:
+                os.remove(segment.path)
+        return sorted(live, key=lambda segment: segment.first)
+
+    def _recover(self) -> None:
+        """Finish or roll back a consolidation that was interrupted"""
+        marker_path = os.path.join(self.directory, MARKER_FILE)
+        if not os.path.exists(marker_path):
+            return
+        with open(marker_path, "r", encoding="utf-8") as f:
+            marker = json.load(f)
+        if self._workbook_stat() != marker["workbook_before"]:
+            # The workbook was replaced, so the listed segments are already in it
+            for name in marker["segments"]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+            logging.info(f"Completed interrupted consolidation of {self.xlsx_path}")
+        os.remove(marker_path)
+
+    def _workbook_stat(self) -> Optional[List[int]]:
+        try:
+            stat = os.stat(self.xlsx_path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _count_workbook(self) -> int:
+        if not os.path.exists(self.xlsx_path):
+            return 0
+        return len(read_excel_cached(self.xlsx_path, **self.excel_kwargs))
+
+    def _next_sequence(self) -> int:
+        return self.segments[-1].last + 1 if self.segments else 1
+
+    def _write_segment(self, df: pd.DataFrame, first: int, last: int) -> Segment:
+        data_path = save_frame(df, os.path.join(self.directory, f"{first:08d}-{last:08d}-{len(df)}"))
+        return Segment(self.directory, os.path.basename(data_path))
+
+    # --- public API ------------------------------------------------------------
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Store one batch of rows; returns the total row count (workbook plus segments)"""
+        if df.empty:
+            return self.count()
+        with self.lock:
+            sequence = self._next_sequence()
+            self.segments.append(self._write_segment(df, sequence, sequence))
+            metrics.inc("sink_segments_written")
+            if len(self.segments) >= self.compact_after:
+                self._compact()
+            return self.workbook_rows + sum(segment.rows for segment in self.segments)
+
+    def count(self) -> int:
+        with self.lock:
+            return self.workbook_rows + sum(segment.rows for segment in self.segments)
+
+    def pending_rows(self) -> int:
+        """Rows not yet in the workbook"""
+        with self.lock:
+            return sum(segment.rows for segment in self.segments)
+
+    def _read_segments(self) -> List[pd.DataFrame]:
+        return [load_frame(segment.path) for segment in self.segments]
+
+    def _compact(self) -> None:
+        merged = pd.concat(self._read_segments(), ignore_index=True)
+        compacted = self._write_segment(merged, self.segments[0].first, self.segments[-1].last)
+        for segment in self.segments:
+            if segment.name != compacted.name:
+                os.remove(segment.path)
+        self.segments = [compacted]
+        metrics.inc("sink_compactions")
+
+    def frame(self) -> pd.DataFrame:
+        """Workbook and pending rows as one frame, without writing anything"""
+        with self.lock:
+            parts = self._read_segments()
+        if os.path.exists(self.xlsx_path):
+            parts.insert(0, read_excel_cached(self.xlsx_path, **self.excel_kwargs))
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def consolidate(self) -> int:
+        """Fold all pending segments into the xlsx file; returns the workbook's row count"""
+        with self.lock:
+            if not self.segments:
+                return self.workbook_rows
+            existing = read_excel_cached(self.xlsx_path, **self.excel_kwargs) \
+                if os.path.exists(self.xlsx_path) else pd.DataFrame()
+            updated = pd.concat([existing] + self._read_segments(), ignore_index=True)
+
+            marker_path = os.path.join(self.directory, MARKER_FILE)
+            with open(marker_path, "w", encoding="utf-8") as f:
+                json.dump({"workbook_before": self._workbook_stat(),
+                           "segments": [segment.name for segment in self.segments]}, f)
+            write_excel_cached(updated, self.xlsx_path, **self.excel_kwargs)
+            for segment in self.segments:
+                os.remove(segment.path)
+            os.remove(marker_path)
+
+            logging.info(f"Consolidated {len(updated) - len(existing)} rows into {self.xlsx_path} "
+                         f"({len(updated)} rows)")
+            self.segments = []
+            self.workbook_rows = len(updated)
+            return self.workbook_rows
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"workbook_rows": self.workbook_rows, "segments": len(self.segments),
+                    "pending_rows": sum(segment.rows for segment in self.segments)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Append-only xlsx sink tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    consolidate_parser = subparsers.add_parser("consolidate", help="Write pending segments into the workbook")
+    consolidate_parser.add_argument("xlsx")
+
+    stats_parser = subparsers.add_parser("stats", help="Show workbook and pending row counts")
+    stats_parser.add_argument("xlsx")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    sink = SegmentSink(args.xlsx)
+    if args.command == "consolidate":
+        sink.consolidate()
+    elif args.command == "stats":
+        print(sink.stats())
+
+
+if __name__ == "__main__":
+    main()
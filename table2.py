@@ -4,14 +4,30 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
 import openpyxl
 import os
 import shutil
 import threading
 import json
 from datetime import datetime
-import time
-import random
+from text_normalizer import normalize_record
+from salary_parser import NumericIndex
+from search_index import SearchIndex
+from rollups import RollupStore
+from html_archive import HtmlArchive, KIND_DETAIL
+from retry_queue import RetryQueue, RetryWorker
+from readiness import use_eager_loading, wait_ready
+from rate_limiter import RateLimiter
+from browser_profile import BrowserProfile
+
+RETRY_SOURCE = "jobinja_table2"
+REQUEST_INTERVAL = (1, 3)  # politeness spacing between detail requests (seconds)
+HEADERS = [
+    "Job Title", "Category", "Location", "Cooperation Type", "Work Experience",
+    "Salary", "Languages", "Skills", "Gender", "Military Status",
+    "Education Level", "Job Description", "Company Introduction", "URL"
+]
 
 class JobinjaScraperApp:
     def __init__(self, root):
@@ -28,6 +44,16 @@ class JobinjaScraperApp:
         self.processed_count = 0
         self.total_count = 0
         self.status_file = "jobinja_status.json"
+        self.numeric_index = NumericIndex()
+        self.search_index = SearchIndex()
+        self.rollups = RollupStore()
+        self.html_archive = HtmlArchive()
+        self.retry_queue = RetryQueue()
+        self.retry_worker = None
+        self.workbook_lock = threading.Lock()  # main pass and retry worker write the same workbook
+        self.wb_output = None  # open output workbook while a pass is running
+        self.rate_limiter = RateLimiter(*REQUEST_INTERVAL)  # shared with the retry worker's browser
+        self.profiles = {}  # persistent browser profile per role ("main", "retry")
         
         self.create_widgets()
         self.set_styles()
@@ -187,7 +213,8 @@ class JobinjaScraperApp:
             self.log_message(f"⚠️ Error loading status: {str(e)}")
             return 0
     
-    def setup_driver(self):
+    def setup_driver(self, role="main"):
+        """Chrome on this role's persistent profile (the retry worker runs its own browser beside the main one)"""
         try:
             options = Options()
             # options.add_argument("--headless")
@@ -205,29 +232,42 @@ class JobinjaScraperApp:
             
             # Lightweight mobile user agent
             options.add_argument("user-agent=Mozilla/5.0 (Linux; Android 10) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.120 Mobile Safari/537.36")
+            use_eager_loading(options)
             
             if not os.path.exists(self.chrome_driver_path):
                 self.log_message(f"⚠️ ChromeDriver not found at {self.chrome_driver_path}")
                 return None
             
+            # Cached Jobinja assets from earlier runs instead of a fresh temporary profile
+            if role not in self.profiles:
+                self.profiles[role] = BrowserProfile("jobinja")
+            profile = self.profiles[role]
+            profile.clean()
+            for argument in profile.selenium_args():
+                options.add_argument(argument)
+            
             service = Service(executable_path=self.chrome_driver_path)
             driver = webdriver.Chrome(service=service, options=options)
-            
-            # Test connection quickly
             driver.set_page_load_timeout(60)
-            driver.get("https://www.google.com")
+            if profile.needs_warmup():
+                profile.warm_selenium(driver)
             return driver
                 
         except Exception as e:
             self.log_message(f"⚠️ Browser setup error: {str(e)}")
             return None
     
-    def extract_data(self, driver, url):
-        max_retries = 3
+    def extract_data(self, driver, url, max_retries=3):
         for attempt in range(max_retries):
             try:
                 driver.set_page_load_timeout(60)
+                self.rate_limiter.wait()
                 driver.get(url)
+                try:
+                    wait_ready(driver, ["h1"], timeout=15)
+                except TimeoutException:
+                    pass  # extract what is there; missing fields fall back to N/A
+                self.html_archive.safe_put(url, driver.page_source, KIND_DETAIL)
                 
                 data = {}
                 
@@ -273,6 +313,63 @@ class JobinjaScraperApp:
                     self.log_message(f"❌ Failed to extract data from {url} after {max_retries} attempts.")
                     return None
     
+    def start_retry_worker(self):
+        """Start (or keep alive) the background worker that retries failed links"""
+        if self.retry_worker is not None and self.retry_worker.is_alive():
+            self.retry_worker.keep_alive.set()
+            return
+        
+        # The worker drives its own browser, opened on the first due retry
+        drivers = []
+        
+        def extract(url):
+            if not drivers:
+                driver = self.setup_driver("retry")
+                if not driver:
+                    raise Exception("Retry browser initialization failed")
+                drivers.append(driver)
+            data = self.extract_data(drivers[0], url, max_retries=1)
+            if not data:
+                raise Exception("Data extraction failed")
+            return data
+        
+        def close():
+            for driver in drivers:
+                driver.quit()
+        
+        self.retry_worker = RetryWorker(self.retry_queue, RETRY_SOURCE, extract,
+                                        self.apply_retry_result, close, self.log_message)
+        self.retry_worker.keep_alive.set()
+        self.retry_worker.start()
+    
+    def apply_retry_result(self, item, data):
+        """Replace the "Failed to extract data" row of a retried link in place"""
+        data = normalize_record(data)
+        values = [data.get(header, "N/A") for header in HEADERS[:-1]] + [item.url]
+        with self.workbook_lock:
+            if self.wb_output is not None and item.output_file == self.output_file:
+                wb = self.wb_output  # the running pass saves this workbook after every link
+            else:
+                wb = openpyxl.load_workbook(item.output_file)
+            ws = wb.active
+            replaced = False
+            for row in ws.iter_rows(min_row=2):
+                if len(row) >= len(HEADERS) and row[-1].value and str(row[-1].value).strip() == item.url:
+                    for cell, value in zip(row, values):
+                        cell.value = value
+                    replaced = True
+                    break
+            if replaced:
+                wb.save(item.output_file)
+        
+        if not replaced:
+            self.log_message(f"⚠️ Row for {item.url} not found in {item.output_file}")
+            return
+        record = {**data, "URL": item.url}
+        self.numeric_index.upsert_record(record, "jobinja")
+        self.search_index.add_records([record], "jobinja")
+        self.rollups.add_records([record], "jobinja")
+    
     def save_backup(self):
         try:
             backup_dir = "backups"
@@ -318,12 +415,7 @@ class JobinjaScraperApp:
                 ws_output = wb_output.active
                 if ws_output:
                     ws_output.title = "Extracted Data"
-                    headers = [
-                        "Job Title", "Category", "Location", "Cooperation Type", "Work Experience",
-                        "Salary", "Languages", "Skills", "Gender", "Military Status",
-                        "Education Level", "Job Description", "Company Introduction", "URL"
-                    ]
-                    ws_output.append(headers)
+                    ws_output.append(HEADERS)
                 else:
                     self.log_message("⚠️ Failed to create worksheet in output file!")
                     return
@@ -335,37 +427,42 @@ class JobinjaScraperApp:
                 self.log_message("⚠️ Browser initialization failed!")
                 return
             
+            self.wb_output = wb_output
+            self.start_retry_worker()
+            
             for i in range(last_processed, total_links):
                 if not self.is_running:
                     break
                 
-                # اضافه کردن تاخیر تصادفی بین درخواست‌ها
-                if i > last_processed:
-                    delay = random.uniform(1, 3)  # تاخیر تصادفی بین 1 تا 3 ثانیه
-                    self.log_message(f"⏳ Waiting for {delay:.1f} seconds before next request...")
-                    time.sleep(delay)
-                
                 link = links[i]
                 self.update_progress(i + 1, total_links)
                 self.log_message(f"Processing link {i+1}: {link}")
                 
-                data = self.extract_data(driver, link)
-                if data and ws_output:
-                    ws_output.append([
-                        data["Job Title"], data["Category"], data["Location"], data["Cooperation Type"],
-                        data["Work Experience"], data["Salary"], data["Languages"], data["Skills"],
-                        data["Gender"], data["Military Status"], data["Education Level"],
-                        data["Job Description"], data["Company Introduction"], link
-                    ])
-                else:
-                    ws_output.append([
-                        "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A",
-                        "Failed to extract data", "Failed to extract data", link
-                    ])
-                    self.log_message(f"⚠️ Data extraction failed for link {i+1}: {link}")
-                
-                wb_output.save(self.output_file)
+                # One inline attempt; failures are retried in the background with backoff
+                data = self.extract_data(driver, link, max_retries=1)
+                with self.workbook_lock:
+                    if data and ws_output:
+                        data = normalize_record(data)
+                        ws_output.append([
+                            data["Job Title"], data["Category"], data["Location"], data["Cooperation Type"],
+                            data["Work Experience"], data["Salary"], data["Languages"], data["Skills"],
+                            data["Gender"], data["Military Status"], data["Education Level"],
+                            data["Job Description"], data["Company Introduction"], link
+                        ])
+                    else:
+                        ws_output.append([
+                            "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", "N/A",
+                            "Failed to extract data", "Failed to extract data", link
+                        ])
+                        self.log_message(f"⚠️ Data extraction failed for link {i+1}: {link}, queued for retry")
+                        self.retry_queue.push(link, self.output_file, RETRY_SOURCE, "Data extraction failed")
+                    
+                    wb_output.save(self.output_file)
                 self.save_status(i + 1)
+                if data:
+                    self.numeric_index.upsert_record({**data, "URL": link}, "jobinja")
+                    self.search_index.add_records([{**data, "URL": link}], "jobinja")
+                    self.rollups.add_records([{**data, "URL": link}], "jobinja")
                 
                 if (i + 1) % 5 == 0:
                     self.save_backup()
@@ -386,6 +483,11 @@ class JobinjaScraperApp:
             self.log_message(f"⚠️ Runtime error: {str(e)}")
             messagebox.showerror("Error", f"An error occurred:\n{str(e)}")
         finally:
+            with self.workbook_lock:
+                self.wb_output = None
+            if self.retry_worker is not None:
+                # Worker keeps draining queued retries, then exits and closes its browser
+                self.retry_worker.keep_alive.clear()
             self.is_running = False
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
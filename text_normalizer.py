@@ -0,0 +1,119 @@
+import re
+import logging
+import argparse
+from typing import Optional, Dict, Sequence
+
+import pandas as pd
+
+# Arabic code points that show up in Persian text, plus invisible characters that
+# should either disappear or become a proper ZWNJ (half space)
+CHAR_MAP: Dict[str, Optional[str]] = {
+    'ي': 'ی',  # ي -> ی
+    'ى': 'ی',  # ى -> ی
+    'ك': 'ک',  # ك -> ک
+    'ة': 'ه',  # ة -> ه
+    '\u0640': None,      # tatweel
+    '\u200b': '\u200c',  # zero width space
+    '\u200d': '\u200c',  # zero width joiner
+    '\u200e': None,      # left-to-right mark
+    '\u200f': None,      # right-to-left mark
+    '\u00ad': '\u200c',  # soft hyphen
+    '\u202f': '\u200c',  # narrow no-break space (used as half space by some keyboards)
+    '\ufeff': None,      # byte order mark
+    '\u00a0': ' ',       # no-break space
+}
+# Harakat are dropped entirely
+CHAR_MAP.update({chr(code): None for code in range(0x064B, 0x0653)})
+
+DIGIT_MAP: Dict[str, str] = {}
+DIGIT_MAP.update({chr(0x06F0 + i): str(i) for i in range(10)})  # Persian digits
+DIGIT_MAP.update({chr(0x0660 + i): str(i) for i in range(10)})  # Arabic digits
+
+STORAGE_TABLE = str.maketrans(CHAR_MAP)
+KEY_TABLE = str.maketrans({**CHAR_MAP, **DIGIT_MAP, '\u200c': ' '})
+DIGIT_TABLE = str.maketrans(DIGIT_MAP)
+
+# Text columns produced by the Jobinja and JobVision scrapers
+TEXT_COLUMNS = [
+    "Title", "Company", "Location", "Contract Type",
+    "Job Title", "Category", "Cooperation Type", "Work Experience", "Salary",
+    "Languages", "Skills", "Gender", "Military Status", "Education Level",
+    "Job Description", "Company Introduction",
+    "job_title", "company", "location", "salary", "description",
+    "عنوان شغل", "شرکت", "محل کار", "حقوق",
+]
+
+_ZWNJ_RUN_RE = re.compile('\u200c{2,}')
+_ZWNJ_SPACE_RE = re.compile('[ \t]*\u200c+[ \t]+|[ \t]+\u200c+[ \t]*')
+_WHITESPACE_RE = re.compile(r'[^\S\n]+')
+_COMMA_RE = re.compile(r'\s*،\s*')
+_EDGE_SEPARATORS_RE = re.compile('^[\\s|،,:\\-\u200c]+|[\\s|،,:\\-\u200c]+$')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_series(series: pd.Series, for_key: bool = False) -> pd.Series:
+    """Canonicalize a whole text column with vectorized string operations"""
+    text = series.astype("string")
+    text = text.str.translate(KEY_TABLE if for_key else STORAGE_TABLE)
+    if for_key:
+        return (text.str.lower()
+                    .str.replace(_NON_WORD_RE, ' ', regex=True)
+                    .str.strip())
+    return (text.str.replace(_ZWNJ_RUN_RE, '\u200c', regex=True)
+                .str.replace(_ZWNJ_SPACE_RE, ' ', regex=True)
+                .str.replace(_WHITESPACE_RE, ' ', regex=True)
+                .str.replace(_COMMA_RE, '، ', regex=True)
+                .str.replace(_EDGE_SEPARATORS_RE, '', regex=True))
+
+
+def normalize_text(text: str, for_key: bool = False) -> str:
+    """Scalar version of `normalize_series` for single records"""
+    if for_key:
+        text = text.translate(KEY_TABLE).lower()
+        return _NON_WORD_RE.sub(' ', text).strip()
+    text = text.translate(STORAGE_TABLE)
+    text = _ZWNJ_RUN_RE.sub('\u200c', text)
+    text = _ZWNJ_SPACE_RE.sub(' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
+    text = _COMMA_RE.sub('، ', text)
+    return _EDGE_SEPARATORS_RE.sub('', text)
+
+
+def normalize_frame(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Return a copy of `df` with the known text columns normalized for storage"""
+    result = df.copy()
+    for column in (columns if columns is not None else TEXT_COLUMNS):
+        if column in result.columns and not pd.api.types.is_numeric_dtype(result[column]):
+            result[column] = normalize_series(result[column]).astype(object)
+    return result
+
+
+def normalize_record(record: Dict[str, str], columns: Sequence[str] = TEXT_COLUMNS) -> Dict[str, str]:
+    """Normalize the text fields of one scraped record"""
+    return {key: normalize_text(value) if key in columns and isinstance(value, str) else value
+            for key, value in record.items()}
+
+
+def backfill_file(input_file: str, output_file: Optional[str] = None) -> int:
+    """Normalize an existing workbook in bulk, return the number of changed cells"""
+    df = pd.read_excel(input_file)
+    normalized = normalize_frame(df)
+    columns = [c for c in TEXT_COLUMNS if c in df.columns]
+    changed = int((df[columns].astype("string") != normalized[columns].astype("string")).fillna(False).sum().sum())
+    normalized.to_excel(output_file or input_file, index=False, engine='openpyxl')
+    return changed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Normalize Persian text in scraped workbooks")
+    parser.add_argument("files", nargs="+", help="Workbooks to normalize in place")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    for path in args.files:
+        changed = backfill_file(path)
+        logging.info(f"{path}: {changed} cells normalized")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Iterator, IO
+
+# Files ending in this suffix are written as OTLP/JSON lines, everything else as Chrome trace events
+OTLP_SUFFIX = ".otlp.json"
+FLUSH_EVERY = 200  # finished spans between automatic flushes; each flush appends only those
+
+
+class Span:
+    """One timed operation with attributes; nested spans share a thread-local parent stack"""
+
+    __slots__ = ("name", "attributes", "start_ns", "end_ns", "span_id", "parent_id", "thread_id")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], span_id: int,
+                 parent_id: Optional[int]):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    """Returned while tracing is off so instrumented code needs no branches"""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects nested spans for a run and appends them to a Chrome trace or OTLP/JSON file
+
+    The Chrome trace uses the JSON array format, whose closing bracket is optional, and
+    OTLP is written one ExportTraceServiceRequest per line (the collector's file format),
+    so a flush only writes the spans finished since the previous one and a killed run
+    still leaves a readable file.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.pending: List[Span] = []
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.local = threading.local()
+        self.trace_id = 0
+        self.file: Optional[IO[str]] = None
+        self._events_written = 0
+
+    def start(self, path: str) -> None:
+        """Begin recording; spans are appended to `path` on flush/stop"""
+        with self.write_lock:
+            self.file = open(path, "w", encoding="utf-8")
+            self._events_written = 0
+            if not path.endswith(OTLP_SUFFIX):
+                self.file.write("[")
+        with self.lock:
+            self.path = path
+            self.pending = []
+            self.trace_id = random.getrandbits(128)
+            self.enabled = True
+        logging.info(f"Tracing run to {path}")
+
+    def stop(self) -> None:
+        self.flush()
+        self.enabled = False
+        with self.write_lock:
+            if self.file is None:
+                return
+            if not self.path.endswith(OTLP_SUFFIX):  # type: ignore
+                self.file.write("\n]\n")
+            self.file.close()
+            self.file = None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """Time the enclosed block as a child of the current span on this thread"""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        stack = self._stack()
+        span = Span(name, attributes, random.getrandbits(64), stack[-1].span_id if stack else None)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            stack.pop()
+            with self.lock:
+                self.pending.append(span)
+                flush = len(self.pending) >= FLUSH_EVERY
+            if flush:
+                self.flush()
+
+    def flush(self) -> None:
+        """Append the spans finished since the last flush to the trace file"""
+        if not self.enabled or not self.path:
+            return
+        with self.lock:
+            spans, self.pending = self.pending, []
+        if not spans:
+            return
+        try:
+            with self.write_lock:
+                if self.file is None:
+                    return
+                if self.path.endswith(OTLP_SUFFIX):
+                    self.file.write(json.dumps(self.to_otlp(spans), ensure_ascii=False) + "\n")
+                else:
+                    for event in self.to_chrome(spans):
+                        self.file.write(("\n" if not self._events_written else ",\n") +
+                                        json.dumps(event, ensure_ascii=False))
+                        self._events_written += 1
+                self.file.flush()
+        except Exception as e:
+            logging.error(f"Error writing trace file: {e}")
+
+    @staticmethod
+    def to_chrome(spans: List[Span]) -> List[Dict[str, Any]]:
+        """Chrome trace events (chrome://tracing, Perfetto, speedscope)"""
+        pid = os.getpid()
+        return [{
+            "name": span.name,
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": pid,
+            "tid": span.thread_id,
+            "args": {key: _json_value(value) for key, value in span.attributes.items()},
+        } for span in spans]
+
+    def to_otlp(self, spans: List[Span]) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest for `spans`, importable by Jaeger/Tempo tooling"""
+        trace_id = f"{self.trace_id:032x}"
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", "jobinja-scraper")]},
+            "scopeSpans": [{
+                "scope": {"name": "tracing"},
+                "spans": [{
+                    "traceId": trace_id,
+                    "spanId": f"{span.span_id:016x}",
+                    "parentSpanId": f"{span.parent_id:016x}" if span.parent_id else "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+                } for span in spans],
+            }],
+        }]}
+
+
+def _json_value(value: Any) -> Any:
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+# Process-wide tracer used by the scrapers; disabled until start() is called
+tracer = Tracer()
@@ -0,0 +1,336 @@
+import os
+import mmap
+import heapq
+import struct
+import bisect
+import hashlib
+import logging
+import argparse
+from array import array
+from threading import Lock
+from typing import Iterable, Iterator, Optional, Set, Dict, Any
+
+from metrics import metrics
+
+if os.name == "nt":
+    import msvcrt
+    fcntl = None
+else:
+    import fcntl
+    msvcrt = None
+
+# تنظیمات مجموعه لینک‌های دیده‌شده
+URL_HISTORY_DIR = "url_history"
+MERGE_AFTER = 50000          # delta hashes kept in memory before they are merged into the sorted file
+BLOOM_BITS_PER_URL = 10      # ~1% false positives with 7 hash functions
+BLOOM_HASHES = 7
+MIN_CAPACITY = 100000
+
+_HASHES_MAGIC = b"USET"
+_BLOOM_MAGIC = b"UBLM"
+_HASHES_HEADER = struct.Struct("<4sxxxxQ")     # magic, number of hashes (16 bytes keeps the array aligned)
+_BLOOM_HEADER = struct.Struct("<4sxxxxQQ")     # magic, capacity, number of bits
+_ITEM = 8
+
+
+def url_hash(url: str) -> int:
+    """64-bit hash of a URL; collisions are negligible below billions of URLs"""
+    return int.from_bytes(hashlib.blake2b(url.strip().encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def output_set_name(source: str, output_path: str) -> str:
+    """Set name for the links of one output file, e.g. `jobvision-jobvision_data-1a2b3c4d`"""
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    digest = hashlib.blake2b(os.path.abspath(output_path).encode("utf-8"), digest_size=4).hexdigest()
+    return f"{source}-{stem}-{digest}"
+
+
+def _try_lock(f: Any) -> bool:
+    """Non-blocking exclusive lock, released by the OS if the process dies"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+class _Bloom:
+    """Memory-mapped Bloom filter over 64-bit hashes (double hashing from the two 32-bit halves)"""
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self.bits = max(capacity * BLOOM_BITS_PER_URL, 8)
+        length = _BLOOM_HEADER.size + (self.bits + 7) // 8
+        self.created = not os.path.exists(path) or os.path.getsize(path) != length
+        if not self.created:
+            with open(path, "rb") as f:
+                magic, stored_capacity, stored_bits = _BLOOM_HEADER.unpack(f.read(_BLOOM_HEADER.size))
+            self.created = (magic, stored_capacity, stored_bits) != (_BLOOM_MAGIC, capacity, self.bits)
+        if self.created:
+            with open(path, "wb") as f:
+                f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, capacity, self.bits))
+                f.truncate(length)
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), length)
+
+    def _positions(self, value: int) -> Iterator[int]:
+        low, high = value & 0xFFFFFFFF, (value >> 32) | 1
+        for i in range(BLOOM_HASHES):
+            yield (low + i * high) % self.bits
+
+    def add(self, value: int) -> None:
+        for position in self._positions(value):
+            offset = _BLOOM_HEADER.size + position // 8
+            self.map[offset] |= 1 << (position % 8)
+
+    def __contains__(self, value: int) -> bool:
+        return all(self.map[_BLOOM_HEADER.size + position // 8] & (1 << (position % 8))
+                   for position in self._positions(value))
+
+    def close(self) -> None:
+        if not self.map.closed:
+            self.map.flush()
+            self.map.close()
+        self.file.close()
+
+
+class UrlSet:
+    """Persistent set of seen URLs that stays small and fast at millions of entries
+
+    URLs are stored as 64-bit hashes: a sorted, memory-mapped file for everything already
+    merged, plus an in-memory delta whose hashes are also appended to a log so a killed
+    run loses nothing. A Bloom filter answers most "not seen" lookups without touching
+    either; the rest are a set lookup or a binary search. Checkpoints only append the new
+    hashes, and the delta is merged into the sorted file every `MERGE_AFTER` additions.
+
+    A set is open in one process at a time: it holds a lock on `<name>.lock` until `close()`,
+    since merging rewrites files another process would still have mapped.
+    """
+
+    def __init__(self, name: str, directory: str = URL_HISTORY_DIR, merge_after: int = MERGE_AFTER):
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.lock_file = open(os.path.join(directory, f"{name}.lock"), "a+")
+        if not _try_lock(self.lock_file):
+            self.lock_file.close()
+            raise RuntimeError(f"URL set {name} is open in another process")
+        self.hashes_path = os.path.join(directory, f"{name}.hashes")
+        self.delta_path = os.path.join(directory, f"{name}.delta")
+        self.bloom_path = os.path.join(directory, f"{name}.bloom")
+        self.merge_after = merge_after
+        self.lock = Lock()
+        self.delta: Set[int] = set()
+        self.file = self.map = self.view = None
+        self.bloom: Optional[_Bloom] = None
+
+        self._open_sorted()
+        if os.path.exists(self.delta_path):
+            logged = array("Q")
+            with open(self.delta_path, "rb") as f:
+                data = f.read()
+            logged.frombytes(data[:len(data) - len(data) % _ITEM])  # a torn last write is dropped
+            self.delta = {value for value in logged if not self._in_sorted(value)}
+        self.delta_log = open(self.delta_path, "ab")
+        self._open_bloom()
+        if self.delta:
+            for value in self.delta:
+                self.bloom.add(value)  # type: ignore
+        if len(self.delta) >= self.merge_after:
+            self._merge()
+
+    # --- storage ---------------------------------------------------------------
+
+    def _open_sorted(self) -> None:
+        if not os.path.exists(self.hashes_path):
+            with open(self.hashes_path, "wb") as f:
+                f.write(_HASHES_HEADER.pack(_HASHES_MAGIC, 0))
+        self.file = open(self.hashes_path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HASHES_HEADER.unpack_from(self.map, 0)
+        if magic != _HASHES_MAGIC or len(self.map) != _HASHES_HEADER.size + count * _ITEM:
+            self._close_sorted()
+            raise ValueError(f"Invalid URL set file: {self.hashes_path}")
+        self.view = memoryview(self.map)[_HASHES_HEADER.size:].cast("Q")
+
+    def _close_sorted(self) -> None:
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.map is not None and not self.map.closed:
+            self.map.close()
+        if self.file is not None:
+            self.file.close()
+
+    def _open_bloom(self, rebuild: bool = False) -> None:
+        """Sized for twice the current content; rebuilt when it fills up"""
+        stored = len(self.view) + len(self.delta)  # type: ignore
+        capacity = max(MIN_CAPACITY, 2 * stored)
+        if self.bloom is not None:
+            if stored <= self.bloom.capacity and not rebuild:
+                return
+            self.bloom.close()
+        if rebuild and os.path.exists(self.bloom_path):
+            os.remove(self.bloom_path)  # bits of removed hashes would stay set
+        self.bloom = _Bloom(self.bloom_path, capacity)
+        if self.bloom.created:
+            for value in self.view:  # type: ignore
+                self.bloom.add(value)
+            for value in self.delta:
+                self.bloom.add(value)
+            metrics.inc("url_set_bloom_rebuilds")
+
+    def _in_sorted(self, value: int) -> bool:
+        index = bisect.bisect_left(self.view, value)  # type: ignore
+        return index < len(self.view) and self.view[index] == value  # type: ignore
+
+    def _merge(self) -> None:
+        """Fold the delta into the sorted file with a streaming merge"""
+        self._replace_sorted(heapq.merge(self.view, sorted(self.delta)))  # type: ignore
+        self._open_bloom()
+        metrics.inc("url_set_merges")
+
+    def _replace_sorted(self, values: Iterable[int]) -> None:
+        """Write ascending `values` as the new sorted file and empty the delta"""
+        tmp_path = f"{self.hashes_path}.tmp"
+        count = 0
+        with open(tmp_path, "wb") as f:
+            f.write(_HASHES_HEADER.pack(_HASHES_MAGIC, 0))
+            chunk, previous = array("Q"), None
+            for value in values:
+                if value == previous:
+                    continue
+                chunk.append(value)
+                previous = value
+                if len(chunk) >= 65536:
+                    chunk.tofile(f)
+                    count += len(chunk)
+                    chunk = array("Q")
+            chunk.tofile(f)
+            count += len(chunk)
+            f.seek(0)
+            f.write(_HASHES_HEADER.pack(_HASHES_MAGIC, count))
+        self._close_sorted()
+        os.replace(tmp_path, self.hashes_path)
+        # Only now is the delta durable elsewhere; a crash before this point replays the log
+        self.delta_log.close()
+        self.delta_log = open(self.delta_path, "wb")
+        self.delta = set()
+        self._open_sorted()
+
+    # --- public API ------------------------------------------------------------
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_hash(url_hash(url))
+
+    def contains_hash(self, value: int) -> bool:
+        with self.lock:
+            if value not in self.bloom:  # type: ignore
+                return False
+            return value in self.delta or self._in_sorted(value)
+
+    def add(self, url: str) -> bool:
+        """Mark `url` as seen; False if it already was"""
+        value = url_hash(url)
+        with self.lock:
+            if value in self.bloom and (value in self.delta or self._in_sorted(value)):  # type: ignore
+                return False
+            self.delta_log.write(array("Q", [value]).tobytes())
+            self.delta.add(value)
+            self.bloom.add(value)  # type: ignore
+            if len(self.delta) >= self.merge_after:
+                self.delta_log.flush()
+                self._merge()
+            return True
+
+    def update(self, urls: Iterable[str]) -> int:
+        """Add several URLs; returns how many were new"""
+        return sum(self.add(url) for url in urls)
+
+    def sync(self, urls: Iterable[str]) -> bool:
+        """Make the set hold exactly `urls`, the links of the file it stands for
+
+        Rows removed from that file, or a file replaced by another, would otherwise stay
+        "seen" and be skipped forever. Returns True if the set had to be rebuilt.
+        """
+        values = {url_hash(url) for url in urls}
+        with self.lock:
+            if len(self.view) + len(self.delta) == len(values) and \
+                    all(value in self.delta or self._in_sorted(value) for value in values):  # type: ignore
+                return False
+            self.delta_log.flush()
+            self._replace_sorted(sorted(values))
+            self._open_bloom(rebuild=True)
+            metrics.inc("url_set_resyncs")
+            return True
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.view) + len(self.delta)  # type: ignore
+
+    def flush(self) -> None:
+        """Checkpoint: make the hashes added so far survive a crash"""
+        with self.lock:
+            self.delta_log.flush()
+            os.fsync(self.delta_log.fileno())
+
+    def compact(self) -> None:
+        with self.lock:
+            self.delta_log.flush()
+            if self.delta:
+                self._merge()
+
+    def close(self) -> None:
+        with self.lock:
+            self.delta_log.close()
+            self._close_sorted()
+            if self.bloom is not None:
+                self.bloom.close()
+            self.lock_file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"urls": len(self.view) + len(self.delta), "delta": len(self.delta),  # type: ignore
+                    "bytes": sum(os.path.getsize(path) for path in
+                                 (self.hashes_path, self.delta_path, self.bloom_path))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seen-URL set tools")
+    parser.add_argument("name", help="Set name, as in url_history/ (e.g. jobvision-jobvision_data-<hash>)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show size of the set")
+    subparsers.add_parser("compact", help="Merge the delta into the sorted file")
+    check_parser = subparsers.add_parser("check", help="Is a URL in the set?")
+    check_parser.add_argument("url")
+    import_parser = subparsers.add_parser("import", help="Add URLs from a text file (one per line)")
+    import_parser.add_argument("file")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    urls = UrlSet(args.name)
+    try:
+        if args.command == "stats":
+            print(urls.stats())
+        elif args.command == "compact":
+            urls.compact()
+            logging.info(f"{args.name}: {len(urls)} URLs")
+        elif args.command == "check":
+            print(args.url in urls)
+        elif args.command == "import":
+            with open(args.file, "r", encoding="utf-8") as f:
+                added = urls.update(line for line in f if line.strip())
+            urls.compact()
+            logging.info(f"Added {added} new URLs to {args.name} ({len(urls)} total)")
+    finally:
+        urls.close()
+
+
+if __name__ == "__main__":
+    main()
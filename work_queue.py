@@ -0,0 +1,414 @@
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import argparse
+from abc import ABC, abstractmethod
+from threading import Thread, Event
+from typing import Optional, Dict, List, Iterable, NamedTuple
+
+# تنظیمات صف کاری
+DEFAULT_DB_PATH = "work_queue.sqlite"
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BATCH_SIZE = 5
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"
+
+
+class Lease(NamedTuple):
+    """A URL handed out to one worker until `expires_at`"""
+    url: str
+    token: str
+    owner: str
+    attempt: int
+    expires_at: float
+
+
+class QueueBackend(ABC):
+    """Storage interface for the distributed work queue"""
+
+    @abstractmethod
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """Add URLs that are not already queued, return how many were added"""
+
+    @abstractmethod
+    def lease(self, owner: str, lease_seconds: float, limit: int, max_attempts: int) -> List[Lease]:
+        """Hand out up to `limit` pending or expired items to `owner`"""
+
+    @abstractmethod
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> Optional[Lease]:
+        """Extend a lease, return None if it was lost to another worker"""
+
+    @abstractmethod
+    def complete(self, lease: Lease) -> bool:
+        """Mark a leased item as done"""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str, max_attempts: int) -> str:
+        """Release a failed item for retry or move it to the dead-letter state"""
+
+    @abstractmethod
+    def release(self, lease: Lease) -> bool:
+        """Hand back an unfinished item without counting the attempt"""
+
+    @abstractmethod
+    def requeue_dead(self) -> int:
+        """Move dead-lettered items back to pending with a fresh attempt count"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Item counts per status"""
+
+    def close(self) -> None:
+        """Release backend resources"""
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """Queue backend over a shared SQLite file (WAL mode, one connection per process)"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, timeout: float = 30.0):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_token TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_work_items_status
+                ON work_items(status, lease_expires);
+        """)
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        now = time.time()
+        rows = [(url.strip(), now, now) for url in urls if url and url.strip()]
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO work_items (url, enqueued_at, updated_at) VALUES (?, ?, ?)",
+                rows
+            )
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+            return added
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def lease(self, owner: str, lease_seconds: float, limit: int, max_attempts: int) -> List[Lease]:
+        now = time.time()
+        leases = []
+        # BEGIN IMMEDIATE takes the write lock up front so two nodes never pick the same rows
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases that already used up their attempts go to the dead-letter state
+            self.conn.execute(
+                """UPDATE work_items SET status = ?, lease_owner = NULL, lease_token = NULL,
+                       last_error = COALESCE(last_error, 'lease expired'), updated_at = ?
+                   WHERE status = ? AND lease_expires < ? AND attempts >= ?""",
+                (STATUS_DEAD, now, STATUS_LEASED, now, max_attempts)
+            )
+            rows = self.conn.execute(
+                """SELECT url, attempts FROM work_items
+                   WHERE status = ? OR (status = ? AND lease_expires < ?)
+                   ORDER BY enqueued_at, url LIMIT ?""",
+                (STATUS_PENDING, STATUS_LEASED, now, limit)
+            ).fetchall()
+
+            expires_at = now + lease_seconds
+            for url, attempts in rows:
+                token = uuid.uuid4().hex
+                self.conn.execute(
+                    """UPDATE work_items SET status = ?, attempts = attempts + 1, lease_owner = ?,
+                           lease_token = ?, lease_expires = ?, updated_at = ?
+                       WHERE url = ?""",
+                    (STATUS_LEASED, owner, token, expires_at, now, url)
+                )
+                leases.append(Lease(url, token, owner, attempts + 1, expires_at))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return leases
+
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> Optional[Lease]:
+        now = time.time()
+        expires_at = now + lease_seconds
+        cursor = self.conn.execute(
+            """UPDATE work_items SET lease_expires = ?, updated_at = ?
+               WHERE url = ? AND status = ? AND lease_token = ?""",
+            (expires_at, now, lease.url, STATUS_LEASED, lease.token)
+        )
+        if cursor.rowcount == 0:
+            return None
+        return lease._replace(expires_at=expires_at)
+
+    def complete(self, lease: Lease) -> bool:
+        cursor = self.conn.execute(
+            """UPDATE work_items SET status = ?, lease_owner = NULL, lease_token = NULL,
+                   lease_expires = NULL, last_error = NULL, updated_at = ?
+               WHERE url = ? AND status = ? AND lease_token = ?""",
+            (STATUS_DONE, time.time(), lease.url, STATUS_LEASED, lease.token)
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, lease: Lease, error: str, max_attempts: int) -> str:
+        status = STATUS_DEAD if lease.attempt >= max_attempts else STATUS_PENDING
+        cursor = self.conn.execute(
+            """UPDATE work_items SET status = ?, lease_owner = NULL, lease_token = NULL,
+                   lease_expires = NULL, last_error = ?, updated_at = ?
+               WHERE url = ? AND status = ? AND lease_token = ?""",
+            (status, error[:1000], time.time(), lease.url, STATUS_LEASED, lease.token)
+        )
+        return status if cursor.rowcount > 0 else STATUS_LEASED
+
+    def release(self, lease: Lease) -> bool:
+        cursor = self.conn.execute(
+            """UPDATE work_items SET status = ?, attempts = MAX(attempts - 1, 0), lease_owner = NULL,
+                   lease_token = NULL, lease_expires = NULL, updated_at = ?
+               WHERE url = ? AND status = ? AND lease_token = ?""",
+            (STATUS_PENDING, time.time(), lease.url, STATUS_LEASED, lease.token)
+        )
+        return cursor.rowcount > 0
+
+    def requeue_dead(self) -> int:
+        cursor = self.conn.execute(
+            "UPDATE work_items SET status = ?, attempts = 0, updated_at = ? WHERE status = ?",
+            (STATUS_PENDING, time.time(), STATUS_DEAD)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_DEAD: 0}
+        for status, count in self.conn.execute(
+                "SELECT status, COUNT(*) FROM work_items GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class WorkQueue:
+    """Lease-based work queue shared by several worker processes or machines"""
+
+    def __init__(self, backend: QueueBackend, worker_id: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.backend = backend
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        return self.backend.enqueue(urls)
+
+    def lease(self, limit: int = DEFAULT_BATCH_SIZE) -> List[Lease]:
+        return self.backend.lease(self.worker_id, self.lease_seconds, limit, self.max_attempts)
+
+    def heartbeat(self, lease: Lease) -> Optional[Lease]:
+        return self.backend.heartbeat(lease, self.lease_seconds)
+
+    def complete(self, lease: Lease) -> bool:
+        return self.backend.complete(lease)
+
+    def fail(self, lease: Lease, error: str) -> str:
+        return self.backend.fail(lease, error, self.max_attempts)
+
+    def release(self, lease: Lease) -> bool:
+        return self.backend.release(lease)
+
+    def requeue_dead(self) -> int:
+        return self.backend.requeue_dead()
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+class LeaseHeartbeat:
+    """Keeps a lease alive from a background thread while the item is processed"""
+
+    def __init__(self, queue: WorkQueue, lease: Lease, interval: Optional[float] = None):
+        self.queue = queue
+        self.lease = lease
+        self.interval = interval or max(1.0, queue.lease_seconds / 3)
+        self.lost = Event()
+        self._stop = Event()
+        self._thread = Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                renewed = self.queue.heartbeat(self.lease)
+            except Exception as e:
+                logging.error(f"Heartbeat error for {self.lease.url}: {e}")
+                continue
+            if renewed is None:
+                logging.warning(f"Lease lost for {self.lease.url}")
+                self.lost.set()
+                return
+            self.lease = renewed
+
+    def __enter__(self) -> 'LeaseHeartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class QueueWorker:
+    """Runs Updater_table-style detail extraction against leases from a shared queue"""
+
+    def __init__(self, queue: WorkQueue, scraper, excel_handler, output_file: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE, idle_poll_seconds: float = 10):
+        self.queue = queue
+        self.scraper = scraper
+        self.excel_handler = excel_handler
+        self.output_file = output_file
+        self.batch_size = batch_size
+        self.idle_poll_seconds = idle_poll_seconds
+        self.stopped = Event()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def record_outcome(self, heartbeat: LeaseHeartbeat, data: Optional[Dict[str, str]],
+                       error: Optional[Exception]) -> None:
+        """Write a finished item and settle its lease"""
+        # The item is settled either way; renewing it further would only report a lost lease
+        heartbeat.__exit__(None, None, None)
+        lease = heartbeat.lease
+        if error is not None:
+            status = self.queue.fail(lease, str(error))
+            logging.error(f"Failed {lease.url} (attempt {lease.attempt}, now {status}): {error}")
+            return
+        # Claim the item before writing, so a lease re-issued meanwhile cannot produce a second row
+        if heartbeat.lost.is_set() or not self.queue.complete(lease):
+            logging.warning(f"Discarding result for {lease.url}: lease was re-issued")
+            return
+        self.excel_handler.append_data(self.output_file, data)
+        logging.info(f"Done {lease.url}")
+
+    def process_batch(self, leases: List[Lease]) -> None:
+        """Extract a batch of leased URLs; the next page loads while the previous one is parsed"""
+        heartbeats = {lease.url: LeaseHeartbeat(self.queue, lease) for lease in leases}
+        for heartbeat in heartbeats.values():
+            heartbeat.__enter__()
+        pending = dict(heartbeats)
+        try:
+            results = self.scraper.extract_many([lease.url for lease in leases])
+            for url, data, error in results:
+                self.record_outcome(pending.pop(url), data, error)
+                if self.stopped.is_set():
+                    results.close()
+                    break
+            for heartbeat in pending.values():
+                # Hand back what we have not finished so other nodes can take it
+                self.queue.release(heartbeat.lease)
+        finally:
+            for heartbeat in heartbeats.values():
+                heartbeat.__exit__(None, None, None)
+
+    def run(self, exit_when_empty: bool = True) -> None:
+        """Lease and process items until the queue drains or `stop()` is called"""
+        if not os.path.exists(self.output_file):
+            self.excel_handler.create_new_output_file(self.output_file)
+
+        try:
+            while not self.stopped.is_set():
+                leases = self.queue.lease(self.batch_size)
+                if not leases:
+                    stats = self.queue.stats()
+                    if exit_when_empty and stats[STATUS_PENDING] == 0 and stats[STATUS_LEASED] == 0:
+                        logging.info(f"Queue drained: {stats}")
+                        break
+                    self.stopped.wait(self.idle_poll_seconds)
+                    continue
+
+                self.process_batch(leases)
+        finally:
+            self.scraper.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared work queue for Jobinja detail URLs")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the shared SQLite queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue links from an input Excel file")
+    enqueue_parser.add_argument("input_file")
+
+    work_parser = subparsers.add_parser("work", help="Run a worker on this node")
+    work_parser.add_argument("output_file")
+    work_parser.add_argument("--driver", default="C:/Users/ASUS/Desktop/chromedriver-win64/chromedriver.exe")
+    work_parser.add_argument("--worker-id")
+    work_parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    work_parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    work_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    work_parser.add_argument("--delay", type=float, default=2, help="Minimum seconds between detail page loads")
+    work_parser.add_argument("--forever", action="store_true", help="Keep polling when the queue is empty")
+
+    subparsers.add_parser("stats", help="Show item counts per status")
+    subparsers.add_parser("requeue-dead", help="Retry dead-lettered items")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "work":
+        queue = WorkQueue(SQLiteQueueBackend(args.db), worker_id=args.worker_id,
+                          lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    else:
+        queue = WorkQueue(SQLiteQueueBackend(args.db))
+
+    try:
+        if args.command == "enqueue":
+            from Updater_table import ExcelHandler
+            links = ExcelHandler().read_input_links(args.input_file)
+            added = queue.enqueue(links)
+            logging.info(f"Queued {added} new links ({len(links) - added} already known)")
+        elif args.command == "work":
+            from Updater_table import JobinjaScraper, ExcelHandler, DETAIL_JITTER
+            from rollups import RollupStore
+            from html_archive import HtmlArchive
+            from rate_limiter import RateLimiter
+            # The scraper spaces its own requests; --delay sets that limiter's floor
+            scraper = JobinjaScraper(args.driver, HtmlArchive(), RateLimiter(args.delay, args.delay + DETAIL_JITTER))
+            worker = QueueWorker(queue, scraper, ExcelHandler(RollupStore()), args.output_file,
+                                 batch_size=args.batch_size)
+            try:
+                worker.run(exit_when_empty=not args.forever)
+            except KeyboardInterrupt:
+                logging.info("Worker stopped by user")
+        elif args.command == "stats":
+            print(queue.stats())
+        elif args.command == "requeue-dead":
+            logging.info(f"Re-queued {queue.requeue_dead()} dead-lettered links")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()